@@ -4,6 +4,7 @@ Django admin config for card app
 
 from django import forms
 from django.contrib import admin
+from django.db import transaction
 from djangoql.admin import DjangoQLSearchMixin
 
 from sylvan_library.cards.models.card import (
@@ -19,10 +20,11 @@ from sylvan_library.cards.models.card import (
     CardImage,
     UserCardChange,
     UserOwnedCard,
+    UserOwnershipTotal,
     FrameEffect,
 )
 from sylvan_library.cards.models.card_price import CardPrice
-from sylvan_library.cards.models.decks import DeckCard, Deck
+from sylvan_library.cards.models.decks import DeckCard, Deck, UserCardDeckUsage
 from sylvan_library.cards.models.legality import CardLegality
 from sylvan_library.cards.models.ruling import CardRuling
 from sylvan_library.cards.models.sets import Set, Block, Format
@@ -461,11 +463,66 @@ class DeckAdmin(DjangoQLSearchMixin, admin.ModelAdmin):
     list_filter = ["owner", "format"]
     inlines = [DeckCardInline]
 
+    def save_model(self, request, obj, form, change) -> None:
+        previous_owner_id = None
+        if change:
+            previous_owner_id = (
+                Deck.objects.filter(pk=obj.pk).values_list("owner_id", flat=True).get()
+            )
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if previous_owner_id is not None and previous_owner_id != obj.owner_id:
+                # The cards of the deck are now used by the new owner instead
+                card_ids = list(obj.cards.values_list("card_id", flat=True))
+                UserCardDeckUsage.refresh(previous_owner_id, card_ids)
+                UserCardDeckUsage.refresh(obj.owner_id, card_ids)
+
 
 @admin.register(UserOwnedCard)
 class UserOwnedCardAdmin(DjangoQLSearchMixin, admin.ModelAdmin):
+    """
+    Admin for the cards that users own. The ownership totals are updated with every change,
+    as the card searches only read the totals
+    """
+
     autocomplete_fields = ["card_localisation", "owner"]
 
+    @staticmethod
+    def remove_from_totals(ownership: UserOwnedCard) -> None:
+        """
+        Takes an ownership (as it is in the database) away from the ownership totals
+        :param ownership: The ownership to remove
+        """
+        UserOwnershipTotal.apply_localisation_change(
+            ownership.owner_id, ownership.card_localisation, -ownership.count
+        )
+
+    def save_model(self, request, obj, form, change) -> None:
+        with transaction.atomic():
+            if change:
+                self.remove_from_totals(
+                    UserOwnedCard.objects.select_related(
+                        "card_localisation__card_printing"
+                    ).get(pk=obj.pk)
+                )
+            super().save_model(request, obj, form, change)
+            UserOwnershipTotal.apply_localisation_change(
+                obj.owner_id, obj.card_localisation, obj.count
+            )
+
+    def delete_model(self, request, obj) -> None:
+        with transaction.atomic():
+            self.remove_from_totals(obj)
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset) -> None:
+        with transaction.atomic():
+            for ownership in queryset.select_related(
+                "card_localisation__card_printing"
+            ):
+                self.remove_from_totals(ownership)
+            super().delete_queryset(request, queryset)
+
 
 @admin.register(UserCardChange)
 class UserCardChangeAdmin(DjangoQLSearchMixin, admin.ModelAdmin):
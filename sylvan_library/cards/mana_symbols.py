@@ -0,0 +1,47 @@
+"""
+Module for reading the symbols in mana costs
+"""
+
+import functools
+import re
+import typing
+from collections import Counter
+
+# A symbol in braces (for example "{W/U}"), or a number or single character outside of braces
+RE_MANA_SYMBOL = re.compile(r"{([^{}]*)}|(\d+|[^{}])")
+
+# There are only a few thousand distinct mana costs, so they can all be kept
+MANA_COST_CACHE_SIZE = 8192
+
+
+@functools.lru_cache(maxsize=MANA_COST_CACHE_SIZE)
+def count_mana_symbols(mana_cost: str) -> typing.Counter[str]:
+    """
+    Counts each symbol in a mana cost in a single pass. Symbols are counted without their
+    braces (so "{2}{W/U}{W/U}" has one "2" and two "W/U"), and each number or other character
+    outside of braces is counted as a symbol by itself (so "2WW" is the same as "{2}{W}{W}").
+    The counts are cached by mana cost, so they shouldn't be modified
+    :param mana_cost: The mana cost
+    :return: The number of each symbol in the cost
+    :raises ValueError: If the braces of the cost don't match
+    """
+    counts: typing.Counter[str] = Counter()
+    pos = 0
+    while pos < len(mana_cost):
+        match = RE_MANA_SYMBOL.match(mana_cost, pos)
+        if not match:
+            if mana_cost[pos] == "{":
+                raise ValueError(f"Could not parse {mana_cost}: expected '}}'")
+            raise ValueError(f"Could not parse {mana_cost}: unexpected '}}'")
+        counts[match.group(1) if match.group(2) is None else match.group(2)] += 1
+        pos = match.end()
+    return counts
+
+
+def get_generic_mana(symbol_counts: typing.Counter[str]) -> int:
+    """
+    Gets the amount of generic mana in a mana cost
+    :param symbol_counts: The counts of the symbols of the cost (see count_mana_symbols)
+    :return: The number in the first numerical symbol of the cost (or 0 if there isn't one)
+    """
+    return next((int(symbol) for symbol in symbol_counts if symbol.isdecimal()), 0)
@@ -0,0 +1,117 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def populate_ownership_totals(apps, schema_editor):
+    UserOwnedCard = apps.get_model("cards", "UserOwnedCard")
+    for model_name, total_field, ownership_path in (
+        (
+            "UserCardOwnershipTotal",
+            "card_id",
+            "card_localisation__card_printing__card_id",
+        ),
+        (
+            "UserPrintingOwnershipTotal",
+            "card_printing_id",
+            "card_localisation__card_printing_id",
+        ),
+    ):
+        total_model = apps.get_model("cards", model_name)
+        total_model.objects.bulk_create(
+            (
+                total_model(
+                    owner_id=row["owner_id"],
+                    count=row["total"],
+                    **{total_field: row[ownership_path]},
+                )
+                for row in UserOwnedCard.objects.values("owner_id", ownership_path)
+                .annotate(total=Sum("count"))
+                .filter(total__gt=0)
+                .order_by()
+            ),
+            batch_size=5000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0009_cardprinting_is_universes_beyond"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserCardOwnershipTotal",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "card",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ownership_totals",
+                        to="cards.card",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="card_ownership_totals",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("owner", "card")},
+            },
+        ),
+        migrations.CreateModel(
+            name="UserPrintingOwnershipTotal",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "card_printing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ownership_totals",
+                        to="cards.cardprinting",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="printing_ownership_totals",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("owner", "card_printing")},
+            },
+        ),
+        migrations.RunPython(populate_ownership_totals, migrations.RunPython.noop),
+    ]
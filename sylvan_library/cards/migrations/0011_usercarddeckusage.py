@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_deck_usages(apps, schema_editor):
+    DeckCard = apps.get_model("cards", "DeckCard")
+    UserCardDeckUsage = apps.get_model("cards", "UserCardDeckUsage")
+    UserCardDeckUsage.objects.bulk_create(
+        (
+            UserCardDeckUsage(
+                owner_id=row["deck__owner_id"],
+                card_id=row["card_id"],
+                deck_count=row["deck_count"],
+                commander_count=row["commander_count"],
+            )
+            for row in DeckCard.objects.values("deck__owner_id", "card_id")
+            .annotate(
+                deck_count=Count("deck_id", distinct=True),
+                commander_count=Count(
+                    "deck_id", distinct=True, filter=Q(is_commander=True)
+                ),
+            )
+            .order_by()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0010_user_ownership_totals"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserCardDeckUsage",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("deck_count", models.PositiveIntegerField()),
+                ("commander_count", models.PositiveIntegerField()),
+                (
+                    "card",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="deck_usages",
+                        to="cards.card",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="card_deck_usages",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("owner", "card")},
+            },
+        ),
+        migrations.RunPython(populate_deck_usages, migrations.RunPython.noop),
+    ]
@@ -8,8 +8,9 @@ import random
 from typing import Optional
 
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import Sum, IntegerField, Case, When
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
 
 from sylvan_library.bitfield import BitField
 from sylvan_library.cards.models.colour import Colour
@@ -108,18 +109,12 @@ class Card(models.Model):
                 if ownership.owner_id == user.id
             )
 
-        return self.printings.aggregate(
-            card_count=Sum(
-                Case(
-                    When(
-                        localisations__ownerships__owner=user,
-                        then="localisations__ownerships__count",
-                    ),
-                    output_field=IntegerField(),
-                    default=0,
-                )
-            )
-        )["card_count"]
+        return (
+            self.ownership_totals.filter(owner=user)
+            .values_list("count", flat=True)
+            .first()
+            or 0
+        )
 
     @property
     def is_wide(self) -> bool:
@@ -401,15 +396,12 @@ class CardPrinting(models.Model):
                 if ownership.owner_id == user.id
             )
 
-        return self.localisations.aggregate(
-            card_count=Sum(
-                Case(
-                    When(ownerships__owner=user, then="ownerships__count"),
-                    output_field=IntegerField(),
-                    default=0,
-                )
-            )
-        )["card_count"]
+        return (
+            self.ownership_totals.filter(owner=user)
+            .values_list("count", flat=True)
+            .first()
+            or 0
+        )
 
 
 class FrameEffect(models.Model):
@@ -489,6 +481,7 @@ class CardLocalisation(models.Model):
     def __str__(self):
         return f"{self.language} {self.card_printing}"
 
+    @transaction.atomic
     def apply_user_change(self, change_count: int, user: get_user_model()) -> bool:
         """
         Applies a change of the number of cards a user owns (can add or subtract cards)
@@ -522,6 +515,8 @@ class CardLocalisation(models.Model):
             new_ownership.clean()
             new_ownership.save()
 
+        UserOwnershipTotal.apply_localisation_change(user.id, self, change_count)
+
         change = UserCardChange(
             card_localisation=self,
             owner=user,
@@ -628,6 +623,151 @@ class UserOwnedCard(models.Model):
         return f"{self.owner} owns {self.count} of {self.card_localisation}"
 
 
+class UserOwnershipTotal(models.Model):
+    """
+    Base model for the total number of cards that a user owns of something, summed over the
+    UserOwnedCard records under it. These are kept up to date as the ownerships change, so that
+    searching by ownership doesn't need to add up every ownership each time
+    """
+
+    count = models.PositiveIntegerField()
+
+    # The name of the field that the totals are for, and the path to it from a UserOwnedCard
+    total_field: str = ""
+    ownership_path: str = ""
+
+    class Meta:
+        """
+        Meta information for the UserOwnershipTotal classes
+        """
+
+        abstract = True
+
+    @classmethod
+    def apply_change(cls, owner_id: int, object_id: int, difference: int) -> None:
+        """
+        Adds to (or subtracts from) the total of the given user and object
+        :param owner_id: The ID of the user who owns the cards
+        :param object_id: The ID of the object that the total is for
+        :param difference: The change in the number of cards the user owns
+        """
+        totals = cls.objects.filter(owner_id=owner_id, **{cls.total_field: object_id})
+        updated = totals.update(count=Greatest(F("count") + difference, 0))
+        if not updated and difference > 0:
+            cls.objects.create(
+                owner_id=owner_id, count=difference, **{cls.total_field: object_id}
+            )
+        elif difference < 0:
+            totals.filter(count=0).delete()
+
+    @classmethod
+    def rebuild(cls, owner: Optional[get_user_model()] = None) -> None:
+        """
+        Recalculates all the totals from the UserOwnedCard records
+        :param owner: The user to recalculate the totals of, or None for every user
+        """
+        ownerships = UserOwnedCard.objects.all()
+        totals = cls.objects.all()
+        if owner is not None:
+            ownerships = ownerships.filter(owner=owner)
+            totals = totals.filter(owner=owner)
+
+        with transaction.atomic():
+            totals.delete()
+            cls.objects.bulk_create(
+                (
+                    cls(
+                        owner_id=row["owner_id"],
+                        count=row["total"],
+                        **{cls.total_field: row[cls.ownership_path]},
+                    )
+                    for row in ownerships.values("owner_id", cls.ownership_path)
+                    .annotate(total=Sum("count"))
+                    .filter(total__gt=0)
+                    .order_by()
+                ),
+                batch_size=5000,
+            )
+
+    @staticmethod
+    def apply_localisation_change(
+        owner_id: int, card_localisation: CardLocalisation, difference: int
+    ) -> None:
+        """
+        Updates the card and printing totals after a change in the number of a localisation a
+        user owns
+        :param owner_id: The ID of the user who owns the cards
+        :param card_localisation: The localisation that was added or removed
+        :param difference: The change in the number of cards the user owns
+        """
+        card_printing = card_localisation.card_printing
+        UserCardOwnershipTotal.apply_change(owner_id, card_printing.card_id, difference)
+        UserPrintingOwnershipTotal.apply_change(owner_id, card_printing.id, difference)
+
+    @staticmethod
+    def rebuild_all(owner: Optional[get_user_model()] = None) -> None:
+        """
+        Recalculates both the card and printing totals from the UserOwnedCard records
+        :param owner: The user to recalculate the totals of, or None for every user
+        """
+        UserCardOwnershipTotal.rebuild(owner)
+        UserPrintingOwnershipTotal.rebuild(owner)
+
+
+class UserCardOwnershipTotal(UserOwnershipTotal):
+    """
+    Model for the total number of a card that a user owns across all printings and languages
+    """
+
+    card = models.ForeignKey(
+        Card, related_name="ownership_totals", on_delete=models.CASCADE
+    )
+    owner = models.ForeignKey(
+        get_user_model(), related_name="card_ownership_totals", on_delete=models.CASCADE
+    )
+
+    total_field = "card_id"
+    ownership_path = "card_localisation__card_printing__card_id"
+
+    class Meta:
+        """
+        Meta information for the UserCardOwnershipTotal class
+        """
+
+        unique_together = ("owner", "card")
+
+    def __str__(self):
+        return f"{self.owner} owns {self.count} of {self.card}"
+
+
+class UserPrintingOwnershipTotal(UserOwnershipTotal):
+    """
+    Model for the total number of a printing that a user owns across all languages
+    """
+
+    card_printing = models.ForeignKey(
+        CardPrinting, related_name="ownership_totals", on_delete=models.CASCADE
+    )
+    owner = models.ForeignKey(
+        get_user_model(),
+        related_name="printing_ownership_totals",
+        on_delete=models.CASCADE,
+    )
+
+    total_field = "card_printing_id"
+    ownership_path = "card_localisation__card_printing_id"
+
+    class Meta:
+        """
+        Meta information for the UserPrintingOwnershipTotal class
+        """
+
+        unique_together = ("owner", "card_printing")
+
+    def __str__(self):
+        return f"{self.owner} owns {self.count} of {self.card_printing}"
+
+
 class UserCardChange(models.Model):
     """
     Model for a change in the number of cards that a user owns
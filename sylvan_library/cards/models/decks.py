@@ -4,13 +4,15 @@ Models for deck objects
 
 import re
 from collections import defaultdict
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional, Type
 
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Sum, Avg, Q
+from django.db import models, transaction
+from django.db.models import Count, Sum, Avg, Q
+from django.db.models.signals import post_delete
 from django.contrib.auth import get_user_model
 
+from sylvan_library.cards.mana_symbols import count_mana_symbols
 from sylvan_library.cards.models.card import Card, CardType
 from sylvan_library.cards.models.colour import Colour
 from sylvan_library.cards.models.rarity import Rarity
@@ -261,28 +263,39 @@ class Deck(models.Model):
         deck_cards = list(
             self.cards.filter(board="main").prefetch_related("card__faces")
         )
+        # The symbols in the cost of each face, and the number of copies of the card
+        face_costs = [
+            (count_mana_symbols(card_face.mana_cost), deck_card.count)
+            for deck_card in deck_cards
+            for card_face in deck_card.card.faces.all()
+            if card_face.mana_cost
+        ]
         result = {}
         for colour in Colour.objects.exclude(
             id__in=self.exclude_colours.all()
         ).order_by("display_order"):
+            # Hybrid symbols count towards each of their colours
             count = sum(
-                card_face.mana_cost.count(colour.symbol) * deck_card.count
-                for deck_card in deck_cards
-                for card_face in deck_card.card.faces.all()
-                if card_face.mana_cost
+                symbol.count(colour.symbol) * symbol_count * card_count
+                for symbol_counts, card_count in face_costs
+                for symbol, symbol_count in symbol_counts.items()
             )
             if count > 0:
                 result[colour.symbol] = count
 
-        colourless_count = sum(
-            deck_card.count
-            for deck_card in deck_cards
-            if deck_card.card.faces.first().mana_cost
-            and not any(
-                colour.symbol in deck_card.card.faces.first().mana_cost
-                for colour in Colour.objects.all()
-            )
-        )
+        colour_symbols = [colour.symbol for colour in Colour.objects.all()]
+        colourless_count = 0
+        for deck_card in deck_cards:
+            first_face = deck_card.card.faces.first()
+            if not first_face.mana_cost:
+                continue
+            symbols = count_mana_symbols(first_face.mana_cost)
+            if not any(
+                colour_symbol in symbol
+                for colour_symbol in colour_symbols
+                for symbol in symbols
+            ):
+                colourless_count += deck_card.count
         if colourless_count > 0:
             result[Colour.colourless().symbol] = colourless_count
 
@@ -499,3 +512,85 @@ class DeckCard(models.Model):
             self.board == "side"
             and self.card.faces.filter(rules_text__contains="Companion — ").exists()
         )
+
+
+class UserCardDeckUsage(models.Model):
+    """
+    Model for the number of decks that a user has used a card in. This is a rollup of the
+    DeckCard records that is refreshed whenever a deck is saved or deleted, so that searching
+    by deck usage doesn't need to group every deck card
+    """
+
+    card = models.ForeignKey(Card, related_name="deck_usages", on_delete=models.CASCADE)
+    owner = models.ForeignKey(
+        get_user_model(), related_name="card_deck_usages", on_delete=models.CASCADE
+    )
+    deck_count = models.PositiveIntegerField()
+    commander_count = models.PositiveIntegerField()
+
+    class Meta:
+        """
+        Meta information for the UserCardDeckUsage class
+        """
+
+        unique_together = ("owner", "card")
+
+    def __str__(self):
+        return f"{self.owner} used {self.card} in {self.deck_count} decks"
+
+    @classmethod
+    def refresh(
+        cls, owner_id: Optional[int] = None, card_ids: Optional[Iterable[int]] = None
+    ) -> None:
+        """
+        Recalculates the deck usage of cards from the DeckCard records
+        :param owner_id: The ID of the user to recalculate the usage of, or None for all users
+        :param card_ids: The IDs of the cards to recalculate the usage of, or None for all
+        cards
+        """
+        deck_cards = DeckCard.objects.all()
+        usages = cls.objects.all()
+        if owner_id is not None:
+            deck_cards = deck_cards.filter(deck__owner_id=owner_id)
+            usages = usages.filter(owner_id=owner_id)
+        if card_ids is not None:
+            card_ids = set(card_ids)
+            deck_cards = deck_cards.filter(card_id__in=card_ids)
+            usages = usages.filter(card_id__in=card_ids)
+
+        with transaction.atomic():
+            usages.delete()
+            cls.objects.bulk_create(
+                (
+                    cls(
+                        owner_id=row["deck__owner_id"],
+                        card_id=row["card_id"],
+                        deck_count=row["deck_count"],
+                        commander_count=row["commander_count"],
+                    )
+                    for row in deck_cards.values("deck__owner_id", "card_id")
+                    .annotate(
+                        deck_count=Count("deck_id", distinct=True),
+                        commander_count=Count(
+                            "deck_id", distinct=True, filter=Q(is_commander=True)
+                        ),
+                    )
+                    .order_by()
+                ),
+                batch_size=5000,
+            )
+
+
+# pylint: disable=unused-argument
+def refresh_deleted_deck_usage(sender: Type[Deck], instance: Deck, **kwargs) -> None:
+    """
+    Refreshes the deck usage of the owner of a deck after it is deleted
+    This waits until the deletion is committed, as the owner might be being deleted as well
+    :param sender: The Deck class
+    :param instance: The deck that was deleted
+    """
+    owner_id = instance.owner_id
+    transaction.on_commit(lambda: UserCardDeckUsage.refresh(owner_id))
+
+
+post_delete.connect(refresh_deleted_deck_usage, sender=Deck)
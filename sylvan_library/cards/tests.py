@@ -7,12 +7,19 @@ from typing import Dict, Any, Optional
 
 from django.test import TestCase
 
+from django.contrib.admin import AdminSite
 from django.contrib.auth import get_user_model
+from sylvan_library.cards.admin import UserOwnedCardAdmin
+from sylvan_library.cards.mana_symbols import count_mana_symbols, get_generic_mana
 from sylvan_library.cards.models.card import (
     Card,
     CardFace,
     CardPrinting,
     CardLocalisation,
+    UserCardOwnershipTotal,
+    UserOwnedCard,
+    UserOwnershipTotal,
+    UserPrintingOwnershipTotal,
 )
 from sylvan_library.cards.models.language import Language
 from sylvan_library.cards.models.rarity import Rarity
@@ -228,3 +235,86 @@ class CardOwnershipTestCase(TestCase):
         self.assertEqual(ownership.count, 3)
         self.localisation.apply_user_change(-10, self.user)
         self.assertFalse(self.localisation.ownerships.filter(owner=self.user).exists())
+
+    def test_ownership_totals(self) -> None:
+        """
+        Tests that the ownership totals are kept up to date as cards are added and removed
+        """
+        printing = self.localisation.card_printing
+        other_localisation = create_test_card_localisation(
+            printing, create_test_language("Japanese", "ja")
+        )
+        self.localisation.apply_user_change(3, self.user)
+        other_localisation.apply_user_change(2, self.user)
+        self.assertEqual(printing.card.get_user_ownership_count(self.user), 5)
+        self.assertEqual(printing.get_user_ownership_count(self.user), 5)
+
+        self.localisation.apply_user_change(-10, self.user)
+        self.assertEqual(printing.card.get_user_ownership_count(self.user), 2)
+        other_localisation.apply_user_change(-2, self.user)
+        self.assertEqual(printing.card.get_user_ownership_count(self.user), 0)
+        self.assertFalse(UserCardOwnershipTotal.objects.exists())
+        self.assertFalse(UserPrintingOwnershipTotal.objects.exists())
+
+    def test_rebuild_ownership_totals(self) -> None:
+        """
+        Tests that the ownership totals can be recalculated after a bulk change
+        """
+        UserOwnedCard.objects.create(
+            owner=self.user, card_localisation=self.localisation, count=4
+        )
+        self.assertEqual(
+            self.localisation.card_printing.get_user_ownership_count(self.user), 0
+        )
+        UserOwnershipTotal.rebuild_all(self.user)
+        self.assertEqual(
+            self.localisation.card_printing.card.get_user_ownership_count(self.user), 4
+        )
+        self.assertEqual(
+            self.localisation.card_printing.get_user_ownership_count(self.user), 4
+        )
+
+    def test_admin_ownership_totals(self) -> None:
+        """
+        Tests that the ownership totals are kept up to date by changes made in the admin
+        """
+        model_admin = UserOwnedCardAdmin(UserOwnedCard, AdminSite())
+        card = self.localisation.card_printing.card
+        ownership = UserOwnedCard(
+            owner=self.user, card_localisation=self.localisation, count=4
+        )
+        model_admin.save_model(None, ownership, None, False)
+        self.assertEqual(card.get_user_ownership_count(self.user), 4)
+
+        ownership.count = 1
+        model_admin.save_model(None, ownership, None, True)
+        self.assertEqual(card.get_user_ownership_count(self.user), 1)
+
+        model_admin.delete_queryset(None, UserOwnedCard.objects.all())
+        self.assertEqual(card.get_user_ownership_count(self.user), 0)
+        self.assertFalse(UserCardOwnershipTotal.objects.exists())
+
+
+class ManaSymbolsTestCase(TestCase):
+    """
+    Test cases for counting the symbols in mana costs
+    """
+
+    def test_count_symbols(self) -> None:
+        """
+        Tests that symbols with and without braces are counted
+        """
+        self.assertEqual(
+            count_mana_symbols("{10}{W/U}{W/U}{G}"), {"10": 1, "W/U": 2, "G": 1}
+        )
+        self.assertEqual(count_mana_symbols("12wwu"), {"12": 1, "w": 2, "u": 1})
+        self.assertEqual(get_generic_mana(count_mana_symbols("{3}{R}")), 3)
+        self.assertEqual(get_generic_mana(count_mana_symbols("{X}{R}")), 0)
+
+    def test_unmatched_braces(self) -> None:
+        """
+        Tests that a cost with unmatched braces can't be counted
+        """
+        for mana_cost in ("{W", "{W{U}", "W}"):
+            with self.assertRaises(ValueError):
+                count_mana_symbols(mana_cost)
@@ -11,3 +11,15 @@ class CardsearchConfig(AppConfig):
     """
 
     name = "sylvan_library.cardsearch"
+
+    def ready(self) -> None:
+        # Importing the parser builds the parameter registry, which raises an error if any
+        # parameters have conflicting keywords
+        # pylint: disable=import-outside-toplevel,unused-import
+        from sylvan_library.cardsearch.parser import query_parser
+
+        # Importing the reference data connects the signals that invalidate it
+        from sylvan_library.cardsearch import reference_data
+
+        # Importing the result cache connects the signals that invalidate cached results
+        from sylvan_library.cardsearch import result_cache
@@ -2,18 +2,36 @@
 The module for the base search classes
 """
 
+import logging
+from contextlib import nullcontext
 from typing import List, Optional
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.paginator import Paginator, EmptyPage
-from django.db.models import prefetch_related_objects, QuerySet
+from django.core.paginator import EmptyPage, Page
+from django.db import connection
+from django.db.models import QuerySet, F, Q
+from django.db.models.expressions import RawSQL
+from django.test.utils import CaptureQueriesContext
 
 from sylvan_library.cards.models.card import CardPrinting, Card
 from sylvan_library.cards.models.sets import Set
 
+from sylvan_library.cardsearch.card_index import CardIndex
+from sylvan_library.cardsearch.hydration import hydrate_cards, get_preferred_printing
+from sylvan_library.cardsearch.pagination import SearchPaginator
+from sylvan_library.cardsearch.query_optimiser import optimise_tree
+from sylvan_library.cardsearch.result_cache import (
+    CachedResultPaginator,
+    cache_result_ids,
+    get_cached_result_ids,
+)
+from sylvan_library.cardsearch.search_plan import SearchPlan, plan_search
+from sylvan_library.cardsearch.timing import SearchTimings
 from sylvan_library.cardsearch.parameters.base_parameters import (
     CardSearchAnd,
     CardSearchBranchNode,
+    CardSearchTreeNode,
     QueryContext,
     ParameterArgs,
     CardSearchContext,
@@ -25,38 +43,18 @@ from sylvan_library.cardsearch.parameters.sort_parameters import (
 
 User = get_user_model()
 
+logger = logging.getLogger("django")
+
 
 class SearchResult:
     """
     A single search result including the card and its selected printing
     """
 
-    def __init__(
-        self,
-        card: Card,
-        selected_printing: Optional[CardPrinting] = None,
-        selected_set: Optional[Set] = None,
-    ):
+    def __init__(self, card: Card, selected_printing: Optional[CardPrinting] = None):
         self.card = card
         self.selected_printing = selected_printing
 
-        if self.card and selected_set and not self.selected_printing:
-            self.selected_printing = next(
-                (p for p in self.card.printings.all() if p.set == selected_set), None
-            )
-
-        if self.card and not self.selected_printing:
-            sorted_printings = sorted(
-                self.card.printings.all(),
-                key=lambda x: (x.set.release_date, -x.numerical_number),
-            )
-            # Prefer non-promotional cards if possible
-            non_promo_prints = [p for p in sorted_printings if p.set.type != "promo"]
-            if non_promo_prints:
-                self.selected_printing = non_promo_prints[-1]
-            else:
-                self.selected_printing = sorted_printings[-1]
-
         assert (
             self.selected_printing is None
             or self.card is None
@@ -81,9 +79,15 @@ class BaseSearch:
         self.user: User = user
         self.root_parameter: CardSearchBranchNode = CardSearchAnd()
         self.sort_params: List[CardSortParam] = []
-        self.paginator: Optional[Paginator] = None
+        self.paginator: Optional[SearchPaginator] = None
         self.results: List[SearchResult] = []
-        self.page: Optional[int] = None
+        self.page: Optional[Page] = None
+        # The cursor that can be used to fetch the page after this one
+        self.next_cursor: Optional[str] = None
+        # How the query of the search was run
+        self.plan: Optional[SearchPlan] = None
+        # How long each stage of the search took (when SEARCH_TIMING is on)
+        self.timings: SearchTimings = SearchTimings()
 
     def build_parameters(self) -> None:
         """
@@ -96,8 +100,7 @@ class BaseSearch:
         Gets the queryset of the search
         :return: The search queryset
         """
-        query = self.root_parameter.query(query_context)
-        print(query)
+        root_parameter = optimise_tree(self.root_parameter, query_context)
         self.sort_params.append(
             CardNameSortParam(
                 param_args=ParameterArgs(keyword="sort", operator=":", value="name"),
@@ -114,63 +117,157 @@ class BaseSearch:
             # distinct_fields.remove("name")
             distinct_fields.append("scryfall_oracle_id")
 
-        if query_context.search_mode == CardSearchContext.CARD:
-            queryset = Card.objects.filter(query)
-            print(str(queryset.query))
-        else:
-            queryset = CardPrinting.objects.filter(query)  # .distinct()
-            print(str(queryset.query))
-            queryset = Card.objects.filter(printings__in=queryset)
+        query = self.get_card_index_query(query_context, root_parameter)
+        self.plan = plan_search(
+            root_parameter,
+            query_context,
+            uses_card_index=query is not None,
+            sort_fields=distinct_fields,
+        )
+        if query is None:
+            query = root_parameter.query(query_context)
+        queryset = self.plan.get_queryset(query)
 
-        if "?" not in distinct_fields:
+        if "?" not in distinct_fields and self.plan.needs_distinct(distinct_fields):
             queryset = queryset.distinct(*distinct_fields)
 
-        queryset = queryset.order_by(
-            *[
-                order
-                for sort_param in self.sort_params
-                for order in sort_param.get_sort_list(CardSearchContext.CARD)
-            ]
-        )
+        order_by = [
+            order
+            for sort_param in self.sort_params
+            for order in sort_param.get_sort_list(CardSearchContext.CARD)
+        ]
+        if "scryfall_oracle_id" in distinct_fields:
+            # Cards can share a name, so the unique ID makes the ordering stable between pages
+            order_by.append(F("scryfall_oracle_id").asc())
+
+        queryset = queryset.order_by(*order_by).select_related("search_metadata")
         return queryset
 
+    def get_card_index_query(
+        self,
+        query_context: QueryContext,
+        root_parameter: Optional[CardSearchTreeNode] = None,
+    ) -> Optional[Q]:
+        """
+        Tries to find the results of the search using the in-memory card index
+        :param query_context: The context of the search
+        :param root_parameter: The (optimised) tree to search with, if not the root parameter
+        :return: A query for the IDs of the matching cards, or None if the index isn't enabled
+        or can't be used for this search
+        """
+        if query_context.search_mode != CardSearchContext.CARD:
+            return None
+
+        index = CardIndex.get()
+        if index is None:
+            return None
+
+        card_ids = index.search(root_parameter or self.root_parameter)
+        if card_ids is None:
+            return None
+        # The IDs are sent as a single array, which also works when there aren't any
+        return Q(id__in=RawSQL("SELECT UNNEST(%s::bigint[])", (card_ids.tolist(),)))
+
     def search(
-        self, query_context: QueryContext, page_number: int = 1, page_size: int = 25
+        self,
+        query_context: QueryContext,
+        page_number: int = 1,
+        page_size: int = 25,
+        cursor: Optional[str] = None,
     ) -> None:
         """
         Runs the search for this search and constructs
         :param page_number: The result page
         :param page_size: The number of items per page
+        :param cursor: The cursor from the previous page, used to find the results without
+        an OFFSET (the page number is then only used for display)
         """
-        queryset = self.get_queryset(query_context)
-        print(str(queryset.query))
-        self.paginator = Paginator(queryset, page_size)
-        try:
-            self.page = self.paginator.page(page_number)
-        except EmptyPage:
-            return
-        cards = list(self.page)
-
-        prefetch_related_objects(cards, "printings__localisations__ownerships")
-        prefetch_related_objects(cards, "printings__localisations__language")
-        prefetch_related_objects(
-            cards, "printings__localisations__localised_faces__image"
-        )
-        prefetch_related_objects(
-            cards, "printings__face_printings__localised_faces__image"
-        )
-        prefetch_related_objects(
-            cards, "printings__face_printings__localised_faces__localisation"
-        )
-        prefetch_related_objects(cards, "faces")
-        prefetch_related_objects(cards, "printings__set")
-        prefetch_related_objects(cards, "printings__rarity")
+        timings = self.timings
+        cache_key = self.get_result_cache_key(query_context)
+        with timings.measure("cache"):
+            result_ids = get_cached_result_ids(cache_key) if cache_key else None
+        if not isinstance(result_ids, list):
+            with timings.measure("plan"):
+                queryset = self.get_queryset(query_context)
+            if timings.enabled:
+                with timings.measure("compile"):
+                    queryset.query.sql_with_params()
+            if settings.DEBUG:
+                self.plan.explain = queryset.explain()
+                logger.debug("Search plan %s:\n%s", self.plan, self.plan.explain)
+            # False means that the results were too large to cache last time
+            with timings.measure("db"):
+                result_ids = (
+                    cache_result_ids(cache_key, queryset)
+                    if cache_key and result_ids is None
+                    else None
+                )
+
+        if result_ids is not None:
+            self.paginator = CachedResultPaginator(result_ids, page_size)
+        else:
+            self.paginator = SearchPaginator(queryset, page_size)
+
+        with (
+            CaptureQueriesContext(connection) if settings.DEBUG else nullcontext()
+        ) as captured_queries:
+            try:
+                with timings.measure("db"):
+                    if cursor and result_ids is None:
+                        self.page = self.paginator.page_after(page_number, cursor)
+                    else:
+                        self.page = self.paginator.page(page_number)
+                    if result_ids is None:
+                        cards = list(self.page)
+                        self.next_cursor = self.paginator.get_next_cursor(self.page)
+                    else:
+                        cards = self.get_cards_by_id(self.page.object_list)
+                        self.page.object_list = cards
+            except EmptyPage:
+                return
+
+            with timings.measure("hydrate"):
+                hydrate_cards(
+                    cards, user=self.user, preferred_set=self.get_preferred_set()
+                )
+
+        if timings.enabled:
+            # The paginator keeps the count, so the results aren't counted again later
+            with timings.measure("count"):
+                # pylint: disable=pointless-statement
+                self.paginator.count
+
+        if captured_queries is not None:
+            logger.info(
+                "Loaded page %s of search results (%s cards) with %s queries",
+                page_number,
+                len(cards),
+                len(captured_queries),
+            )
 
-        preferred_set = self.get_preferred_set()
         self.results = [
-            SearchResult(card, selected_set=preferred_set) for card in cards
+            SearchResult(card, selected_printing=get_preferred_printing(card))
+            for card in cards
         ]
 
+    def get_result_cache_key(self, query_context: QueryContext) -> Optional[str]:
+        """
+        Gets the key that the IDs of the results of this search are cached under
+        :param query_context: The context of the search
+        :return: The cache key, or None if the results of this search can't be cached
+        """
+        return None
+
+    @staticmethod
+    def get_cards_by_id(card_ids: List[int]) -> List[Card]:
+        """
+        Loads the cards with the given IDs
+        :param card_ids: The IDs of the cards
+        :return: The cards in the same order as their IDs (skipping any that no longer exist)
+        """
+        cards = Card.objects.select_related("search_metadata").in_bulk(card_ids)
+        return [cards[card_id] for card_id in card_ids if card_id in cards]
+
     def get_preferred_set(self) -> Optional[Set]:
         """
         Gets the set that would be preferred for each card result (this should be overridden)
@@ -0,0 +1,124 @@
+"""
+Module for running many searches at once
+
+Each query is parsed with the shared parse cache, and all of them are validated against the
+same snapshot of the reference data. Queries that only look up a card by its exact name (for
+example !"Lightning Bolt") are the most common kind sent by deck tools, so instead of being
+searched one at a time they are all found with a single query
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from django.contrib.auth import get_user_model
+from django.db.models.functions import Upper
+
+from sylvan_library.cards.models.card import Card
+from sylvan_library.cardsearch.base_search import SearchResult
+from sylvan_library.cardsearch.hydration import get_preferred_printing, hydrate_cards
+from sylvan_library.cardsearch.parameters.base_parameters import (
+    QueryContext,
+    QueryValidationError,
+)
+from sylvan_library.cardsearch.parameters.card_name_parameters import CardNameParam
+from sylvan_library.cardsearch.parse_search import ParseSearch
+from sylvan_library.cardsearch.reference_data import ReferenceData
+
+User = get_user_model()
+
+
+def get_exact_name(search: ParseSearch) -> Optional[str]:
+    """
+    Gets the name that a search looks up if the search only matches a card by its exact name
+    :param search: The search (with its parameters already built)
+    :return: The name of the card, or None if the search does anything else
+    """
+    root_parameter = search.root_parameter
+    if (
+        isinstance(root_parameter, CardNameParam)
+        and root_parameter.match_exact
+        and not root_parameter.regex_match
+        and not root_parameter.negated
+    ):
+        return root_parameter.value
+    return None
+
+
+def search_exact_names(
+    searches_by_name: Dict[str, List[ParseSearch]],
+    user: Optional[User] = None,
+    page_size: int = 25,
+) -> None:
+    """
+    Finds the results of exact name searches with a single query
+    :param searches_by_name: The searches, by the uppercase name that they look up
+    :param user: The user running the searches
+    :param page_size: The most results to find for each search
+    """
+    if not searches_by_name:
+        return
+
+    cards = list(
+        Card.objects.alias(upper_name=Upper("name"))
+        .filter(upper_name__in=list(searches_by_name))
+        .select_related("search_metadata")
+        .order_by("name", "scryfall_oracle_id")
+    )
+    hydrate_cards(cards, user=user)
+
+    cards_by_name: Dict[str, List[Card]] = defaultdict(list)
+    for card in cards:
+        cards_by_name[card.name.upper()].append(card)
+
+    for name, searches in searches_by_name.items():
+        results = [
+            SearchResult(card, selected_printing=get_preferred_printing(card))
+            for card in cards_by_name[name][:page_size]
+        ]
+        for search in searches:
+            search.results = results
+
+
+def run_batch_search(
+    query_strings: List[str], user: Optional[User] = None, page_size: int = 25
+) -> List[ParseSearch]:
+    """
+    Runs a search for each of the given query strings
+    :param query_strings: The query strings to search for
+    :param user: The user running the searches
+    :param page_size: The number of results to find for each search
+    :return: The searches in the same order as the query strings. Searches that couldn't be
+    run have an error message instead of results
+    """
+    searches: List[ParseSearch] = []
+    searches_by_name: Dict[str, List[ParseSearch]] = defaultdict(list)
+    with ReferenceData.pin():
+        for query_string in query_strings:
+            search = ParseSearch(query_string, user)
+            searches.append(search)
+            if not query_string.strip():
+                search.error_message = "The query is empty"
+                continue
+
+            search.build_parameters()
+            if search.error_message:
+                continue
+
+            name = get_exact_name(search)
+            if name is not None:
+                searches_by_name[name.upper()].append(search)
+                continue
+
+            query_context = QueryContext(
+                user=user,
+                search_mode=search.root_parameter.get_default_search_context(),
+            )
+            try:
+                search.root_parameter.validate(query_context)
+            except QueryValidationError as error:
+                search.error_message = str(error)
+                continue
+            search.search(query_context, page_size=page_size)
+
+    search_exact_names(searches_by_name, user, page_size=page_size)
+    return searches
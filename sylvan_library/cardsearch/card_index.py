@@ -0,0 +1,360 @@
+"""
+Module for the in-memory card index, an optional alternative to SQL for card searches
+
+The index is a snapshot of the searchable attributes of every card face stored in NumPy arrays
+(one element per face). Parameters that support it (see CardSearchTreeNode.evaluate_mask)
+are evaluated as boolean masks over those arrays. Like the SQL queries, each mask is over the
+card faces, so conditions that are combined without negation have to be met by the same face.
+If any parameter in the search can't be evaluated, the whole search falls back to SQL.
+
+The index is only used if SEARCH_CARD_INDEX is enabled and NumPy is installed. It is rebuilt
+when invalidated (after apply_import and update_search_metadata) or when it gets older than
+SEARCH_CARD_INDEX_MAX_AGE seconds. Commands run in another process can only invalidate it if
+the Django cache is shared between processes
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from sylvan_library.cards.models.card import Card, CardFace
+from sylvan_library.cards.models.legality import CardLegality
+from sylvan_library.cardsearch.models import CardFaceSearchMetadata, CardSearchMetadata
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+if TYPE_CHECKING:
+    from sylvan_library.cardsearch.parameters.base_parameters import (
+        CardSearchTreeNode,
+    )
+
+logger = logging.getLogger("django")
+
+CARD_INDEX_VERSION_CACHE_KEY = "cardsearch:card_index:version"
+
+# The columns of the Card model in the index, by the name they are searched with
+CARD_COLUMNS: List[str] = ["mana_value", "colour_identity", "colour_identity_count"]
+
+# The columns of the CardFace model in the index, by the name they are searched with
+FACE_COLUMNS: List[str] = [
+    "colour",
+    "colour_indicator",
+    "colour_count",
+    "num_power",
+    "num_toughness",
+    "num_loyalty",
+]
+
+# The bit field columns, which are stored as integers instead of floats
+BIT_FIELD_COLUMNS = {"colour_identity", "colour", "colour_indicator"}
+
+# The nullable columns of the CardFace model, which are only stored as whether they are null
+FACE_NULLABLE_COLUMNS: List[str] = ["power", "toughness", "loyalty", "rules_text"]
+
+# The boolean columns of the CardSearchMetadata model (cards without metadata are False)
+CARD_METADATA_COLUMNS: List[str] = ["is_commander", "is_universes_beyond"]
+
+# The symbol count columns of the CardFaceSearchMetadata model
+SYMBOL_COUNT_COLUMNS: List[str] = [
+    field.name
+    for field in CardFaceSearchMetadata._meta.get_fields()
+    if field.name.startswith("symbol_count_")
+]
+
+
+def is_card_index_enabled() -> bool:
+    """
+    Returns whether card searches should try to use the in-memory card index
+    :return: True if the index is enabled and NumPy is installed
+    """
+    return np is not None and getattr(settings, "SEARCH_CARD_INDEX", False)
+
+
+class CardIndex:
+    """
+    A snapshot of the searchable attributes of all card faces
+    """
+
+    _current: Optional["CardIndex"] = None
+    _lock = threading.Lock()
+
+    def __init__(self, version: str) -> None:
+        self.version = version
+        self.built_at = time.monotonic()
+        self.card_ids = np.zeros(0, dtype=np.int64)
+        # The position in card_ids of the card of each face
+        self.face_card_index = np.zeros(0, dtype=np.int64)
+        # Face level arrays, by the lookup path used for them in card searches
+        self.columns: Dict[str, np.ndarray] = {}
+        # The faces with each type, subtype and supertype, by the lowercase name of the type
+        self.type_faces: Dict[str, np.ndarray] = {}
+        # Precomputed masks of the cards with each legality, by the format ID and the
+        # lowercase restriction
+        self.legality_bitmaps: Dict[Tuple[int, str], np.ndarray] = {}
+
+    @classmethod
+    def get(cls) -> Optional["CardIndex"]:
+        """
+        Gets the current index, building it if it doesn't exist yet or has been invalidated
+        :return: The index, or None if it isn't enabled
+        """
+        if not is_card_index_enabled():
+            return None
+
+        version = cache.get(CARD_INDEX_VERSION_CACHE_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            cache.add(CARD_INDEX_VERSION_CACHE_KEY, version, None)
+            version = cache.get(CARD_INDEX_VERSION_CACHE_KEY, version)
+
+        with cls._lock:
+            current = cls._current
+            max_age = getattr(settings, "SEARCH_CARD_INDEX_MAX_AGE", 0)
+            if (
+                current is None
+                or current.version != version
+                or (max_age and time.monotonic() - current.built_at > max_age)
+            ):
+                current = cls.build(version)
+                cls._current = current
+        return current
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        Marks the current index as out of date, so that it will be rebuilt the next time it is
+        used (this should be called after the card data or the search metadata changes)
+        """
+        cache.set(CARD_INDEX_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        with cls._lock:
+            cls._current = None
+
+    @classmethod
+    def build(cls, version: str) -> "CardIndex":
+        """
+        Builds a new index from the database
+        :param version: The version of the card data that this index is for
+        :return: The new index
+        """
+        start = time.perf_counter()
+        index = cls(version)
+
+        card_rows = list(Card.objects.order_by("id").values_list("id", *CARD_COLUMNS))
+        index.card_ids = np.array([row[0] for row in card_rows], dtype=np.int64)
+        card_positions = {card_id: idx for idx, card_id in enumerate(index.card_ids)}
+
+        face_rows = list(
+            CardFace.objects.order_by("id")
+            .annotate(
+                **{
+                    f"{column}_isnull": ExpressionWrapper(
+                        Q(**{f"{column}__isnull": True}), output_field=BooleanField()
+                    )
+                    for column in FACE_NULLABLE_COLUMNS
+                }
+            )
+            .values_list(
+                "id",
+                "card_id",
+                *FACE_COLUMNS,
+                *[f"{column}_isnull" for column in FACE_NULLABLE_COLUMNS],
+            )
+        )
+        face_positions = {row[0]: idx for idx, row in enumerate(face_rows)}
+        index.face_card_index = np.array(
+            [card_positions[row[1]] for row in face_rows], dtype=np.int64
+        )
+
+        for column_idx, column in enumerate(CARD_COLUMNS, start=1):
+            card_values = to_array(column, [row[column_idx] for row in card_rows])
+            index.columns[column] = card_values[index.face_card_index]
+
+        for column_idx, column in enumerate(FACE_COLUMNS, start=2):
+            index.columns[f"faces__{column}"] = to_array(
+                column, [row[column_idx] for row in face_rows]
+            )
+
+        for column_idx, column in enumerate(
+            FACE_NULLABLE_COLUMNS, start=2 + len(FACE_COLUMNS)
+        ):
+            index.columns[f"faces__{column}__isnull"] = np.array(
+                [row[column_idx] for row in face_rows], dtype=bool
+            )
+
+        for column in CARD_METADATA_COLUMNS:
+            card_values = np.zeros(len(card_rows), dtype=bool)
+            for card_id, value in CardSearchMetadata.objects.values_list(
+                "card_id", column
+            ):
+                card_values[card_positions[card_id]] = value
+            index.columns[f"search_metadata__{column}"] = card_values[
+                index.face_card_index
+            ]
+
+        # Faces without search metadata can't match any symbol count
+        for column in SYMBOL_COUNT_COLUMNS:
+            index.columns[f"faces__search_metadata__{column}"] = np.full(
+                len(face_rows), np.nan
+            )
+        for row in CardFaceSearchMetadata.objects.values_list(
+            "card_face_id", *SYMBOL_COUNT_COLUMNS
+        ):
+            face_idx = face_positions[row[0]]
+            for column, value in zip(SYMBOL_COUNT_COLUMNS, row[1:]):
+                index.columns[f"faces__search_metadata__{column}"][face_idx] = value
+
+        type_faces: Dict[str, List[int]] = defaultdict(list)
+        for field_name, type_field in [
+            ("types", "cardtype"),
+            ("subtypes", "cardsubtype"),
+            ("supertypes", "cardsupertype"),
+        ]:
+            through = getattr(CardFace, field_name).through
+            for face_id, type_name in through.objects.values_list(
+                "cardface_id", f"{type_field}__name"
+            ):
+                type_faces[type_name.lower()].append(face_positions[face_id])
+        index.type_faces = {
+            type_name: np.unique(np.array(faces, dtype=np.int64))
+            for type_name, faces in type_faces.items()
+        }
+
+        for card_id, format_id, restriction in CardLegality.objects.values_list(
+            "card_id", "format_id", "restriction"
+        ):
+            key = (format_id, restriction.lower())
+            if key not in index.legality_bitmaps:
+                index.legality_bitmaps[key] = np.zeros(len(card_rows), dtype=bool)
+            index.legality_bitmaps[key][card_positions[card_id]] = True
+
+        logger.info(
+            "Built card index of %s cards and %s faces in %.2fs",
+            len(card_rows),
+            len(face_rows),
+            time.perf_counter() - start,
+        )
+        return index
+
+    @property
+    def card_count(self) -> int:
+        """
+        The number of cards in the index
+        """
+        return len(self.card_ids)
+
+    @property
+    def face_count(self) -> int:
+        """
+        The number of card faces in the index
+        """
+        return len(self.face_card_index)
+
+    def get_column(self, field_name: str) -> Optional[np.ndarray]:
+        """
+        Gets the values of a column for every face
+        :param field_name: The lookup path of the column in a card search (for example
+        "mana_value" or "faces__num_power")
+        :return: The values of the column, or None if the column isn't in the index
+        """
+        return self.columns.get(field_name)
+
+    def get_type_mask(self, type_name: str) -> np.ndarray:
+        """
+        Gets the mask of the faces that have the given type, subtype or supertype
+        :param type_name: The name of the type
+        :return: The mask of the faces
+        """
+        mask = ~self.all_faces()
+        type_faces = self.type_faces.get(type_name.lower())
+        if type_faces is not None:
+            mask[type_faces] = True
+        return mask
+
+    def get_legality_mask(self, format_id: int, restriction: str) -> np.ndarray:
+        """
+        Gets the mask of the faces of the cards with the given legality
+        :param format_id: The ID of the format
+        :param restriction: The restriction of the card in that format (for example "banned")
+        :return: The mask of the faces
+        """
+        bitmap = self.legality_bitmaps.get((format_id, restriction.lower()))
+        if bitmap is None:
+            return ~self.all_faces()
+        return self.cards_to_faces(bitmap)
+
+    def all_faces(self) -> np.ndarray:
+        """
+        Gets a mask that includes every face
+        :return: The mask
+        """
+        return np.ones(self.face_count, dtype=bool)
+
+    def faces_to_cards(self, face_mask: np.ndarray) -> np.ndarray:
+        """
+        Converts a mask of faces into a mask of the cards with at least one matching face
+        :param face_mask: The mask of the faces
+        :return: The mask of the cards
+        """
+        card_mask = np.zeros(self.card_count, dtype=bool)
+        card_mask[self.face_card_index[face_mask]] = True
+        return card_mask
+
+    def cards_to_faces(self, card_mask: np.ndarray) -> np.ndarray:
+        """
+        Converts a mask of cards into a mask of all the faces of those cards
+        :param card_mask: The mask of the cards
+        :return: The mask of the faces
+        """
+        return card_mask[self.face_card_index]
+
+    def negate(self, face_mask: np.ndarray) -> np.ndarray:
+        """
+        Negates a mask the same way a negated query over the faces works in SQL: a card
+        matches if none of its faces matched (so all faces of that card are included)
+        :param face_mask: The mask of the faces
+        :return: The mask of the faces of the cards that didn't match
+        """
+        return self.cards_to_faces(~self.faces_to_cards(face_mask))
+
+    def search(self, root_parameter: "CardSearchTreeNode") -> Optional[np.ndarray]:
+        """
+        Finds the cards that match the given search tree
+        :param root_parameter: The root node of the search
+        :return: The IDs of the matching cards, or None if the search can't be evaluated
+        using the index
+        """
+        start = time.perf_counter()
+        face_mask = root_parameter.evaluate_mask(self)
+        if face_mask is None:
+            return None
+        card_ids = self.card_ids[self.faces_to_cards(face_mask)]
+        logger.debug(
+            "Found %s cards in the card index in %.3fms",
+            len(card_ids),
+            (time.perf_counter() - start) * 1000,
+        )
+        return card_ids
+
+
+def to_array(column: str, values: List[Any]) -> np.ndarray:
+    """
+    Converts the values of a column into an array for the index
+    :param column: The name of the column
+    :param values: The values of the column
+    :return: An integer array for bit fields, otherwise a float array where nulls are NaN
+    """
+    if column in BIT_FIELD_COLUMNS:
+        return np.array([int(value) for value in values], dtype=np.int64)
+    return np.array(
+        [np.nan if value is None else value for value in values], dtype=np.float64
+    )
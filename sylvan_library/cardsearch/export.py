@@ -0,0 +1,112 @@
+"""
+Module for exporting every result of a search
+
+The results are read from the database with a server-side cursor a chunk at a time and written
+out as they are read, so exporting a search uses the same amount of memory however many cards
+it finds
+"""
+
+import csv
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+from django.db.models import Prefetch, QuerySet
+
+from sylvan_library.cards.models.card import CardFace
+
+# The number of cards that are read from the database at a time
+EXPORT_CHUNK_SIZE = 2000
+
+# The columns of each exported card
+EXPORT_FIELDS: List[str] = [
+    "id",
+    "scryfall_oracle_id",
+    "name",
+    "mana_cost",
+    "mana_value",
+    "type_line",
+    "rules_text",
+    "power",
+    "toughness",
+    "loyalty",
+    "layout",
+]
+
+# The columns that are found on the faces of the card (joined with " // " for cards with
+# more than one face)
+FACE_FIELDS: List[str] = [
+    "mana_cost",
+    "type_line",
+    "rules_text",
+    "power",
+    "toughness",
+    "loyalty",
+]
+
+
+class EchoBuffer:
+    """
+    A file-like object that returns what is written to it instead of storing it, so that the
+    csv writer can be used to build single lines
+    """
+
+    def write(self, value: str) -> str:
+        """
+        Returns the written value
+        :param value: The value to write
+        :return: The value
+        """
+        return value
+
+
+def get_export_rows(
+    queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Gets the exported columns of each card of a search
+    :param queryset: The ordered queryset of the search
+    :param chunk_size: The number of cards to read from the database at a time
+    :return: A generator of a dict of the columns of each card
+    """
+    face_queryset = CardFace.objects.only("card_id", "side", *FACE_FIELDS).order_by(
+        "side"
+    )
+    for card in queryset.prefetch_related(
+        Prefetch("faces", queryset=face_queryset)
+    ).iterator(chunk_size=chunk_size):
+        faces = list(card.faces.all())
+        row = {
+            "id": card.id,
+            "scryfall_oracle_id": card.scryfall_oracle_id,
+            "name": card.name,
+            "mana_value": card.mana_value,
+            "layout": card.layout,
+        }
+        for field in FACE_FIELDS:
+            values = [getattr(face, field) for face in faces]
+            row[field] = (
+                " // ".join(value or "" for value in values) if any(values) else None
+            )
+        yield {field: row[field] for field in EXPORT_FIELDS}
+
+
+def get_ndjson_lines(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Converts exported cards into newline delimited JSON
+    :param rows: The exported cards
+    :return: A generator of one JSON line per card
+    """
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def get_csv_lines(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Converts exported cards into CSV
+    :param rows: The exported cards
+    :return: A generator of the header line and then one line per card
+    """
+    writer = csv.DictWriter(EchoBuffer(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
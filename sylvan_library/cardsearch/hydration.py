@@ -0,0 +1,166 @@
+"""
+Module for loading everything that is needed to display a page of search results
+"""
+
+from typing import List, Optional
+
+from django.contrib.auth import get_user_model
+from django.db.models import (
+    Case,
+    F,
+    IntegerField,
+    OrderBy,
+    Prefetch,
+    Value,
+    When,
+    Window,
+    prefetch_related_objects,
+)
+from django.db.models.functions import RowNumber
+
+from sylvan_library.cards.models.card import (
+    Card,
+    CardFaceLocalisation,
+    CardFacePrinting,
+    CardLocalisation,
+    CardPrinting,
+    UserOwnedCard,
+)
+from sylvan_library.cards.models.sets import Set
+
+User = get_user_model()
+
+
+def get_preferred_printing_order(preferred_set: Optional[Set] = None) -> List[OrderBy]:
+    """
+    Gets the order in which the printings of a card should be preferred when showing the card
+    in search results: a printing in the preferred set, then the latest non-promotional
+    printing, then the latest promotional printing
+    :param preferred_set: The set to prefer printings from (if any)
+    :return: The ordering of the printings, with the most preferred first
+    """
+    order: List[OrderBy] = []
+    if preferred_set:
+        order.append(
+            Case(
+                When(set_id=preferred_set.id, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            ).asc()
+        )
+    order += [
+        Case(
+            When(set__type="promo", then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ).asc(),
+        F("set__release_date").desc(nulls_last=True),
+        F("numerical_number").asc(nulls_last=True),
+        F("set__name").desc(),
+    ]
+    return order
+
+
+def hydrate_cards(
+    cards: List[Card], user: Optional[User] = None, preferred_set: Optional[Set] = None
+) -> None:
+    """
+    Loads all the related objects needed to display the given page of cards.
+    Each of the tables is only queried once, and only the columns that are used by the
+    search result templates are loaded for the larger tables. If the preferred printing of
+    each card can't be taken from its search metadata (because a set is preferred or the
+    metadata hasn't been built), each printing is annotated with its preference_rank instead,
+    where the printing ranked 1 should be shown for the card
+    :param cards: The cards to load the related objects for
+    :param user: The user whose ownerships should be loaded (if any)
+    :param preferred_set: The set to prefer printings from (if any)
+    """
+    if user is not None and user.is_authenticated:
+        ownerships = UserOwnedCard.objects.filter(owner=user)
+    else:
+        ownerships = UserOwnedCard.objects.none()
+
+    # The search metadata is usually already joined by the search query
+    prefetch_related_objects(cards, "search_metadata")
+    printings = CardPrinting.objects.select_related("set", "rarity")
+    if preferred_set or not all(get_materialised_printing_id(card) for card in cards):
+        printings = printings.annotate(
+            preference_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F("card_id")],
+                order_by=get_preferred_printing_order(preferred_set),
+            )
+        )
+
+    prefetch_related_objects(
+        cards,
+        "faces",
+        Prefetch("printings", queryset=printings),
+        Prefetch(
+            "printings__localisations",
+            queryset=CardLocalisation.objects.only(
+                "id", "card_printing_id", "language_id"
+            ),
+        ),
+        Prefetch("printings__localisations__ownerships", queryset=ownerships),
+        Prefetch(
+            "printings__localisations__localised_faces",
+            queryset=CardFaceLocalisation.objects.select_related("image").only(
+                "id",
+                "localisation_id",
+                "card_printing_face_id",
+                "image__id",
+                "image__file_path",
+            ),
+        ),
+        Prefetch(
+            "printings__face_printings",
+            queryset=CardFacePrinting.objects.only(
+                "id", "card_printing_id", "card_face_id", "watermark"
+            ),
+        ),
+        Prefetch(
+            "printings__face_printings__localised_faces",
+            queryset=CardFaceLocalisation.objects.select_related(
+                "image", "localisation"
+            ).only(
+                "id",
+                "localisation_id",
+                "card_printing_face_id",
+                "image__id",
+                "image__file_path",
+                "localisation__id",
+                "localisation__language_id",
+            ),
+        ),
+    )
+
+
+def get_materialised_printing_id(card: Card) -> Optional[int]:
+    """
+    Gets the ID of the preferred printing stored in the search metadata of the card
+    :param card: The card (with its search metadata already loaded)
+    :return: The ID of the printing, or None if the metadata hasn't been built
+    """
+    metadata = getattr(card, "search_metadata", None)
+    return metadata.preferred_printing_id if metadata else None
+
+
+def get_preferred_printing(card: Card) -> Optional[CardPrinting]:
+    """
+    Gets the printing that should be shown for a card loaded by hydrate_cards
+    :param card: The hydrated card
+    :return: The most preferred printing of the card, or None if it has no printings
+    """
+    printings = card.printings.all()
+    if printings and hasattr(printings[0], "preference_rank"):
+        return next(
+            (printing for printing in printings if printing.preference_rank == 1),
+            None,
+        )
+
+    preferred_printing_id = get_materialised_printing_id(card)
+    return next(
+        (printing for printing in printings if printing.id == preferred_printing_id),
+        None,
+    )
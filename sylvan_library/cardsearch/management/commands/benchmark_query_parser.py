@@ -0,0 +1,89 @@
+"""
+Module for the benchmark_query_parser command
+"""
+
+import logging
+import timeit
+from typing import Any, List
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from sylvan_library.cardsearch.parser.query_parser import CardQueryParser
+
+logger = logging.getLogger("django")
+
+# The queries used in cardsearch/tests/parser_tests.py
+BENCHMARK_QUERIES: List[str] = [
+    "foo",
+    "foo and bar",
+    "foo or bar",
+    "foo and (bar or baz)",
+    "foo bar",
+    "-foo",
+    "-(name:foo)",
+    "color:rg",
+    "color>=uw -c:red",
+    "id<=esper t:instant",
+    "id:c t:land",
+    "t:legend t:merfolk",
+    "t:goblin -t:creature",
+    "t:creature o:draw",
+    'o:"~ enters the battlefield tapped"',
+    "mana:{G}{U}",
+    "m:2WW",
+    "mana>3wu",
+]
+
+
+class Command(BaseCommand):
+    """
+    The command for timing the card query parser
+    """
+
+    help = (
+        "Times how long the card query parser takes to parse the queries in the parser tests, "
+        "both one at a time and joined together into a single long query"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="The number of times each query should be parsed",
+        )
+        parser.add_argument(
+            "--long-query-repeats",
+            type=int,
+            default=50,
+            help="The number of times the queries should be repeated in the long query",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        iterations = options["iterations"]
+        parser = CardQueryParser()
+
+        total_time = 0.0
+        for query in BENCHMARK_QUERIES:
+            query_time = timeit.timeit(
+                lambda q=query: parser.parse(q), number=iterations
+            )
+            total_time += query_time
+            self.stdout.write(
+                f"{query:<40} {query_time / iterations * 1_000_000:10.1f}us"
+            )
+        self.stdout.write(
+            f"{'Total':<40} {total_time / iterations * 1_000_000:10.1f}us"
+        )
+
+        long_query = " ".join(
+            f"({query})" for query in BENCHMARK_QUERIES * options["long_query_repeats"]
+        )
+        long_query_iterations = max(1, iterations // 20)
+        long_query_time = timeit.timeit(
+            lambda: parser.parse(long_query), number=long_query_iterations
+        )
+        self.stdout.write(
+            f"{f'Long query ({len(long_query)} chars)':<40} "
+            f"{long_query_time / long_query_iterations * 1000:10.1f}ms"
+        )
@@ -0,0 +1,85 @@
+"""
+Module for the benchmark_search_metadata command
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, List
+
+import django
+from django.core.management.base import BaseCommand, CommandParser
+
+from sylvan_library.cards.models.card import CardFace
+from sylvan_library.cardsearch.search_metadata import (
+    CARD_FACE_METADATA_SOURCE_FIELDS,
+    WORKER_CHUNK_SIZE,
+    compute_card_face_metadata,
+)
+
+logger = logging.getLogger("django")
+
+
+class Command(BaseCommand):
+    """
+    The command for timing how the card face metadata computation scales with workers
+    """
+
+    help = (
+        "Times building the search metadata of every card face (without saving it) in "
+        "this process and in pools of worker processes of different sizes"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            nargs="*",
+            help="The numbers of workers to time (by default 1, 2, 4 etc. up to the "
+            "number of CPUs)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=1,
+            help="The number of times to build the metadata of each card face",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        rows = list(CardFace.objects.values_list(*CARD_FACE_METADATA_SOURCE_FIELDS))
+        rows *= options["repeat"]
+        if not rows:
+            self.stdout.write("There are no card faces to build")
+            return
+
+        worker_counts: List[int] = options["workers"] or []
+        if not worker_counts:
+            worker_count = 1
+            while worker_count < (os.cpu_count() or 1):
+                worker_counts.append(worker_count)
+                worker_count *= 2
+            worker_counts.append(os.cpu_count() or 1)
+
+        base_time = None
+        for worker_count in worker_counts:
+            start = time.perf_counter()
+            if worker_count <= 1:
+                list(map(compute_card_face_metadata, rows))
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=worker_count, initializer=django.setup
+                ) as executor:
+                    list(
+                        executor.map(
+                            compute_card_face_metadata,
+                            rows,
+                            chunksize=WORKER_CHUNK_SIZE,
+                        )
+                    )
+            duration = time.perf_counter() - start
+            base_time = base_time or duration
+            self.stdout.write(
+                f"{worker_count:>3} workers {duration:8.2f}s "
+                f"{len(rows) / duration:10.0f} faces/s {base_time / duration:6.2f}x"
+            )
@@ -0,0 +1,79 @@
+"""
+Module for the benchmark_text_search command
+"""
+
+import logging
+import timeit
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from django.db.models import Q
+
+from sylvan_library.cards.models.card import Card
+from sylvan_library.cardsearch.text_search import (
+    TRIGRAM_INDEXED_COLUMNS,
+    get_trigram_index_name,
+)
+
+logger = logging.getLogger("django")
+
+
+class Command(BaseCommand):
+    """
+    The command for timing rules text searches
+    """
+
+    help = (
+        'Times a rules text search (the same as o:"draw a card") using the old icontains '
+        "lookup and the trigram_contains lookup that can use the pg_trgm indexes"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--text",
+            type=str,
+            default="draw a card",
+            help="The rules text to search for",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="The number of times each search should be run",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        index_names = [
+            get_trigram_index_name(table, column)
+            for table, column in TRIGRAM_INDEXED_COLUMNS
+        ]
+        with connection.cursor() as cursor:
+            existing_indexes = {
+                index_name
+                for table, _ in TRIGRAM_INDEXED_COLUMNS
+                for index_name, constraint in connection.introspection.get_constraints(
+                    cursor, table
+                ).items()
+                if constraint["index"]
+            }
+        missing_indexes = [name for name in index_names if name not in existing_indexes]
+        if missing_indexes:
+            self.stdout.write(
+                f"Trigram indexes missing: {', '.join(missing_indexes)} "
+                "(is the pg_trgm extension installed?)"
+            )
+
+        iterations = options["iterations"]
+        text = options["text"]
+        for lookup in ["icontains", "trigram_contains"]:
+            queryset = Card.objects.filter(
+                Q(**{f"faces__rules_text__{lookup}": text})
+            ).distinct()
+            result_count = queryset.count()
+            query_time = timeit.timeit(queryset.count, number=iterations)
+            self.stdout.write(
+                f"{lookup:<20} {query_time / iterations * 1000:10.1f}ms "
+                f"({result_count} cards)"
+            )
+            self.stdout.write(f"    {queryset.explain().splitlines()[0]}")
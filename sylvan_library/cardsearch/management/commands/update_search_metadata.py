@@ -2,16 +2,30 @@
 Module for the build_metadata command
 """
 
+import functools
 import logging
 import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from typing import Any
 
+import django
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
+from sylvan_library.cardsearch.card_index import CardIndex
+from sylvan_library.cardsearch.models import (
+    DirtyCardFaceSearchMetadata,
+    DirtyCardSearchMetadata,
+)
+from sylvan_library.cardsearch.result_cache import invalidate_search_results
 from sylvan_library.cardsearch.search_metadata import (
+    BULK_CHUNK_SIZE,
     build_metadata_for_card_face,
     build_metadata_for_card,
+    bulk_build_metadata_for_card_faces,
+    bulk_build_metadata_for_cards,
 )
 from sylvan_library.cards.models.card import CardFace, Card
 
@@ -33,6 +47,31 @@ class Command(BaseCommand):
             type=str,
             help="Any specific cards to ",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Build the metadata in memory in chunks and write each chunk with a single "
+            "query, instead of saving each card separately",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only rebuild the metadata of the cards that were changed by apply_import "
+            "since the last incremental rebuild",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=BULK_CHUNK_SIZE,
+            help="The number of cards to build at a time in bulk mode",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="The number of processes to build the card face metadata in (more than one "
+            "implies --bulk)",
+        )
 
     def handle(self, *args: Any, **options: Any):
         if options.get("cardname"):
@@ -42,6 +81,49 @@ class Command(BaseCommand):
             cards = Card.objects.all()
             card_faces = CardFace.objects.all()
 
+        if options["incremental"]:
+            card_ids = list(
+                cards.filter(
+                    id__in=DirtyCardSearchMetadata.get_object_ids()
+                ).values_list("id", flat=True)
+            )
+            card_face_ids = list(
+                card_faces.filter(
+                    id__in=DirtyCardFaceSearchMetadata.get_object_ids()
+                ).values_list("id", flat=True)
+            )
+            logger.info(
+                "Rebuilding %s changed cards and %s changed card faces",
+                len(card_ids),
+                len(card_face_ids),
+            )
+            self.build(
+                Card.objects.filter(id__in=card_ids),
+                CardFace.objects.filter(id__in=card_face_ids),
+                options,
+            )
+            # Only the metadata that was rebuilt is marked as clean
+            DirtyCardSearchMetadata.clear(card_ids)
+            DirtyCardFaceSearchMetadata.clear(card_face_ids)
+        else:
+            self.build(cards, card_faces, options)
+        CardIndex.invalidate()
+        # Searches run while the metadata was being rebuilt may have cached stale results
+        invalidate_search_results()
+
+    def build(self, cards, card_faces, options: Any) -> None:
+        """
+        Rebuilds the metadata of the given cards and card faces
+        :param cards: The cards to rebuild
+        :param card_faces: The card faces to rebuild
+        :param options: The options of the command
+        """
+        if options["bulk"] or options["workers"] > 1:
+            self.bulk_build(
+                cards, card_faces, options["chunk_size"], options["workers"]
+            )
+            return
+
         card_face_count = card_faces.count()
         card_count = cards.count()
 
@@ -82,3 +164,40 @@ class Command(BaseCommand):
                         card_count,
                         card_change_count,
                     )
+
+    @staticmethod
+    def bulk_build(cards, card_faces, chunk_size: int, workers: int = 1) -> None:
+        """
+        Rebuilds the metadata of the given cards and card faces in bulk mode
+        :param cards: The cards to rebuild
+        :param card_faces: The card faces to rebuild
+        :param chunk_size: The number of cards (or card faces) to build at a time
+        :param workers: The number of processes to build the card face metadata in
+        """
+        # The workers only parse the text of the card faces, and don't use the database
+        with (
+            ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+            if workers > 1
+            else nullcontext()
+        ) as executor, transaction.atomic():
+            for name, build_function, queryset in (
+                (
+                    "card faces",
+                    functools.partial(
+                        bulk_build_metadata_for_card_faces, executor=executor
+                    ),
+                    card_faces,
+                ),
+                ("cards", bulk_build_metadata_for_cards, cards),
+            ):
+                start = time.perf_counter()
+                row_count, change_count = build_function(queryset, chunk_size)
+                duration = time.perf_counter() - start
+                logger.info(
+                    "Built the metadata of %s %s in %.1fs (%.0f rows/s, %s changed)",
+                    row_count,
+                    name,
+                    duration,
+                    row_count / duration if duration else 0,
+                    change_count,
+                )
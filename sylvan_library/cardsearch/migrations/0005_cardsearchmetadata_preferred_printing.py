@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0009_cardprinting_is_universes_beyond"),
+        ("cardsearch", "0004_cardsearchmetadata_is_universes_beyond"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cardsearchmetadata",
+            name="preferred_image_path",
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name="cardsearchmetadata",
+            name="preferred_printing",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="cards.cardprinting",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from sylvan_library.cardsearch.text_search import (
+    create_trigram_indexes,
+    drop_trigram_indexes,
+)
+
+
+def create_indexes(apps, schema_editor):
+    create_trigram_indexes(schema_editor)
+
+
+def drop_indexes(apps, schema_editor):
+    drop_trigram_indexes(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0009_cardprinting_is_universes_beyond"),
+        ("cardsearch", "0005_cardsearchmetadata_preferred_printing"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Subquery
+
+
+def populate_pauper_candidates(apps, schema_editor):
+    CardPrinting = apps.get_model("cards", "CardPrinting")
+    Set = apps.get_model("cards", "Set")
+    CardPauperCandidate = apps.get_model("cardsearch", "CardPauperCandidate")
+    printings = CardPrinting.objects.filter(
+        rarity__symbol__in=["C", "U"],
+        set__is_online_only=False,
+        set__release_date__gte=Subquery(
+            Set.objects.filter(code="EXO").values("release_date")[:1]
+        ),
+        localisations__isnull=False,
+    ).exclude(set__code="30A")
+    CardPauperCandidate.objects.bulk_create(
+        (
+            CardPauperCandidate(
+                card_id=row["card_id"], has_common=row["common_count"] > 0
+            )
+            for row in printings.values("card_id")
+            .annotate(common_count=Count("id", filter=Q(rarity__symbol="C")))
+            .order_by()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0011_usercarddeckusage"),
+        ("cardsearch", "0006_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CardPauperCandidate",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("has_common", models.BooleanField()),
+                (
+                    "card",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pauper_candidate",
+                        to="cards.card",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(populate_pauper_candidates, migrations.RunPython.noop),
+    ]
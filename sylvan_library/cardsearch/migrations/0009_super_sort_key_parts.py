@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:05
+
+from django.db import migrations, models
+
+SUPER_SORT_KEY_FIELDS = [f"super_sort_key_{idx}" for idx in range(1, 9)]
+
+
+def split_super_sort_keys(apps, schema_editor):
+    """
+    Splits the old dash-joined keys into their parts and the slug of the name. Lands have 4
+    parts, non-land creatures have 8 (the fourth being 0) and other cards have 7
+    """
+    CardSearchMetadata = apps.get_model("cardsearch", "CardSearchMetadata")
+    changed = []
+    for metadata in CardSearchMetadata.objects.only("id", "super_sort_key").iterator():
+        segments = metadata.super_sort_key.split("-")
+        if len(segments) < 5 or not all(segment.isdigit() for segment in segments[:4]):
+            continue
+        if segments[0] == "01":
+            part_count = 4
+        elif segments[3] == "00":
+            part_count = 8
+        else:
+            part_count = 7
+        parts = [int(segment) for segment in segments[:part_count] if segment.isdigit()]
+        if len(parts) != part_count:
+            continue
+        parts += [0] * (len(SUPER_SORT_KEY_FIELDS) - part_count)
+        for field, part in zip(SUPER_SORT_KEY_FIELDS, parts):
+            setattr(metadata, field, part)
+        metadata.super_sort_slug = "-".join(segments[part_count:])
+        changed.append(metadata)
+    CardSearchMetadata.objects.bulk_update(
+        changed, SUPER_SORT_KEY_FIELDS + ["super_sort_slug"], batch_size=5000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cardsearch", "0008_dirtysearchmetadata"),
+    ]
+
+    operations = [
+        *(
+            migrations.AddField(
+                model_name="cardsearchmetadata",
+                name=field,
+                field=models.IntegerField(default=0),
+            )
+            for field in SUPER_SORT_KEY_FIELDS
+        ),
+        migrations.AddField(
+            model_name="cardsearchmetadata",
+            name="super_sort_slug",
+            field=models.CharField(blank=True, max_length=256),
+        ),
+        migrations.RunPython(split_super_sort_keys, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="cardsearchmetadata",
+            name="super_sort_key",
+        ),
+        migrations.AddIndex(
+            model_name="cardsearchmetadata",
+            index=models.Index(
+                fields=SUPER_SORT_KEY_FIELDS + ["super_sort_slug"],
+                name="cardsearch_super_sort_key_idx",
+            ),
+        ),
+    ]
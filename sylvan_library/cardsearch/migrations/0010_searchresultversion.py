@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:05
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cardsearch", "0009_super_sort_key_parts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchResultVersion",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("scope", models.CharField(max_length=50, unique=True)),
+                ("version", models.UUIDField(default=uuid.uuid4)),
+            ],
+        ),
+    ]
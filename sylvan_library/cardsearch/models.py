@@ -3,9 +3,17 @@ Models for helping perform searches by tracking card statistics that would be
 hard/expensive to search for at run time
 """
 
-from django.db import models
+import uuid
+from typing import Iterable, List
 
-from sylvan_library.cards.models.card import CardFace, Card
+from django.db import models, transaction
+from django.db.models import Count, Q, Subquery
+
+from sylvan_library.cards.models.card import CardFace, Card, CardPrinting
+from sylvan_library.cards.models.sets import Set
+
+# The columns of the parts of the super sort key, in the order they are sorted by
+SUPER_SORT_KEY_FIELDS = [f"super_sort_key_{idx}" for idx in range(1, 9)]
 
 
 class CardSearchMetadata(models.Model):
@@ -15,7 +23,37 @@ class CardSearchMetadata(models.Model):
 
     is_universes_beyond = models.BooleanField(default=False)
     is_commander = models.BooleanField(default=False)
-    super_sort_key = models.CharField(max_length=256, blank=True)
+
+    # The parts of the key that cards are sorted by with "sort:key" (see sort_key.py), and the
+    # slug of the name of the card that is used when the parts are the same
+    super_sort_key_1 = models.IntegerField(default=0)
+    super_sort_key_2 = models.IntegerField(default=0)
+    super_sort_key_3 = models.IntegerField(default=0)
+    super_sort_key_4 = models.IntegerField(default=0)
+    super_sort_key_5 = models.IntegerField(default=0)
+    super_sort_key_6 = models.IntegerField(default=0)
+    super_sort_key_7 = models.IntegerField(default=0)
+    super_sort_key_8 = models.IntegerField(default=0)
+    super_sort_slug = models.CharField(max_length=256, blank=True)
+
+    # The printing that is shown for the card when no set is preferred, and the path of the
+    # image of its English localisation
+    preferred_printing = models.ForeignKey(
+        CardPrinting,
+        related_name="+",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    preferred_image_path = models.CharField(max_length=100, blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=SUPER_SORT_KEY_FIELDS + ["super_sort_slug"],
+                name="cardsearch_super_sort_key_idx",
+            )
+        ]
 
     def __str__(self):
         return f"{self.card} Search Metadata"
@@ -74,3 +112,134 @@ class CardFaceSearchMetadata(models.Model):
 
     def __str__(self):
         return f"{self.card_face} Search Metadata"
+
+
+class CardPauperCandidate(models.Model):
+    """
+    The cards that have a common or uncommon paper printing from Exodus onwards (when the
+    rarities were first shown on cards), which are the cards a user could have a pauper (or
+    peasant) copy of. This doesn't depend on the user, so it is rebuilt by apply_import instead
+    of being worked out on every search
+    """
+
+    card = models.OneToOneField(
+        Card, related_name="pauper_candidate", on_delete=models.CASCADE
+    )
+
+    # Whether any of the printings are common (otherwise they are all uncommon)
+    has_common = models.BooleanField()
+
+    def __str__(self):
+        return f"{self.card} Pauper Candidate"
+
+    @classmethod
+    def rebuild(cls) -> None:
+        """
+        Recalculates all of the pauper candidates from the card printings
+        """
+        printings = CardPrinting.objects.filter(
+            rarity__symbol__in=["C", "U"],
+            set__is_online_only=False,
+            set__release_date__gte=Subquery(
+                Set.objects.filter(code="EXO").values("release_date")[:1]
+            ),
+            localisations__isnull=False,
+        ).exclude(set__code="30A")
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                (
+                    cls(card_id=row["card_id"], has_common=row["common_count"] > 0)
+                    for row in printings.values("card_id")
+                    .annotate(common_count=Count("id", filter=Q(rarity__symbol="C")))
+                    .order_by()
+                ),
+                batch_size=5000,
+            )
+
+
+class DirtySearchMetadata(models.Model):
+    """
+    A card or card face that has changed since its search metadata was last built. These are
+    recorded by apply_import, so that update_search_metadata --incremental only has to rebuild
+    the metadata of the cards that were changed by the import
+    """
+
+    # The name of the field of the changed object
+    object_field: str
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def mark(cls, object_ids: Iterable[int]) -> None:
+        """
+        Records that the given objects have changed
+        :param object_ids: The IDs of the changed objects
+        """
+        cls.objects.bulk_create(
+            (cls(**{cls.object_field + "_id": object_id}) for object_id in object_ids),
+            batch_size=5000,
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def get_object_ids(cls) -> List[int]:
+        """
+        Gets the IDs of all of the changed objects
+        :return: The IDs of the objects
+        """
+        return list(cls.objects.values_list(cls.object_field + "_id", flat=True))
+
+    @classmethod
+    def clear(cls, object_ids: List[int]) -> None:
+        """
+        Records that the metadata of the given objects has been rebuilt
+        :param object_ids: The IDs of the objects
+        """
+        cls.objects.filter(**{cls.object_field + "_id__in": object_ids}).delete()
+
+
+class DirtyCardSearchMetadata(DirtySearchMetadata):
+    """
+    A card whose search metadata needs to be rebuilt
+    """
+
+    object_field = "card"
+
+    card = models.OneToOneField(Card, related_name="+", on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f"{self.card} Dirty Search Metadata"
+
+
+class DirtyCardFaceSearchMetadata(DirtySearchMetadata):
+    """
+    A card face whose search metadata needs to be rebuilt
+    """
+
+    object_field = "card_face"
+
+    card_face = models.OneToOneField(
+        CardFace, related_name="+", on_delete=models.CASCADE
+    )
+
+    def __str__(self):
+        return f"{self.card_face} Dirty Search Metadata"
+
+
+class SearchResultVersion(models.Model):
+    """
+    The version of the cached search results (either of all results, or of the results of a
+    single user). Cached results are keyed by their version, so changing it invalidates them.
+    The versions are kept in the database instead of the cache so that every process sees them
+    change, even when each process has its own cache
+    """
+
+    # "all" for the version of all results, or "user:<id>" for the results of a user
+    scope = models.CharField(max_length=50, unique=True)
+    version = models.UUIDField(default=uuid.uuid4)
+
+    def __str__(self):
+        return f"{self.scope} search results version {self.version}"
@@ -0,0 +1,289 @@
+"""
+Module for paginating search results
+"""
+
+import hashlib
+import json
+from typing import Any, List, Optional
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Model, OrderBy, Q, QuerySet
+from django.utils.functional import cached_property
+
+CURSOR_SALT = "cardsearch.pagination.cursor"
+
+
+class CursorSerializer:
+    """
+    Serializer for the signed page cursors, which can contain dates and decimals
+    """
+
+    def dumps(self, obj: Any) -> bytes:
+        """
+        Converts the cursor values to bytes
+        :param obj: The cursor values
+        :return: The encoded cursor values
+        """
+        return json.dumps(obj, separators=(",", ":"), cls=DjangoJSONEncoder).encode(
+            "latin-1"
+        )
+
+    def loads(self, data: bytes) -> Any:
+        """
+        Converts encoded cursor values back into a list
+        :param data: The encoded cursor values
+        :return: The cursor values
+        """
+        return json.loads(data.decode("latin-1"))
+
+
+def is_single_valued_path(model: type[Model], path: str) -> bool:
+    """
+    Returns whether following the given lookup path from the model can only ever reach
+    a single row (so ordering by it can't produce the same object more than once)
+    :param model: The model the path starts at
+    :param path: The lookup path (for example "search_metadata__super_sort_key_1")
+    :return: True if the path only follows foreign keys and one to one fields
+    """
+    for part in path.split("__"):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return False
+        if field.many_to_many or field.one_to_many:
+            return False
+        if field.is_relation:
+            model = field.related_model
+    return True
+
+
+def get_keyset_filter(order_by: List[OrderBy], values: List[Any]) -> Q:
+    """
+    Gets the filter for all rows that come after the row with the given values
+    Nulls are always sorted last, regardless of the direction of the ordering
+    :param order_by: The ordering of the query
+    :param values: The value of each of the ordered columns for the last row of the page
+    :return: The filter for the next rows
+    """
+    result: Optional[Q] = None
+    same_values = Q()
+    for ordering, value in zip(order_by, values):
+        field_name = ordering.expression.name
+        if value is None:
+            # Nothing can come after a null, except in a later column
+            same_values &= Q(**{f"{field_name}__isnull": True})
+            continue
+
+        lookup = "lt" if ordering.descending else "gt"
+        after_value = Q(**{f"{field_name}__{lookup}": value}) | Q(
+            **{f"{field_name}__isnull": True}
+        )
+        result = (
+            same_values & after_value
+            if result is None
+            else result | (same_values & after_value)
+        )
+        same_values &= Q(**{field_name: value})
+
+    return result if result is not None else Q(pk__in=[])
+
+
+def get_estimated_count(queryset: QuerySet) -> int:
+    """
+    Gets the number of rows that the query planner expects the queryset to return
+    This is much faster than counting the rows, but can be wildly inaccurate for small results
+    :param queryset: The queryset to estimate the size of
+    :return: The estimated number of rows
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class SearchPage(Page):
+    """
+    A page of search results
+    Whether there is a next page is found by fetching an extra row, as the total count
+    may be an estimate or out of date
+    """
+
+    def __init__(
+        self,
+        object_list: List[Any],
+        number: int,
+        paginator: "SearchPaginator",
+        has_next_page: bool,
+    ):
+        super().__init__(object_list, number, paginator)
+        self.has_next_page = has_next_page
+
+    def has_next(self) -> bool:
+        return self.has_next_page
+
+
+class SearchPaginator(Paginator):
+    """
+    A paginator for search results that doesn't count every result on every page view.
+    The total is cached for a short time (see SEARCH_COUNT_CACHE_TIMEOUT), and results larger
+    than SEARCH_COUNT_ESTIMATE_THRESHOLD use the estimate of the query planner instead.
+    When the ordering of the search allows it, pages can also be fetched using a cursor
+    from the previous page instead of an OFFSET
+    """
+
+    def __init__(self, object_list: QuerySet, per_page: int) -> None:
+        self.order_by: List[OrderBy] = list(object_list.query.order_by)
+        self.supports_keyset: bool = bool(self.order_by) and all(
+            isinstance(ordering, OrderBy)
+            and isinstance(ordering.expression, F)
+            and is_single_valued_path(object_list.model, ordering.expression.name)
+            for ordering in self.order_by
+        )
+        if self.supports_keyset:
+            object_list = object_list.annotate(
+                **{
+                    f"keyset_{idx}": F(ordering.expression.name)
+                    for idx, ordering in enumerate(self.order_by)
+                }
+            )
+        super().__init__(object_list, per_page)
+        self._count_is_estimate: bool = False
+
+    @cached_property
+    def count(self) -> int:
+        estimate_threshold = getattr(settings, "SEARCH_COUNT_ESTIMATE_THRESHOLD", 0)
+        if estimate_threshold:
+            estimate = get_estimated_count(self.object_list)
+            if estimate > estimate_threshold:
+                self._count_is_estimate = True
+                return estimate
+
+        timeout = getattr(settings, "SEARCH_COUNT_CACHE_TIMEOUT", 0)
+        if not timeout:
+            return self.object_list.count()
+        return cache.get_or_set(
+            self.get_count_cache_key(), self.object_list.count, timeout
+        )
+
+    @property
+    def count_is_estimate(self) -> bool:
+        """
+        Whether the total count is the estimate of the query planner and not an exact count
+        :return: True if the count is an estimate
+        """
+        # pylint: disable=pointless-statement
+        self.count
+        return self._count_is_estimate
+
+    @cached_property
+    def query_digest(self) -> str:
+        """
+        Gets a hash of the SQL of the results, which covers both the filters and the ordering
+        The SQL includes the user for ownership searches, so users don't share counts
+        :return: The hash of the query
+        """
+        sql, params = self.object_list.query.sql_with_params()
+        return hashlib.sha256(f"{sql}{params!r}".encode()).hexdigest()
+
+    def get_count_cache_key(self) -> str:
+        """
+        Gets the key used to cache the count of the results
+        :return: The cache key
+        """
+        return f"cardsearch:count:{self.query_digest}"
+
+    def page(self, number: int) -> Page:
+        """
+        Gets the page with the given number using an OFFSET
+        The page isn't limited by the total count, so a cached count can't hide results
+        :param number: The number of the page (starting at 1)
+        :return: The page
+        :raises EmptyPage: If the page doesn't have any results
+        """
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage("That page contains no results")
+        return SearchPage(
+            rows[: self.per_page],
+            number,
+            self,
+            has_next_page=len(rows) > self.per_page,
+        )
+
+    def page_after(self, number: int, cursor: Optional[str]) -> Page:
+        """
+        Gets the page that comes after the page that the given cursor was made for
+        Falls back to a normal page if the cursor can't be used
+        :param number: The number of the page (used for display purposes only)
+        :param cursor: The cursor of the previous page
+        :return: The page
+        """
+        values = self.decode_cursor(cursor)
+        if values is None:
+            return self.page(number)
+
+        rows = list(
+            self.object_list.filter(get_keyset_filter(self.order_by, values))[
+                : self.per_page + 1
+            ]
+        )
+        return SearchPage(
+            rows[: self.per_page],
+            number,
+            self,
+            has_next_page=len(rows) > self.per_page,
+        )
+
+    def get_next_cursor(self, page: Page) -> Optional[str]:
+        """
+        Gets the cursor that can be used to find the page after the given page
+        :param page: The page of results
+        :return: The cursor if there is a next page and keyset pagination is supported
+        """
+        if not self.supports_keyset or not page.object_list or not page.has_next():
+            return None
+        last_row = page.object_list[len(page.object_list) - 1]
+        values = [
+            getattr(last_row, f"keyset_{idx}") for idx in range(len(self.order_by))
+        ]
+        # The cursor is tied to the query, as its values are meaningless with another ordering
+        return signing.dumps(
+            {"query": self.query_digest, "values": values},
+            salt=CURSOR_SALT,
+            serializer=CursorSerializer,
+            compress=True,
+        )
+
+    def decode_cursor(self, cursor: Optional[str]) -> Optional[List[Any]]:
+        """
+        Converts a cursor back into the values of the last row of the previous page
+        :param cursor: The cursor
+        :return: The values if the cursor was made for this query, otherwise None
+        """
+        if not cursor or not self.supports_keyset:
+            return None
+        try:
+            payload = signing.loads(
+                cursor, salt=CURSOR_SALT, serializer=CursorSerializer
+            )
+        except signing.BadSignature:
+            return None
+        if not isinstance(payload, dict) or payload.get("query") != self.query_digest:
+            return None
+        values = payload.get("values")
+        if not isinstance(values, list) or len(values) != len(self.order_by):
+            return None
+        return values
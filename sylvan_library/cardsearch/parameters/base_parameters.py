@@ -7,14 +7,21 @@ import math
 from abc import abstractmethod, ABCMeta
 import enum
 import logging
+import operator
 from abc import ABC
 from functools import reduce
-from typing import List, Union, Dict, Optional
+from typing import Any, Callable, List, Union, Dict, Optional, Tuple, TYPE_CHECKING
 
 from django.contrib.auth import get_user_model
-from django.db.models import F, OrderBy
+from django.db.models import F, IntegerField, OrderBy
+from django.db.models.expressions import RawSQL
 from django.db.models.query import Q
 
+if TYPE_CHECKING:
+    import numpy as np
+
+    from sylvan_library.cardsearch.card_index import CardIndex
+
 logger = logging.getLogger("django")
 
 OPERATOR_MAPPING = {
@@ -45,6 +52,21 @@ OPERATOR_TO_WORDY_MAPPING = {
     "EQ": "equal to",
 }
 
+# The functions used to compare the columns of the card index for each operator
+OPERATOR_FUNCTIONS: Dict[str, Callable[[Any, Any], Any]] = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "=": operator.eq,
+    ":": operator.eq,
+    "LT": operator.lt,
+    "LTE": operator.le,
+    "GT": operator.gt,
+    "GTE": operator.ge,
+    "EQ": operator.eq,
+}
+
 
 def or_group_queries(q_objects: List[Q]) -> Q:
     """
@@ -118,6 +140,55 @@ class CardSearchTreeNode(ABC):
         """
         raise NotImplementedError
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        """
+        Evaluates this parameter and all child parameters against the in-memory card index
+        This should match the same card faces as the query in card search mode
+        :param index: The card index
+        :return: A boolean mask of the matching card faces, or None if this parameter can't be
+        evaluated using the index
+        """
+        return None
+
+    def get_equality_lookup(
+        self, query_context: QueryContext
+    ) -> Optional[Tuple[str, Any]]:
+        """
+        Gets the field and value of this parameter if it only matches the cards (or printings)
+        where a single field is equal to a value. The query optimiser uses this to merge
+        parameters that search the same field. Negation is ignored
+        :param query_context: The context of the search
+        :return: A tuple of the lookup path and the value, or None if this isn't a simple
+        equality check
+        """
+        return None
+
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        """
+        Gets a rough estimate of the fraction of all cards that this parameter matches,
+        ignoring negation. This is used to order the conditions of a search
+        :param query_context: The context of the search
+        :return: The estimated fraction of matched cards between 0 and 1
+        """
+        return 0.5
+
+    def get_selectivity(self, query_context: QueryContext) -> float:
+        """
+        Gets the estimated fraction of all cards that this parameter matches
+        :param query_context: The context of the search
+        :return: The estimated fraction of matched cards between 0 and 1
+        """
+        selectivity = self.get_estimated_selectivity(query_context)
+        return 1 - selectivity if self.negated else selectivity
+
+    def is_user_specific(self) -> bool:
+        """
+        Gets whether the cards that this parameter matches depend on the user searching
+        (for example the cards that they own)
+        :return: True if the results are different for each user
+        """
+        return False
+
     def validate(self, query_context: QueryContext) -> None:
         pass
 
@@ -153,6 +224,15 @@ class CardSearchParameter(CardSearchTreeNode, ABC):
     def matches_param_args(cls, param_args: ParameterArgs) -> bool:
         return param_args.keyword.lower() in cls.get_search_keywords()
 
+    @classmethod
+    def get_registry_keys(cls) -> List[Tuple[str, Optional[str]]]:
+        """
+        Gets the (keyword, value) pairs that this parameter can be found by in the parameter
+        registry. A value of None means that the parameter can be used with any value
+        :return: The list of registry keys
+        """
+        return [(keyword, None) for keyword in cls.get_search_keywords()]
+
     @classmethod
     @abstractmethod
     def get_parameter_name(cls) -> str:
@@ -201,6 +281,14 @@ class CardSortParam(CardSearchParameter, metaclass=ABCMeta):
 
         return param_args.value in cls.get_sort_keywords()
 
+    @classmethod
+    def get_registry_keys(cls) -> List[Tuple[str, Optional[str]]]:
+        return [
+            (keyword, sort_keyword)
+            for keyword in cls.get_search_keywords()
+            for sort_keyword in cls.get_sort_keywords()
+        ]
+
     def __init__(self, param_args: ParameterArgs, negated: bool = False):
         super().__init__(param_args, negated)
         if param_args.operator == "<":
@@ -215,6 +303,13 @@ class CardSortParam(CardSearchParameter, metaclass=ABCMeta):
     def query(self, query_context: QueryContext) -> Q:
         return Q()
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        return index.all_faces()
+
+    def get_selectivity(self, query_context: QueryContext) -> float:
+        # Sorting doesn't filter anything, even when the order is reversed
+        return 1.0
+
     def get_sort_list(self, search_context: CardSearchContext) -> List[OrderBy]:
         """
         Gets the sort list taking order into account
@@ -265,6 +360,9 @@ class CardSearchBranchNode(CardSearchTreeNode, ABC):
 
         return CardSearchContext.CARD
 
+    def is_user_specific(self) -> bool:
+        return any(child.is_user_specific() for child in self.child_parameters)
+
     def validate(self, query_context: QueryContext) -> None:
         for child in self.child_parameters:
             child.validate(query_context)
@@ -307,6 +405,21 @@ class CardSearchAnd(CardSearchBranchNode):
             return ~query
         return query
 
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        return math.prod(
+            child.get_selectivity(query_context) for child in self.child_parameters
+        )
+
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        mask = index.all_faces()
+        for child in self.child_parameters:
+            child_mask = child.evaluate_mask(index)
+            if child_mask is None:
+                return None
+            mask &= child_mask
+
+        return index.negate(mask) if self.negated else mask
+
     def get_pretty_str(self, query_context: QueryContext) -> Optional[str]:
         """
         Returns a human-readable version of this parameter
@@ -344,6 +457,26 @@ class CardSearchOr(CardSearchBranchNode):
 
         return ~query if self.negated else query
 
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        if not self.child_parameters:
+            return 1.0
+        return 1 - math.prod(
+            1 - child.get_selectivity(query_context) for child in self.child_parameters
+        )
+
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        if not self.child_parameters:
+            return index.all_faces()
+
+        mask = ~index.all_faces()
+        for child in self.child_parameters:
+            child_mask = child.evaluate_mask(index)
+            if child_mask is None:
+                return None
+            mask |= child_mask
+
+        return index.negate(mask) if self.negated else mask
+
     def get_pretty_str(self, query_context: QueryContext) -> Optional[str]:
         """
         Returns a human-readable version of this parameter
@@ -386,6 +519,41 @@ class CardSearchNumericalParameter(CardSearchParameter, ABC):
         django_op = OPERATOR_MAPPING[self.operator]
         return {field + django_op: self.get_search_value(query_context)}
 
+    def get_equality_args(
+        self, field: str, query_context: QueryContext
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Shortcut to generate the equality lookup for the given field
+        :param field: The card field to compare with
+        :param query_context: The context of the search
+        :return: The field and number if this parameter searches for an exact number,
+        otherwise None
+        """
+        if self.operator not in ("=", ":"):
+            return None
+        search_value = self.get_search_value(query_context)
+        if isinstance(search_value, F) or math.isinf(search_value):
+            return None
+        return field, search_value
+
+    def get_mask(self, field: str, index: "CardIndex") -> Optional["np.ndarray"]:
+        """
+        Shortcut to compare the given column of the card index with the search value
+        :param field: The card field to compare with (as it is used in card search mode)
+        :param index: The card index
+        :return: The mask of the matching card faces, or None if a column isn't in the index
+        """
+        values = index.get_column(field)
+        search_value = self.get_search_value(QueryContext())
+        if isinstance(search_value, F):
+            search_value = index.get_column(search_value.name)
+        if values is None or search_value is None:
+            return None
+        return OPERATOR_FUNCTIONS[self.operator](values, search_value)
+
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        return 0.1 if self.operator in ("=", ":") else 0.4
+
     def validate(self, query_context: QueryContext) -> None:
         super().validate(query_context)
         if self.number is None:
@@ -425,11 +593,49 @@ class CardSearchBinaryParameter(CardSearchParameter, ABC):
 
         return param_args.value.lower() in cls.get_is_keywords()
 
+    @classmethod
+    def get_registry_keys(cls) -> List[Tuple[str, Optional[str]]]:
+        return [
+            (keyword, is_keyword)
+            for keyword in cls.get_search_keywords()
+            for is_keyword in cls.get_is_keywords()
+        ]
+
     def __init__(self, param_args: ParameterArgs, negated: bool = False):
         super().__init__(param_args, negated)
         if param_args.keyword == "not":
             self.negated = not self.negated
 
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        return 0.2
+
+
+class CardSearchRawSQLMixin:
+    """
+    Mixin for parameters that find the IDs of the cards they match with raw SQL
+    The SQL is used as a subquery of the search, so that the IDs never leave the database
+    """
+
+    negated: bool
+
+    @abstractmethod
+    def get_card_id_sql(self, query_context: QueryContext) -> Tuple[str, List[Any]]:
+        """
+        Gets the SQL that selects the IDs of the matching cards
+        :param query_context: The context of the search
+        :return: A tuple of the SQL (using %s placeholders) and its parameters
+        """
+        raise NotImplementedError
+
+    def query(self, query_context: QueryContext) -> Q:
+        sql, params = self.get_card_id_sql(query_context)
+        card_ids = RawSQL(sql, params, output_field=IntegerField())
+        if query_context.search_mode == CardSearchContext.CARD:
+            query = Q(id__in=card_ids)
+        else:
+            query = Q(card_id__in=card_ids)
+        return ~query if self.negated else query
+
 
 def get_value_f_equivalent(
     value: str, card_search_context: CardSearchContext
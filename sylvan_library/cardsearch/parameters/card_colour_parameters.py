@@ -2,7 +2,7 @@
 Card colour parameters
 """
 
-from typing import List
+from typing import List, Optional, TYPE_CHECKING
 
 from django.db.models import F
 from django.db.models.query import Q
@@ -22,6 +22,11 @@ from sylvan_library.cardsearch.parameters.base_parameters import (
     get_value_f_equivalent,
 )
 
+if TYPE_CHECKING:
+    import numpy as np
+
+    from sylvan_library.cardsearch.card_index import CardIndex
+
 
 class CardComplexColourParam(CardSearchParameter):
     """
@@ -111,6 +116,28 @@ class CardComplexColourParam(CardSearchParameter):
 
         return ~result if self.negated else result
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        colour_flags = colours_to_int_flags(self.colours)
+        values = index.get_column(self.field_name)
+        if values is None:
+            return None
+
+        if self.operator == "=":
+            mask = values == colour_flags
+            return index.negate(mask) if self.negated else mask
+
+        if self.operator in (">=", ">"):
+            cards = index.faces_to_cards((values & colour_flags) >= colour_flags)
+        elif self.operator in ("<=", "<"):
+            # pylint: disable=invalid-unary-operand-type
+            cards = index.faces_to_cards((values & ~colour_flags) == 0)
+        else:
+            raise ValueError(f'Unsupported operator "{self.operator}"')
+        if self.operator in (">", "<"):
+            cards &= ~index.faces_to_cards(values == colour_flags)
+
+        return index.cards_to_faces(~cards if self.negated else cards)
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         if self.colours == 0:
             return (
@@ -156,6 +183,13 @@ class CardMulticolouredOnlyParam(CardSearchBinaryParameter):
             return Q(faces__colour_count__gte=2, _negated=self.negated)
         return Q(card__faces__colour_count__gte=2, _negated=self.negated)
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        colour_counts = index.get_column("faces__colour_count")
+        if colour_counts is None:
+            return None
+        mask = colour_counts >= 2
+        return index.negate(mask) if self.negated else mask
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         verb = "isn't" if self.negated else "is"
         return f"card {verb} multicoloured"
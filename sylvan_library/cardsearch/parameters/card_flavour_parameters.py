@@ -11,6 +11,7 @@ from sylvan_library.cardsearch.parameters.base_parameters import (
     QueryContext,
     CardSearchContext,
 )
+from sylvan_library.cardsearch.text_search import get_text_lookup
 
 
 class CardFlavourTextParam(CardSearchParameter):
@@ -35,7 +36,12 @@ class CardFlavourTextParam(CardSearchParameter):
 
     def query(self, query_context: QueryContext) -> Q:
         return Q(
-            face_printings__flavour_text__icontains=self.value, _negated=self.negated
+            **{
+                get_text_lookup(
+                    "face_printings__flavour_text", regex_match=False, exact_match=False
+                ): self.value
+            },
+            _negated=self.negated,
         )
 
     def get_pretty_str(self, query_context: QueryContext) -> str:
@@ -2,14 +2,17 @@
 Card mana cost parameters
 """
 
+import operator
 from collections import Counter
 
 import typing
-from typing import List
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
 from django.db.models.query import Q
 
+from sylvan_library.cards.mana_symbols import count_mana_symbols, get_generic_mana
 from sylvan_library.cardsearch.parameters.base_parameters import (
+    OPERATOR_FUNCTIONS,
     OPERATOR_MAPPING,
     CardSearchNumericalParameter,
     CardSearchContext,
@@ -20,6 +23,11 @@ from sylvan_library.cardsearch.parameters.base_parameters import (
     get_value_f_equivalent,
 )
 
+if TYPE_CHECKING:
+    import numpy as np
+
+    from sylvan_library.cardsearch.card_index import CardIndex
+
 
 SYMBOL_REMAPPING = {
     "w/r": "r/w",
@@ -102,51 +110,16 @@ class CardManaCostComplexParam(CardSearchParameter):
         self.generic_mana = 0
 
     def validate(self, query_context: QueryContext) -> None:
-        self.symbol_counts = Counter()
-        pos: int = 0
-        current_symbol: str = ""
-        in_symbol: bool = False
-        while True:
-            if pos >= len(self.cost_text):
-                break
-            char: str = self.cost_text[pos]
-            if char == "{":
-                if in_symbol:
-                    raise ValueError(
-                        f"Could not parse {self.cost_text}: unexpected '{{'"
-                    )
-                in_symbol = True
-                current_symbol = ""
-            elif char == "}":
-                if in_symbol:
-                    self.symbol_counts[
-                        SYMBOL_REMAPPING.get(current_symbol, current_symbol)
-                    ] += 1
-
-                    in_symbol = False
-                else:
-                    raise QueryValidationError(
-                        f"Could not parse {self.cost_text}: unexpected '{{'"
-                    )
-            elif in_symbol:
-                current_symbol += char
-            elif not in_symbol:
-                self.symbol_counts[char] += 1
-
-            pos += 1
-
-        if in_symbol:
-            raise QueryValidationError(
-                f"Could not parse {self.cost_text}: expected '}}'"
-            )
+        try:
+            symbol_counts = count_mana_symbols(self.cost_text)
+        except ValueError as error:
+            raise QueryValidationError(str(error)) from error
 
-        self.generic_mana = 0
-        for symbol, _ in dict(self.symbol_counts).items():
-            try:
-                self.generic_mana = int(symbol)
-                del self.symbol_counts[symbol]
-            except (TypeError, ValueError):
-                continue
+        self.generic_mana = get_generic_mana(symbol_counts)
+        self.symbol_counts = Counter()
+        for symbol, count in symbol_counts.items():
+            if not symbol.isdecimal():
+                self.symbol_counts[SYMBOL_REMAPPING.get(symbol, symbol)] += count
 
     def query(self, query_context: QueryContext) -> Q:
         query = Q()
@@ -202,6 +175,43 @@ class CardManaCostComplexParam(CardSearchParameter):
         query.negated = self.negated
         return query
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        compare = OPERATOR_FUNCTIONS[self.operator]
+        # A list of (column, value, comparison) to mirror the query
+        conditions = []
+        for symbol, count in dict(self.symbol_counts).items():
+            if symbol.upper() not in self.symbols:
+                # Let the query raise the error
+                return None
+            conditions.append(
+                (f"symbol_count_{symbol.lower().replace('/', '_')}", count, compare)
+            )
+
+        if self.generic_mana:
+            conditions.append(("symbol_count_generic", self.generic_mana, compare))
+
+        if self.operator in ("<", "<=", "="):
+            for symbol in self.symbols:
+                if symbol.lower() in self.symbol_counts:
+                    continue
+                conditions.append(
+                    (
+                        f"symbol_count_{symbol.lower().replace('/', '_')}",
+                        0,
+                        operator.eq,
+                    )
+                )
+            if not self.generic_mana:
+                conditions.append(("symbol_count_generic", 0, compare))
+
+        mask = index.all_faces()
+        for column_name, value, comparison in conditions:
+            values = index.get_column(f"faces__search_metadata__{column_name}")
+            if values is None:
+                return None
+            mask &= comparison(values, value)
+        return index.negate(mask) if self.negated else mask
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         """
         Returns a human-readable version of this parameter
@@ -267,6 +277,30 @@ class CardColourCountParam(CardSearchNumericalParameter):
         args["_negated"] = self.negated
         return Q(**args)
 
+    def get_equality_lookup(
+        self, query_context: QueryContext
+    ) -> Optional[Tuple[str, float]]:
+        prefix = (
+            "card__" if query_context.search_mode == CardSearchContext.PRINTING else ""
+        )
+        return self.get_equality_args(
+            (
+                f"{prefix}colour_identity_count"
+                if self.in_identity_mode
+                else f"{prefix}faces__colour_count"
+            ),
+            query_context,
+        )
+
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        mask = self.get_mask(
+            "colour_identity_count" if self.in_identity_mode else "faces__colour_count",
+            index,
+        )
+        if mask is None:
+            return None
+        return index.negate(mask) if self.negated else mask
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         """
         Returns a human-readable version of this parameter
@@ -305,6 +339,17 @@ class CardManaValueParam(CardSearchNumericalParameter):
         query = Q(**args)
         return query
 
+    def get_equality_lookup(
+        self, query_context: QueryContext
+    ) -> Optional[Tuple[str, float]]:
+        prefix = (
+            "card__" if query_context.search_mode == CardSearchContext.PRINTING else ""
+        )
+        return self.get_equality_args(f"{prefix}mana_value", query_context)
+
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        return self.get_mask("mana_value", index)
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         return (
             "mana value "
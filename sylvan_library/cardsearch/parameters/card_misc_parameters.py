@@ -2,7 +2,7 @@
 Miscellaneous card parameters (mostly the "is" and "has" parameters)
 """
 
-from typing import List
+from typing import List, Optional, TYPE_CHECKING
 
 from django.db.models import Q
 
@@ -14,6 +14,11 @@ from sylvan_library.cardsearch.parameters.base_parameters import (
     CardSearchBinaryParameter,
 )
 
+if TYPE_CHECKING:
+    import numpy as np
+
+    from sylvan_library.cardsearch.card_index import CardIndex
+
 
 class CardLayoutParameter(CardSearchParameter):
     """
@@ -48,8 +53,8 @@ class CardIsPhyrexianParam(CardSearchBinaryParameter):
     """
 
     @classmethod
-    def get_is_keywords(cls) -> str:
-        return "phyrexian"
+    def get_is_keywords(cls) -> List[str]:
+        return ["phyrexian"]
 
     @classmethod
     def get_parameter_name(cls) -> str:
@@ -88,8 +93,8 @@ class CardHasWatermarkParam(CardSearchBinaryParameter):
         return CardSearchContext.PRINTING
 
     @classmethod
-    def get_is_keywords(cls) -> str:
-        return "watermark"
+    def get_is_keywords(cls) -> List[str]:
+        return ["watermark"]
 
     def query(self, query_context: QueryContext) -> Q:
         return Q(face_printings__watermark__isnull=self.negated)
@@ -106,8 +111,8 @@ class CardIsReprintParam(CardSearchBinaryParameter):
     """
 
     @classmethod
-    def get_is_keywords(cls) -> str:
-        return "reprint"
+    def get_is_keywords(cls) -> List[str]:
+        return ["reprint"]
 
     @classmethod
     def get_parameter_name(cls) -> str:
@@ -129,8 +134,8 @@ class CardHasColourIndicatorParam(CardSearchBinaryParameter):
     """
 
     @classmethod
-    def get_is_keywords(cls) -> str:
-        return "indicator"
+    def get_is_keywords(cls) -> List[str]:
+        return ["indicator"]
 
     @classmethod
     def get_parameter_name(cls) -> str:
@@ -147,6 +152,13 @@ class CardHasColourIndicatorParam(CardSearchBinaryParameter):
         query = Q(**{f"{prefix}faces__colour_indicator": 0})
         return query if self.negated else ~query
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        colour_indicators = index.get_column("faces__colour_indicator")
+        if colour_indicators is None:
+            return None
+        mask = colour_indicators == 0
+        return mask if self.negated else index.negate(mask)
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         return (
             "the cards "
@@ -161,8 +173,8 @@ class CardIsHybridParam(CardSearchBinaryParameter):
     """
 
     @classmethod
-    def get_is_keywords(cls) -> str:
-        return "hybrid"
+    def get_is_keywords(cls) -> List[str]:
+        return ["hybrid"]
 
     @classmethod
     def get_parameter_name(cls) -> str:
@@ -213,6 +225,12 @@ class CardIsCommanderParam(CardSearchBinaryParameter):
 
         return ~query if self.negated else query
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        mask = index.get_column("search_metadata__is_commander")
+        if mask is None:
+            return None
+        return ~mask if self.negated else mask
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         return (
             "the cards " + ("can't" if self.negated else "can") + " be your commander"
@@ -240,6 +258,13 @@ class CardIsVanillaParam(CardSearchBinaryParameter):
         )
         return ~query if self.negated else query
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        no_rules_text = index.get_column("faces__rules_text__isnull")
+        if no_rules_text is None:
+            return None
+        mask = no_rules_text & index.get_type_mask("Creature")
+        return index.negate(mask) if self.negated else mask
+
     def get_pretty_str(self, query_context: QueryContext):
         return "the cards " + ("aren't" if self.negated else "are") + " vanilla"
 
@@ -13,6 +13,7 @@ from sylvan_library.cardsearch.parameters.base_parameters import (
     QueryContext,
     CardSearchParameter,
 )
+from sylvan_library.cardsearch.text_search import get_text_lookup
 
 
 class CardNameParam(CardSearchParameter):
@@ -53,18 +54,18 @@ class CardNameParam(CardSearchParameter):
             else "card__name"
         )
 
-        if self.regex_match:
-            query = Q(**{f"{name_column}__iregex": self.value})
-        elif self.match_exact:
-            query = Q(**{f"{name_column}__iexact": self.value})
-        elif self.operator == ":":
-            query = Q(**{f"{name_column}__icontains": self.value})
+        if self.regex_match or self.match_exact or self.operator == ":":
+            lookup = get_text_lookup(name_column, self.regex_match, self.match_exact)
+            query = Q(**{lookup: self.value})
         else:
             django_op = OPERATOR_MAPPING[self.operator]
             query = Q(**{name_column + django_op: self.value})
 
         return ~query if self.negated else query
 
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        return 0.01 if self.match_exact or self.operator == ":" else 0.5
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         """
         Returns a human-readable version of this parameter
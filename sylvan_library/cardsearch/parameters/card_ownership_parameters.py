@@ -2,21 +2,25 @@
 Card ownership parameters
 """
 
-from typing import List
+from typing import Any, List, Tuple
 
-from django.db import connection
-from django.db.models import Q, Sum, Subquery, OuterRef
-from django.db.models.functions import Coalesce
+from django.db.models import Q
 
-from sylvan_library.cards.models.card import Card
+from sylvan_library.cards.models.card import UserCardOwnershipTotal
+from sylvan_library.cards.models.decks import UserCardDeckUsage
+from sylvan_library.cardsearch.models import CardPauperCandidate
 from sylvan_library.cardsearch.parameters.base_parameters import (
+    OPERATOR_FUNCTIONS,
+    OPERATOR_MAPPING,
     CardSearchNumericalParameter,
     CardSearchContext,
     QueryContext,
     QueryValidationError,
     CardSearchBinaryParameter,
+    CardSearchRawSQLMixin,
     ParameterArgs,
 )
+from sylvan_library.cardsearch.reference_data import ReferenceData
 
 
 class CardOwnershipCountParam(CardSearchNumericalParameter):
@@ -35,6 +39,9 @@ class CardOwnershipCountParam(CardSearchNumericalParameter):
     def get_default_search_context(self) -> CardSearchContext:
         return CardSearchContext.CARD
 
+    def is_user_specific(self) -> bool:
+        return True
+
     def validate(self, query_context: QueryContext) -> None:
         if not query_context.user or query_context.user.is_anonymous:
             raise QueryValidationError("Can't search by ownership when not logged in")
@@ -55,37 +62,20 @@ class CardOwnershipCountParam(CardSearchNumericalParameter):
 
         assert self.operator in ("<", "<=", "=", ">=", ">")
 
-        # Create a subquery to calculate the total ownership count for each card
-        # for the given user.
-        ownership_subquery = (
-            Card.objects.filter(pk=OuterRef("pk"))
-            .annotate(
-                total_count=Sum(
-                    "printings__localisations__ownerships__count",
-                    filter=Q(
-                        printings__localisations__ownerships__owner=query_context.user
-                    ),
-                )
-            )
-            .values("total_count")
-        )
-
-        # Annotate the main queryset with the ownership count, coalescing nulls to 0
-        annotated_cards = Card.objects.annotate(
-            ownership_count=Coalesce(Subquery(ownership_subquery), 0)
-        )
-
-        # Build the filter condition based on the user's operator and number
-        filter_condition = {f"ownership_count{self.get_filter_operator()}": self.number}
-
-        # Get the IDs of the cards that match the condition
-        card_ids = annotated_cards.filter(**filter_condition).values_list(
-            "id", flat=True
-        )
+        # Cards the user doesn't own don't have a total, so if cards with no copies can match,
+        # then exclude the owned cards that don't match instead
+        user_totals = UserCardOwnershipTotal.objects.filter(owner=query_context.user)
+        filter_condition = {f"count{self.get_filter_operator()}": self.number}
+        if OPERATOR_FUNCTIONS[self.operator](0, self.number):
+            card_ids = user_totals.exclude(**filter_condition).values("card_id")
+            negated = not self.negated
+        else:
+            card_ids = user_totals.filter(**filter_condition).values("card_id")
+            negated = self.negated
 
         if query_context.search_mode == CardSearchContext.CARD:
-            return Q(id__in=card_ids, _negated=self.negated)
-        return Q(card_id__in=card_ids, _negated=self.negated)
+            return Q(id__in=card_ids, _negated=negated)
+        return Q(card_id__in=card_ids, _negated=negated)
 
     def get_filter_operator(self) -> str:
         """
@@ -136,6 +126,9 @@ class CardUsageCountParam(CardSearchNumericalParameter):
     def get_default_search_context(self) -> CardSearchContext:
         return CardSearchContext.CARD
 
+    def is_user_specific(self) -> bool:
+        return True
+
     def validate(self, query_context: QueryContext) -> None:
         if not query_context.user or query_context.user.is_anonymous:
             raise QueryValidationError("Can't search by deck usage if not logged in")
@@ -159,31 +152,23 @@ class CardUsageCountParam(CardSearchNumericalParameter):
         Gets the Q query object
         :return: The Q object
         """
-        with connection.cursor() as cursor:
-            cursor.execute(
-                f"""
-SELECT cards_card.id
-FROM cards_card
-LEFT JOIN cards_deckcard 
-ON cards_deckcard.card_id = cards_card.id
-AND (cards_deckcard.is_commander OR NOT %(only_commanders)s)
-LEFT JOIN cards_deck 
-ON cards_deck.id = cards_deckcard.deck_id 
-AND cards_deck.owner_id = %(user_id)s
-GROUP BY cards_card.id
-HAVING COUNT(cards_deck.id) {self.operator} %(number)s
-""",
-                {
-                    "user_id": query_context.user.id,
-                    "number": self.number,
-                    "only_commanders": self.only_commanders,
-                },
-            )
-            ids = cursor.fetchall()
-            ids = list(sum(ids, ()))
+        # Cards the user hasn't used don't have a usage row, so if unused cards can match,
+        # then exclude the used cards that don't match instead
+        count_field = "commander_count" if self.only_commanders else "deck_count"
+        user_usages = UserCardDeckUsage.objects.filter(owner=query_context.user)
+        filter_condition = {
+            f"{count_field}{OPERATOR_MAPPING[self.operator]}": self.number
+        }
+        if OPERATOR_FUNCTIONS[self.operator](0, self.number):
+            card_ids = user_usages.exclude(**filter_condition).values("card_id")
+            negated = not self.negated
+        else:
+            card_ids = user_usages.filter(**filter_condition).values("card_id")
+            negated = self.negated
+
         if query_context.search_mode == CardSearchContext.CARD:
-            return Q(id__in=ids, _negated=self.negated)
-        return Q(card_id__in=ids, _negated=self.negated)
+            return Q(id__in=card_ids, _negated=negated)
+        return Q(card_id__in=card_ids, _negated=negated)
 
     def get_pretty_str(self, query_context: QueryContext) -> str:
         """
@@ -196,7 +181,7 @@ HAVING COUNT(cards_deck.id) {self.operator} %(number)s
         return f"you used it in {self.operator} {self.number} decks"
 
 
-class CardMissingPauperParam(CardSearchBinaryParameter):
+class CardMissingPauperParam(CardSearchRawSQLMixin, CardSearchBinaryParameter):
     """
     A parameter for searching for cards that the user owns a rare version of,
     but doesn't own a common or uncommon variant that they can use in pauper
@@ -220,29 +205,28 @@ class CardMissingPauperParam(CardSearchBinaryParameter):
     def get_default_search_context(self) -> CardSearchContext:
         return CardSearchContext.CARD
 
+    def is_user_specific(self) -> bool:
+        return True
+
     def validate(self, query_context: QueryContext) -> None:
         if not query_context.user or query_context.user.is_anonymous:
             raise QueryValidationError(
                 "Can't search by missing pauper cards when not logged in"
             )
 
-    def query(self, query_context: QueryContext) -> Q:
-        """
-        Gets the Q query object
-        :return: The Q object
-        """
-        with connection.cursor() as cursor:
+    def get_card_id_sql(self, query_context: QueryContext) -> Tuple[str, List[Any]]:
+        include_rarities = ["C"]
+        exclude_rarities = ["R", "M"]
 
-            include_rarities = ["C"]
-            exclude_rarities = ["R", "M"]
+        only_common = self.value in ["missing-pauper", "missingpauper", "nopauper"]
+        if only_common:
+            exclude_rarities.append("U")
+        else:
+            include_rarities.append("U")
 
-            if self.value in ["missing-pauper", "missingpauper", "nopauper"]:
-                exclude_rarities.append("U")
-            else:
-                include_rarities.append("U")
+        exodus = next(iter(ReferenceData.get().find_sets("EXO", exact=True)), None)
 
-            cursor.execute(
-                f"""
+        sql = f"""
 -- Find cards where I have a rare or mythic version of it
 SELECT DISTINCT(cards_card.id)
 FROM cards_card
@@ -256,27 +240,16 @@ JOIN cards_cardlocalisation
   ON cards_cardprinting.id = cards_cardlocalisation.card_printing_id
 JOIN cards_userownedcard
   ON cards_userownedcard.card_localisation_id = cards_cardlocalisation.id
-WHERE cards_userownedcard.owner_id = %(user_id)s
-AND cards_rarity.symbol = ANY(%(exclude_rarities)s)
-AND cards_set.release_date >= (SELECT release_date FROM cards_set WHERE cards_set.code = 'EXO')
+WHERE cards_userownedcard.owner_id = %s
+AND cards_rarity.symbol = ANY(%s)
+AND cards_set.release_date >= %s
 
 INTERSECT 
 
 -- And there exists a common or uncommon version of it
-SELECT DISTINCT(cards_card.id)
-FROM cards_card
-JOIN cards_cardprinting
-  ON cards_cardprinting.card_id = cards_card.id
-JOIN cards_set
-  ON cards_set.id = cards_cardprinting.set_id
-JOIN cards_rarity
-  ON cards_rarity.id = cards_cardprinting.rarity_id
-JOIN cards_cardlocalisation
-  ON cards_cardprinting.id = cards_cardlocalisation.card_printing_id
-WHERE cards_rarity.symbol = ANY(%(include_rarities)s)
-AND NOT cards_set.is_online_only
-AND cards_set.code NOT IN ('30A')
-AND cards_set.release_date >= (SELECT release_date FROM cards_set WHERE cards_set.code = 'EXO')
+SELECT pauper_candidate.card_id
+FROM {CardPauperCandidate._meta.db_table} pauper_candidate
+WHERE pauper_candidate.has_common OR NOT %s
 
 EXCEPT
 
@@ -293,23 +266,18 @@ JOIN cards_cardlocalisation
   ON cards_cardprinting.id = cards_cardlocalisation.card_printing_id
 JOIN cards_userownedcard
   ON cards_userownedcard.card_localisation_id = cards_cardlocalisation.id
-WHERE cards_userownedcard.owner_id = %(user_id)s
-AND cards_rarity.symbol = ANY(%(include_rarities)s)
-""",
-                {
-                    "user_id": query_context.user.id,
-                    "include_rarities": include_rarities,
-                    "exclude_rarities": exclude_rarities,
-                },
-            )
-            rows = cursor.fetchall()
-            ids = list(sum(rows, ()))
-        q = (
-            Q(id__in=ids)
-            if query_context.search_mode == CardSearchContext.CARD
-            else Q(card_id__in=ids)
-        )
-        return ~q if self.negated else q
+WHERE cards_userownedcard.owner_id = %s
+AND cards_rarity.symbol = ANY(%s)
+"""
+        user_id = query_context.user.id
+        return sql, [
+            user_id,
+            exclude_rarities,
+            exodus.release_date if exodus else None,
+            only_common,
+            user_id,
+            include_rarities,
+        ]
 
     def get_pretty_str(self, query_context: QueryContext) -> str:
         """
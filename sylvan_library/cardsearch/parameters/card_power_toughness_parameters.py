@@ -2,7 +2,7 @@
 Card power, toughness and loyalty parameters
 """
 
-from typing import List
+from typing import List, Optional, TYPE_CHECKING
 
 from django.db.models import F
 from django.db.models.query import Q
@@ -13,6 +13,11 @@ from sylvan_library.cardsearch.parameters.base_parameters import (
     QueryContext,
 )
 
+if TYPE_CHECKING:
+    import numpy as np
+
+    from sylvan_library.cardsearch.card_index import CardIndex
+
 
 class CardNumPowerParam(CardSearchNumericalParameter):
     """
@@ -41,6 +46,13 @@ class CardNumPowerParam(CardSearchNumericalParameter):
         query = Q(**args) & Q(**{f"{prefix}faces__power__isnull": False})
         return ~query if self.negated else query
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        mask = self.get_mask("faces__num_power", index)
+        if mask is None:
+            return None
+        mask &= ~index.get_column("faces__power__isnull")
+        return index.negate(mask) if self.negated else mask
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         return (
             f"the power {'is not ' if self.negated else ''}{self.operator} {self.value}"
@@ -70,6 +82,12 @@ class CardNumToughnessParam(CardSearchNumericalParameter):
         args = self.get_args(f"{prefix}faces__num_toughness", query_context)
         return Q(**args) & Q(**{f"{prefix}faces__toughness__isnull": False})
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        mask = self.get_mask("faces__num_toughness", index)
+        if mask is None:
+            return None
+        return mask & ~index.get_column("faces__toughness__isnull")
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         if isinstance(self.value, F):
             return f"the toughness {self.operator} "
@@ -87,7 +105,7 @@ class CardNumLoyaltyParam(CardSearchNumericalParameter):
 
     @classmethod
     def get_search_keywords(cls) -> List[str]:
-        return ["loyalty", "loy", "l"]
+        return ["loyalty", "loy"]
 
     def get_default_search_context(self) -> CardSearchContext:
         return CardSearchContext.CARD
@@ -99,5 +117,11 @@ class CardNumLoyaltyParam(CardSearchNumericalParameter):
         args = self.get_args(f"{prefix}faces__num_loyalty", query_context)
         return Q(**args) & Q(**{f"{prefix}faces__loyalty__isnull": False})
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        mask = self.get_mask("faces__num_loyalty", index)
+        if mask is None:
+            return None
+        return mask & ~index.get_column("faces__loyalty__isnull")
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         return f"the loyalty {self.operator} {self.value}"
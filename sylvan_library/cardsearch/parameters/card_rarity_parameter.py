@@ -2,7 +2,7 @@
 Card rarity parameters
 """
 
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 
 from django.db.models.query import Q
 
@@ -16,6 +16,7 @@ from sylvan_library.cardsearch.parameters.base_parameters import (
     QueryContext,
     QueryValidationError,
 )
+from sylvan_library.cardsearch.reference_data import ReferenceData
 
 
 class CardRarityParam(CardSearchParameter):
@@ -45,12 +46,9 @@ class CardRarityParam(CardSearchParameter):
             self.operator = "="
 
     def validate(self, query_context: QueryContext) -> None:
-        try:
-            self.rarity = Rarity.objects.get(
-                Q(symbol__iexact=self.value) | Q(name__iexact=self.value)
-            )
-        except Rarity.DoesNotExist as ex:
-            raise QueryValidationError(f'Couldn\'t find rarity "{self.value}"') from ex
+        self.rarity = ReferenceData.get().get_rarity(self.value)
+        if not self.rarity:
+            raise QueryValidationError(f'Couldn\'t find rarity "{self.value}"')
 
     def query(self, query_context: QueryContext) -> Q:
         if self.operator == "=":
@@ -60,6 +58,13 @@ class CardRarityParam(CardSearchParameter):
             query = Q(**{filter_: self.rarity.display_order})
         return ~query if self.negated else query
 
+    def get_equality_lookup(
+        self, query_context: QueryContext
+    ) -> Optional[Tuple[str, Any]]:
+        if self.operator == "=":
+            return "rarity", self.rarity
+        return None
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         return (
             "the rarity "
@@ -18,6 +18,7 @@ from sylvan_library.cardsearch.parameters.base_parameters import (
     CardSearchParameter,
     ParameterArgs,
 )
+from sylvan_library.cardsearch.text_search import get_text_lookup
 
 
 class CardRulesTextParam(CardSearchParameter):
@@ -50,14 +51,13 @@ class CardRulesTextParam(CardSearchParameter):
             return self.get_query("faces__rules_text", query_context)
         return self.get_query("card__faces__rules_text", query_context)
 
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        return 0.05
+
     def get_query(self, column_name: str, query_context: QueryContext):
+        lookup = get_text_lookup(column_name, self.regex_match, self.exact_match)
         if "~" not in self.value:
-            if self.regex_match:
-                query = Q(**{f"{column_name}__iregex": self.value})
-            elif self.exact_match:
-                query = Q(**{f"{column_name}__iexact": self.value})
-            else:
-                query = Q(**{f"{column_name}__icontains": self.value})
+            query = Q(**{lookup: self.value})
             return ~query if self.negated else query
 
         name_column = (
@@ -68,21 +68,11 @@ class CardRulesTextParam(CardSearchParameter):
         chunks = [Value(c) for c in self.value.split("~")]
         params = [F(name_column)] * (len(chunks) * 2 - 1)
         params[0::2] = chunks
-        if self.regex_match:
-            query = Q(**{f"{column_name}__iregex": Concat(*params)})
-        elif self.exact_match:
-            query = Q(**{f"{column_name}__iexact": Concat(*params)})
-        else:
-            query = Q(**{f"{column_name}__icontains": Concat(*params)})
+        query = Q(**{lookup: Concat(*params)})
 
         params = [Value("this spell")] * (len(chunks) * 2 - 1)
         params[0::2] = chunks
-        if self.regex_match:
-            query |= Q(**{f"{column_name}__iregex": Concat(*params)})
-        elif self.exact_match:
-            query |= Q(**{f"{column_name}__iexact": Concat(*params)})
-        else:
-            query |= Q(**{f"{column_name}__icontains": Concat(*params)})
+        query |= Q(**{lookup: Concat(*params)})
 
         return ~query if self.negated else query
 
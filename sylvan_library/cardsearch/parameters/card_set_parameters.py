@@ -3,14 +3,14 @@ Card set parameters
 """
 
 import datetime
-from typing import List
+from typing import Any, List, Optional, Tuple, TYPE_CHECKING
 
 from django.db.models import Q, F
 from django.db.models.functions import Coalesce
 
 from sylvan_library.cards.models.card import CardPrinting
 from sylvan_library.cards.models.legality import CardLegality
-from sylvan_library.cards.models.sets import Set, Block, Format
+from sylvan_library.cards.models.sets import Set, Block
 from sylvan_library.cardsearch.parameters.base_parameters import (
     CardSearchContext,
     ParameterArgs,
@@ -20,26 +20,41 @@ from sylvan_library.cardsearch.parameters.base_parameters import (
     OPERATOR_MAPPING,
     CardSearchBinaryParameter,
 )
+from sylvan_library.cardsearch.reference_data import ReferenceData
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from sylvan_library.cardsearch.card_index import CardIndex
 
 
 def user_query_to_set(value: str) -> Set:
+    """
+    Finds the set that the user meant by the given code or name
+    :param value: The set code, name, or part of its name
+    :return: The set
+    :raises QueryValidationError: If no sets or more than one set matches the value
+    """
+    reference_data = ReferenceData.get()
     # Search by code EXACT
-    matching_sets = Set.objects.filter(Q(code__iexact=value) | Q(name__iexact=value))
-    if matching_sets.exists():
-        return matching_sets.first()
+    matching_sets = reference_data.find_sets(value, exact=True)
+    if matching_sets:
+        return matching_sets[0]
 
-    matching_sets = Set.objects.filter(name__icontains=value)
+    matching_sets = reference_data.find_sets(value, exact=False)
 
-    if not matching_sets.exists():
+    if not matching_sets:
         raise QueryValidationError(f'Unknown set "{value}"')
 
-    if matching_sets.count() > 1:
-        matching_sets = matching_sets.exclude(type="promo")
+    if len(matching_sets) > 1:
+        matching_sets = [
+            set_obj for set_obj in matching_sets if set_obj.type != "promo"
+        ] or matching_sets
 
-    if matching_sets.count() > 1:
+    if len(matching_sets) > 1:
         raise QueryValidationError(f'Multiple sets match "{value}"')
 
-    return matching_sets.first()
+    return matching_sets[0]
 
 
 class CardSetParam(CardSearchParameter):
@@ -82,6 +97,21 @@ class CardSetParam(CardSearchParameter):
             }
         )
 
+    def get_equality_lookup(
+        self, query_context: QueryContext
+    ) -> Optional[Tuple[str, Any]]:
+        return (
+            (
+                "set"
+                if query_context.search_mode == CardSearchContext.PRINTING
+                else "printings__set"
+            ),
+            self.set_obj,
+        )
+
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        return 0.01
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         return (
             "the card "
@@ -118,30 +148,26 @@ class CardBlockParam(CardSearchParameter):
         super().validate(query_context)
         self.block_obj = self.get_block()
 
-    def get_block(self):
-        try:
-            return Block.objects.get(name__iexact=self.value)
-        except (Block.DoesNotExist, Block.MultipleObjectsReturned):
-            pass
-
-        card_set = None
-        try:
-            card_set = Set.objects.get(code__iexact=self.value)
-        except Set.DoesNotExist:
-            try:
-                card_set = Set.objects.get(name__icontains=self.value)
-            except (Set.DoesNotExist, Set.MultipleObjectsReturned):
-                pass
-
-        if card_set and card_set.block:
-            return card_set.block
-
-        try:
-            return Block.objects.get(name__icontains=self.value)
-        except Block.DoesNotExist as ex:
-            raise QueryValidationError(f'Unknown block "{self.value}"') from ex
-        except Block.MultipleObjectsReturned as ex:
-            raise QueryValidationError(f'Multiple blocks match "{self.value}"') from ex
+    def get_block(self) -> Block:
+        reference_data = ReferenceData.get()
+        blocks = reference_data.find_blocks(self.value, exact=True)
+        if len(blocks) == 1:
+            return blocks[0]
+
+        card_sets = [
+            set_obj
+            for set_obj in reference_data.sets
+            if set_obj.code.lower() == self.value
+        ] or reference_data.find_sets(self.value, exact=False)
+        if len(card_sets) == 1 and card_sets[0].block:
+            return card_sets[0].block
+
+        blocks = reference_data.find_blocks(self.value, exact=False)
+        if not blocks:
+            raise QueryValidationError(f'Unknown block "{self.value}"')
+        if len(blocks) > 1:
+            raise QueryValidationError(f'Multiple blocks match "{self.value}"')
+        return blocks[0]
 
     def query(self, query_context: QueryContext) -> Q:
         assert self.block_obj
@@ -187,10 +213,9 @@ class CardLegalityParam(CardSearchParameter):
     def validate(self, query_context) -> None:
         super().validate(query_context)
 
-        try:
-            self.card_format = Format.objects.get(name__iexact=self.value)
-        except Format.DoesNotExist as ex:
-            raise QueryValidationError(f'Format "{self.value}" does not exist.') from ex
+        self.card_format = ReferenceData.get().get_format(self.value)
+        if not self.card_format:
+            raise QueryValidationError(f'Format "{self.value}" does not exist.')
 
     def query(self, query_context: QueryContext) -> Q:
         assert self.card_format
@@ -198,17 +223,24 @@ class CardLegalityParam(CardSearchParameter):
             format=self.card_format,
             restriction__iexact=self.restriction,
         )
+        # Filter by the cards instead of joining the legalities, otherwise two legality
+        # parameters in the same search would have to match the same legality
         query = Q(
             **{
                 (
-                    "card__legalities__in"
+                    "card_id__in"
                     if query_context.search_mode == CardSearchContext.PRINTING
-                    else "legalities__in"
-                ): legality_query
+                    else "id__in"
+                ): legality_query.values("card_id")
             }
         )
         return ~query if self.negated else query
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        assert self.card_format
+        mask = index.get_legality_mask(self.card_format.id, self.restriction)
+        return ~mask if self.negated else mask
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         return (
             f"it's not {self.restriction} in {self.card_format.name}"
@@ -298,6 +330,12 @@ class CardIsUniversesBeyondParam(CardSearchBinaryParameter):
     def query(self, query_context: QueryContext) -> Q:
         return Q(search_metadata__is_universes_beyond=True, _negated=self.negated)
 
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        mask = index.get_column("search_metadata__is_universes_beyond")
+        if mask is None:
+            return None
+        return ~mask if self.negated else mask
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         return (
             "the cards " + ("aren't" if self.negated else "are") + " Universes Beyond"
@@ -2,7 +2,7 @@
 Card type parameters
 """
 
-from typing import List
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
 from django.db.models.query import Q
 
@@ -19,6 +19,12 @@ from sylvan_library.cardsearch.parameters.base_parameters import (
     CardSearchParameter,
     ParameterArgs,
 )
+from sylvan_library.cardsearch.reference_data import ReferenceData
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from sylvan_library.cardsearch.card_index import CardIndex
 
 
 class CardGenericTypeParam(CardSearchParameter):
@@ -48,25 +54,31 @@ class CardGenericTypeParam(CardSearchParameter):
 
         return super().matches_param_args(param_args)
 
+    @classmethod
+    def get_registry_keys(cls) -> List[Tuple[str, Optional[str]]]:
+        return super().get_registry_keys() + [("is", "token")]
+
     def query(self, query_context: QueryContext) -> Q:
         """
         Gets the query object
         :return: The search Q object
         """
-        if self.operator == "=":
-            types = CardType.objects.filter(name__iexact=self.value)
-            subtypes = CardSubtype.objects.filter(name__iexact=self.value)
-            supertypes = CardSupertype.objects.filter(name__iexact=self.value)
-        else:
-            types = CardType.objects.filter(name__icontains=self.value)
-            subtypes = CardSubtype.objects.filter(name__icontains=self.value)
-            supertypes = CardSupertype.objects.filter(name__icontains=self.value)
-
-        face_filter = (
-            Q(faces__types__in=types)
-            | Q(faces__subtypes__in=subtypes)
-            | Q(faces__supertypes__in=supertypes)
-        )
+        reference_data = ReferenceData.get()
+        face_filter = Q()
+        for field_name, type_model in [
+            ("types", CardType),
+            ("subtypes", CardSubtype),
+            ("supertypes", CardSupertype),
+        ]:
+            type_ids = reference_data.get_type_ids(
+                type_model, self.value, exact=self.operator == "="
+            )
+            if type_ids:
+                face_filter |= Q(**{f"faces__{field_name}__in": type_ids})
+        if not face_filter:
+            # No types match (this is used instead of __in=[] so the query can still be
+            # turned into SQL)
+            face_filter = Q(pk__isnull=True)
         if query_context.search_mode == CardSearchContext.CARD:
             result = Q(
                 id__in=Card.objects.filter(face_filter).values_list("id", flat=True)
@@ -77,6 +89,22 @@ class CardGenericTypeParam(CardSearchParameter):
         result.negated = self.negated
         return result
 
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        return 0.05 if self.operator == "=" else 0.2
+
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        faces = ~index.all_faces()
+        for type_name, type_faces in index.type_faces.items():
+            if (
+                type_name == self.value
+                if self.operator == "="
+                else self.value in type_name
+            ):
+                faces[type_faces] = True
+
+        cards = index.faces_to_cards(faces)
+        return index.cards_to_faces(~cards if self.negated else cards)
+
     def get_pretty_str(self, query_context: QueryContext) -> str:
         """
         Returns a human-readable version of this parameter
@@ -4,6 +4,7 @@ The module for all search parameters
 
 from typing import List
 
+from sylvan_library.cardsearch.models import SUPER_SORT_KEY_FIELDS
 from sylvan_library.cardsearch.parameters.base_parameters import (
     CardSortParam,
     CardSearchContext,
@@ -230,6 +231,8 @@ class CardSuperKeySortParam(CardSortParam):
         return "sort by super key"
 
     def get_sort_keys(self, search_context: CardSearchContext) -> List[str]:
-        if search_context == CardSearchContext.CARD:
-            return ["search_metadata__super_sort_key"]
-        return ["card__search_metadata__super_sort_key"]
+        prefix = "" if search_context == CardSearchContext.CARD else "card__"
+        return [
+            f"{prefix}search_metadata__{field}"
+            for field in SUPER_SORT_KEY_FIELDS + ["super_sort_slug"]
+        ]
@@ -4,14 +4,22 @@ Module for the ParseSearch
 
 from typing import Optional
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
 from sylvan_library.cards.models.sets import Set
 from sylvan_library.cardsearch.base_search import BaseSearch
-from sylvan_library.cardsearch.parameters.base_parameters import CardSearchBranchNode
+from sylvan_library.cardsearch.parameters.base_parameters import (
+    CardSearchBranchNode,
+    QueryContext,
+)
 from sylvan_library.cardsearch.parameters.card_set_parameters import CardSetParam
 from sylvan_library.cardsearch.parser.base_parser import ParseError
-from sylvan_library.cardsearch.parser.query_parser import CardQueryParser
+from sylvan_library.cardsearch.parser.query_cache import (
+    normalise_query_string,
+    query_parse_cache,
+)
+from sylvan_library.cardsearch.result_cache import get_result_cache_key
 
 
 class ParseSearch(BaseSearch):
@@ -41,6 +49,18 @@ class ParseSearch(BaseSearch):
                     return child.set_obj
         return None
 
+    def get_result_cache_key(self, query_context: QueryContext) -> Optional[str]:
+        if not self.query_string or self.error_message:
+            return None
+        # Finding the key needs a query for the result versions, which isn't worth running
+        # if the results aren't cached
+        if not getattr(settings, "SEARCH_RESULT_CACHE_TIMEOUT", 0):
+            return None
+        user_id = (
+            query_context.user.id if self.root_parameter.is_user_specific() else None
+        )
+        return get_result_cache_key(normalise_query_string(self.query_string), user_id)
+
     def build_parameters(self) -> None:
         """
         Builds the root parameter object using the query string
@@ -48,9 +68,8 @@ class ParseSearch(BaseSearch):
         if not self.query_string:
             return
 
-        query_parser = CardQueryParser()
         try:
-            self.root_parameter = query_parser.parse(self.query_string)
+            self.root_parameter = query_parse_cache.parse(self.query_string)
             self.sort_params = self.root_parameter.get_sort_parameters()
         except (ParseError, ValueError) as error:
             self.error_message = str(error)
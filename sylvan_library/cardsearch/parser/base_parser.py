@@ -2,9 +2,10 @@
 Module for the base recursive descent parser
 """
 
+import dataclasses
 import re
 from abc import ABC
-from typing import List, Optional, Any, Dict, Tuple
+from typing import Dict, List, Optional, Any, Tuple, FrozenSet
 
 
 # https://www.booleanworld.com/building-recursive-descent-parsers-definitive-guide/
@@ -23,26 +24,52 @@ class ParseError(Exception):
         return f"{self.msg % self.args} at position {self.pos}"
 
 
+@dataclasses.dataclass(frozen=True)
+class Token:
+    """
+    A single token produced by the lexer
+    """
+
+    # The name of the group in the token pattern that matched the token
+    kind: str
+    # The text of the token
+    value: str
+    # The index of the first character of the token in the parsed text
+    pos: int
+
+
 class Parser(ABC):
     """
-    Generic recursive descent parser
+    Generic recursive descent parser.
+    The text is first split into tokens using a single compiled pattern, and the grammar
+    rules then consume those tokens in order
     """
 
+    # The pattern for every token in the language. Each alternative should be a named group,
+    # the name of which is used as the kind of the token
+    token_pattern: re.Pattern = re.compile(r"(?P<whitespace>\s+)")
+
+    # Kinds of tokens that are dropped from the token stream
+    ignored_tokens: FrozenSet[str] = frozenset(["whitespace"])
+
+    # How kinds of tokens are described in error messages (kinds without a description are
+    # described by their name)
+    token_descriptions: Dict[str, str] = {}
+
     def __init__(self) -> None:
-        self.cache: Dict[str, List[str]] = {}
         self.text: str = ""
-        self.pos: int = -1
-        self.len: int = 0
+        self.tokens: List[Token] = []
+        self.index: int = 0
 
     def parse(self, text: str) -> Any:
         """
         Parses the given text
-        :param text:
-        :return:
+        :param text: The text to parse
+        :return: The parse result
         """
         self.text = text
-        self.pos = -1
-        self.len = len(text) - 1
+        self.tokens = self.tokenize(text)
+        self.index = 0
         result = self.start()
         self.assert_end()
         return result
@@ -54,206 +81,101 @@ class Parser(ABC):
         """
         raise NotImplementedError(f"Please implement {type(self).__name__}.start")
 
-    def assert_end(self) -> None:
-        """
-        Ensures that the parser has completed parsing the text
-        """
-        if self.pos < self.len:
-            raise ParseError(
-                self.pos + 1,
-                "Expected end of string but got %s",
-                self.text[self.pos + 1],
-            )
-
-    def eat_whitespace(self) -> None:
+    def tokenize(self, text: str) -> List[Token]:
         """
-        Consumes whitespace without parsing any of them
+        Splits the given text into tokens
+        :param text: The text to split
+        :return: The tokens in the order that they appear in the text
         """
-        while self.pos < self.len and self.text[self.pos + 1] in " \f\v\r\t\n":
-            self.pos += 1
+        tokens: List[Token] = []
+        pos = 0
+        while pos < len(text):
+            match = self.token_pattern.match(text, pos)
+            if match is None or match.end() == pos:
+                raise ParseError(pos, "Unexpected character %s", text[pos])
+            if match.lastgroup not in self.ignored_tokens:
+                tokens.extend(self.get_tokens(match))
+            pos = match.end()
+        return tokens
 
-    def split_char_ranges(self, chars: str) -> List[str]:
+    def get_tokens(self, match: re.Match) -> List[Token]:
         """
-        Takes in a string and expands any char ranges (e.g. a-z becomes abcdef..)
-        :param chars: The chars the expand
-        :return: The string with any char ranges expanded
+        Converts a single match of the token pattern into tokens
+        :param match: The match of the token pattern
+        :return: The tokens for the match (by default a single token named after the group)
         """
-        try:
-            return self.cache[chars]
-        except KeyError:
-            pass
-
-        result: List[str] = []
-        index: int = 0
-        length: int = len(chars)
+        return [Token(kind=match.lastgroup, value=match.group(), pos=match.start())]
 
-        while index < length:
-            if index + 2 < length and chars[index + 1] == "-":
-                if chars[index] >= chars[index + 2]:
-                    raise ValueError("Bad character range")
-                result.append(chars[index : index + 3])
-                index += 3
-            else:
-                result.append(chars[index])
-                index += 1
-        self.cache[chars] = result
-        return result
-
-    def pattern(self, pattern: str) -> str:
+    def peek(self) -> Optional[Token]:
         """
-        Attempts to parse a single char
-        :param pattern: The list of potential characters to parse
-        :return: The character that was parsed
+        Gets the next token without consuming it
+        :return: The next token, or None if there are no tokens left
         """
-        if self.pos >= self.len:
-            raise ParseError(self.pos, "Expected %s but got end of string", pattern)
-
-        next_char = self.text[self.pos + 1]
-        if re.match(pattern, next_char):
-            self.pos += 1
-            return next_char
+        if self.index < len(self.tokens):
+            return self.tokens[self.index]
+        return None
 
-        raise ParseError(self.pos + 1, "Expected %s but got %s", pattern, next_char)
-
-    def char(self, chars: Optional[str] = None) -> str:
+    def unexpected_token_error(
+        self, expected: str, token: Optional[Token]
+    ) -> ParseError:
         """
-        Attempts to parse a single char
-        :param chars: The list of potential characters to parse
-        :return: The character that was parsed
+        Creates an error for when the next token isn't what the grammar expects
+        :param expected: A description of what was expected
+        :param token: The token that was found instead (or None at the end of the text)
+        :return: The error to raise
         """
-        if self.pos >= self.len:
-            raise ParseError(
-                self.pos,
-                "Expected %s but got end of string",
-                "character" if chars is None else f"[{chars}]",
+        if token is None:
+            return ParseError(
+                len(self.text), "Expected %s but got end of string", expected
             )
+        return ParseError(token.pos, "Expected %s but got %s", expected, token.value)
 
-        next_char = self.text[self.pos + 1]
-        if chars is None:
-            self.pos += 1
-            return next_char
-
-        for char_range in self.split_char_ranges(chars):
-            if len(char_range) == 1:
-                if next_char == char_range:
-                    self.pos += 1
-                    return next_char
-            elif char_range[0] <= next_char <= char_range[2]:
-                self.pos += 1
-                return next_char
-
-        raise ParseError(
-            self.pos + 1,
-            "Expected %s but got %s",
-            "character" if chars is None else f"[{chars}]",
-            next_char,
-        )
-
-    def keyword(self, *keywords: str) -> str:
+    def token(self, *kinds: str) -> Token:
         """
-        Attempts to parse a single keyword from the given list
-        :param keywords: The list of keywords to attempt
-        :return: The parsed keyword if successful
+        Consumes the next token if it is one of the given kinds
+        :param kinds: The allowable kinds of token
+        :return: The token that was consumed
         """
-        self.eat_whitespace()
-        if self.pos >= self.len:
-            raise ParseError(
-                self.pos + 1, "Expected %s but got end of string", ",".join(keywords)
+        token = self.peek()
+        if token is None or token.kind not in kinds:
+            raise self.unexpected_token_error(
+                ",".join(self.token_descriptions.get(kind, kind) for kind in kinds),
+                token,
             )
+        self.index += 1
+        return token
 
-        for keyword in keywords:
-            low = self.pos + 1
-            high = low + len(keyword)
-
-            if self.text[low:high].lower() == keyword.lower():
-                self.pos += len(keyword)
-                self.eat_whitespace()
-                return keyword
-
-        raise ParseError(
-            self.pos + 1,
-            "Expected %s but got %s",
-            ",".join(keywords),
-            self.text[self.pos + 1],
-        )
-
-    def match(self, *rules: str) -> Any:
+    def maybe_token(self, *kinds: str) -> Optional[Token]:
         """
-        Attempts to parse any of the given rules in roder
-        :param rules: Methods names on this object that should be attempted (in order)
-        :return: The parse result
+        Tries to consume the next token if it is one of the given kinds
+        :param kinds: The allowable kinds of token
+        :return: The token if it matched, otherwise None
         """
-        self.eat_whitespace()
-        last_error_pos: int = -1
-        last_exception: Optional[Exception] = None
-        last_error_rules: List[str] = []
-
-        for rule in rules:
-            initial_pos = self.pos
-            try:
-                result = getattr(self, rule)()
-                self.eat_whitespace()
-                return result
-            except ParseError as ex:
-                self.pos = initial_pos
-                if ex.pos > last_error_pos:
-                    last_exception = ex
-                    last_error_pos = ex.pos
-                    last_error_rules.clear()
-                    last_error_rules.append(rule)
-                elif ex.pos == last_error_pos:
-                    last_error_rules.append(rule)
-
-        if len(last_error_rules) == 1 and last_exception:
-            raise last_exception
-
-        raise ParseError(
-            last_error_pos,
-            "Expected %s but got %s",
-            ",".join(last_error_rules),
-            self.text[last_error_pos],
-        )
-
-    def maybe_char(self, chars: Optional[str] = None) -> Optional[str]:
-        """
-        Tries to get a single character from the given list of characters
-        :param chars: The allowable characters
-        :return: The character if it matched
-        """
-        try:
-            return self.char(chars)
-        except ParseError:
+        token = self.peek()
+        if token is None or token.kind not in kinds:
             return None
+        self.index += 1
+        return token
 
-    def maybe_pattern(self, pattern: str) -> Optional[str]:
-        """
-        Tries to get a pattern match
-        :param pattern: The allowable pattern
-        :return: The pattern if it matches
-        """
-        try:
-            return self.pattern(pattern)
-        except ParseError:
-            return None
-
-    def maybe_match(self, *rules: str) -> Optional[Any]:
+    def assert_end(self) -> None:
         """
-        Attempts to match any of the given parser methods (in order)
-        :param rules: The method rule names to try
-        :return: The parse result if successful, otherwise None
+        Ensures that the parser has consumed all of the tokens
         """
-        try:
-            return self.match(*rules)
-        except ParseError:
-            return None
+        token = self.peek()
+        if token is not None:
+            raise ParseError(
+                token.pos, "Expected end of string but got %s", self.text[token.pos]
+            )
 
-    def maybe_keyword(self, *keywords: str) -> Optional[Any]:
+    def maybe_match(self, rule: str) -> Optional[Any]:
         """
-        Attempts to match any of the given keywords
-        :param keywords: The keywords to try
+        Attempts to match the given rule, rewinding to the current token if it fails
+        :param rule: The name of the parser method to try
         :return: The parse result if successful, otherwise None
         """
+        initial_index = self.index
         try:
-            return self.keyword(*keywords)
+            return getattr(self, rule)()
         except ParseError:
+            self.index = initial_index
             return None
@@ -0,0 +1,129 @@
+"""
+Module for the lookup table of search parameter keywords
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Tuple, Type, Iterable
+
+from django.core.exceptions import ImproperlyConfigured
+
+from sylvan_library.cardsearch.parameters.base_parameters import (
+    CardSearchParameter,
+    ParameterArgs,
+)
+
+
+def has_value_predicate(parameter_type: Type[CardSearchParameter]) -> bool:
+    """
+    Returns whether the given parameter type looks at the value of a term (and not just the
+    keyword) when deciding whether it matches
+    :param parameter_type: The parameter type to check
+    :return: True if the parameter type overrides matches_param_args
+    """
+    return (
+        parameter_type.matches_param_args.__func__
+        is not CardSearchParameter.matches_param_args.__func__
+    )
+
+
+class ParameterRegistry:
+    """
+    A lookup table from the keyword (and for "is:" and "sort:" parameters, the value) of a search
+    term to the parameter type that should handle it.
+    Conflicting registrations are rejected when the registry is built, instead of when a
+    matching query is made.
+    """
+
+    def __init__(self, parameter_types: Iterable[Type[CardSearchParameter]]) -> None:
+        # Parameters that are only used with a certain value, for example "is:commander"
+        self.value_parameters: Dict[Tuple[str, str], Type[CardSearchParameter]] = {}
+        # Parameters that can be used with any value, for example "o:flying"
+        self.keyword_parameters: Dict[str, List[Type[CardSearchParameter]]] = (
+            defaultdict(list)
+        )
+
+        for parameter_type in parameter_types:
+            for keyword, value in parameter_type.get_registry_keys():
+                self.register(parameter_type, keyword, value)
+
+        self.check_keyword_conflicts()
+
+    def register(
+        self,
+        parameter_type: Type[CardSearchParameter],
+        keyword: str,
+        value: str | None,
+    ) -> None:
+        """
+        Adds a single keyword (and optional value) for the given parameter type
+        :param parameter_type: The parameter type to register
+        :param keyword: The keyword of the parameter
+        :param value: The value that the parameter should be used for (or None for any value)
+        :raises ImproperlyConfigured: If another parameter is registered for the same value
+        """
+        keyword = keyword.lower()
+        if value is None:
+            if parameter_type not in self.keyword_parameters[keyword]:
+                self.keyword_parameters[keyword].append(parameter_type)
+            return
+
+        key = (keyword, value.lower())
+        existing_type = self.value_parameters.get(key)
+        if existing_type is not None and existing_type is not parameter_type:
+            raise ImproperlyConfigured(
+                f"Both {existing_type.__name__} and {parameter_type.__name__} "
+                f'are registered for "{keyword}:{value}"'
+            )
+        self.value_parameters[key] = parameter_type
+
+    def check_keyword_conflicts(self) -> None:
+        """
+        Ensures that any keyword that is shared by multiple parameters can be resolved by
+        looking at the value of the term
+        :raises ImproperlyConfigured: If two parameters share a keyword and one of them would
+        match any value
+        """
+        for keyword, parameter_types in self.keyword_parameters.items():
+            if len(parameter_types) < 2:
+                continue
+            ambiguous_types = [
+                parameter_type
+                for parameter_type in parameter_types
+                if not has_value_predicate(parameter_type)
+            ]
+            if ambiguous_types:
+                raise ImproperlyConfigured(
+                    f'The keyword "{keyword}" is registered for '
+                    f"{', '.join(t.__name__ for t in parameter_types)} "
+                    f"but {', '.join(t.__name__ for t in ambiguous_types)} "
+                    "would match any value"
+                )
+
+    def get_parameter_type(
+        self, param_args: ParameterArgs
+    ) -> Type[CardSearchParameter]:
+        """
+        Gets the parameter type that should be used for the given arguments
+        :param param_args: The keyword, operator and value of the term
+        :return: The matching parameter type
+        :raises ValueError: If no parameter (or more than one) matches the arguments
+        """
+        keyword = param_args.keyword.lower()
+        value_parameter = self.value_parameters.get((keyword, param_args.value.lower()))
+        if value_parameter is not None:
+            return value_parameter
+
+        matching_parameters = [
+            parameter_type
+            for parameter_type in self.keyword_parameters.get(keyword, [])
+            if parameter_type.matches_param_args(param_args)
+        ]
+        if not matching_parameters:
+            raise ValueError(f'Unknown keyword "{param_args.keyword}"')
+
+        if len(matching_parameters) > 1:
+            raise ValueError(
+                f'Too many parameters match the keyword "{param_args.keyword}" '
+                f"({'.'.join(param.get_parameter_name() for param in matching_parameters)}"
+            )
+        return matching_parameters[0]
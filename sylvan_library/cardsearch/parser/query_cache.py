@@ -0,0 +1,131 @@
+"""
+Module for caching the parameter trees produced by the card query parser
+"""
+
+import copy
+import dataclasses
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from sylvan_library.cardsearch.parameters.base_parameters import CardSearchTreeNode
+from sylvan_library.cardsearch.parser.query_parser import CardQueryParser
+
+RE_WHITESPACE = re.compile(r"\s+")
+
+# Whitespace inside quoted strings and regexes is significant, so queries containing any
+# of these characters are only stripped and not collapsed
+SIGNIFICANT_WHITESPACE_CHARS = frozenset("\"'/")
+
+
+def normalise_query_string(query_string: str) -> str:
+    """
+    Converts a query string into the form used as the key of the parse cache.
+    Two queries with the same normalised string will always produce the same parameter tree
+    :param query_string: The query string to normalise
+    :return: The normalised query string
+    """
+    query_string = query_string.strip()
+    if SIGNIFICANT_WHITESPACE_CHARS.isdisjoint(query_string):
+        query_string = RE_WHITESPACE.sub(" ", query_string)
+    return query_string
+
+
+@dataclasses.dataclass
+class QueryParseCacheInfo:
+    """
+    Statistics about the usage of a QueryParseCache
+    """
+
+    hits: int
+    misses: int
+    max_size: int
+    current_size: int
+
+
+class QueryParseCache:
+    """
+    A least-recently-used cache of parsed query strings.
+    Parameter trees are mutated by validate(), so the cache only ever hands out copies of the
+    tree that it stores
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self._trees: OrderedDict[str, CardSearchTreeNode] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse(self, query_string: str) -> CardSearchTreeNode:
+        """
+        Parses the given query string, using the cached result if one exists
+        :param query_string: The query string to parse
+        :return: A parameter tree that is safe for the caller to modify
+        :raises ParseError: If the query string couldn't be parsed
+        :raises ValueError: If the query string contains an unknown parameter
+        """
+        key = normalise_query_string(query_string)
+        tree = self.get(key)
+        if tree is not None:
+            return tree
+
+        # Parsing errors are not cached, and will be raised again on the next attempt
+        tree = CardQueryParser().parse(key)
+        self.put(key, copy.deepcopy(tree))
+        return tree
+
+    def get(self, key: str) -> Optional[CardSearchTreeNode]:
+        """
+        Gets a copy of the parameter tree for the given normalised query string
+        :param key: The normalised query string
+        :return: A copy of the tree if it is in the cache, otherwise None
+        """
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is None:
+                self.misses += 1
+                return None
+            self._trees.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(tree)
+
+    def put(self, key: str, tree: CardSearchTreeNode) -> None:
+        """
+        Stores the given parameter tree, evicting the least recently used tree if the cache
+        is full. The cache takes ownership of the tree, so it shouldn't be modified afterwards
+        :param key: The normalised query string
+        :param tree: The parsed (and not yet validated) parameter tree
+        """
+        with self._lock:
+            self._trees[key] = tree
+            self._trees.move_to_end(key)
+            while len(self._trees) > self.max_size:
+                self._trees.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Removes all trees from the cache and resets the hit and miss counters
+        """
+        with self._lock:
+            self._trees.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self) -> QueryParseCacheInfo:
+        """
+        Gets the usage statistics of this cache
+        :return: The cache statistics
+        """
+        with self._lock:
+            return QueryParseCacheInfo(
+                hits=self.hits,
+                misses=self.misses,
+                max_size=self.max_size,
+                current_size=len(self._trees),
+            )
+
+
+# pylint: disable=invalid-name
+query_parse_cache = QueryParseCache()
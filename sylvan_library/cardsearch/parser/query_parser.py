@@ -3,7 +3,8 @@ Module for the card query recursive descent parser
 """
 
 import codecs
-from typing import Union, Optional, Callable, List, Type
+import re
+from typing import Optional, Callable, List, Type
 
 from sylvan_library.cardsearch.parameters.base_parameters import (
     CardSearchTreeNode,
@@ -79,7 +80,8 @@ from sylvan_library.cardsearch.parameters.sort_parameters import (
     CardReleaseDateSortParam,
     CardSuperKeySortParam,
 )
-from sylvan_library.cardsearch.parser.base_parser import Parser, ParseError
+from sylvan_library.cardsearch.parser.base_parser import Parser, ParseError, Token
+from sylvan_library.cardsearch.parser.parameter_registry import ParameterRegistry
 
 SEARCH_PARAMETERS: List[Type[CardSearchParameter]] = [
     CardArtistParam,
@@ -131,6 +133,37 @@ SEARCH_PARAMETERS: List[Type[CardSearchParameter]] = [
     CardWatermarkParam,
 ]
 
+# Built once at import so that conflicting keywords are found at startup
+PARAMETER_REGISTRY = ParameterRegistry(SEARCH_PARAMETERS)
+
+# The alternatives are tried in order, so a parameter with a keyword and operator is
+# preferred over a plain name, and a quoted or regex value is preferred over an unquoted one.
+# Only the first of a run of dashes negates the parameter, the rest are part of a name (so
+# "--foo" is a negated search for the name "-foo")
+QUERY_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<whitespace>\s+)
+    | (?P<or>(?i:or))(?![^\s()])
+    | (?P<and>(?i:and))(?![^\s()])
+    | (?P<negate>(?<!-)-)
+    | (?P<open_paren>\()
+    | (?P<close_paren>\))
+    | (?P<param_type>[a-zA-Z0-9]+) \s* (?P<operator>[:<>=]+) \s*
+      (?:
+          (?P<and_word_group>\([^)]*\))
+        | (?P<or_word_group>\[[^\]]*\])
+        | (?P<quoted_string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+        | (?P<regex_string>/(?:[^/\\]|\\.)*/)
+        | (?P<unquoted_complex>[^\s()]+)
+      )
+    | (?P<quoted_name>!?(?:"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'))
+    | (?P<unquoted_name>(?<=-)-[^\s()]*|[^\s()]+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+RE_ESCAPED_CHAR = re.compile(r"\\(.)", re.DOTALL)
+
 
 def param_parser(
     name: str, keywords: List[str], operators: List[str]
@@ -162,6 +195,30 @@ class CardQueryParser(Parser):
     Parser for parsing a scryfall-style card qquery
     """
 
+    token_pattern = QUERY_TOKEN_PATTERN
+    token_descriptions = {
+        "or": "or",
+        "and": "and",
+        "negate": "-",
+        "open_paren": "(",
+        "close_paren": ")",
+    }
+
+    def get_tokens(self, match: re.Match) -> List[Token]:
+        """
+        Splits a parameter match into its type, operator and value tokens
+        :param match: The match of the token pattern
+        :return: The tokens for the match
+        """
+        if match.group("param_type") is None:
+            return super().get_tokens(match)
+
+        # The value group is always the last one to be closed in a parameter match
+        return [
+            Token(kind=kind, value=match.group(kind), pos=match.start(kind))
+            for kind in ("param_type", "operator", match.lastgroup)
+        ]
+
     def start(self) -> CardSearchTreeNode:
         """
         Starts matching with the text
@@ -175,14 +232,10 @@ class CardQueryParser(Parser):
         that's all this group contains
         :return: The OR group
         """
-        subgroup = self.match("and_group")
+        subgroup = self.and_group()
         or_group = None
-        while True:
-            or_keyword = self.maybe_keyword("or")
-            if or_keyword is None:
-                break
-
-            param_group = self.match("and_group")
+        while self.maybe_token("or"):
+            param_group = self.and_group()
             if or_group is None:
                 or_group = CardSearchOr()
                 or_group.add_parameter(subgroup)
@@ -195,10 +248,10 @@ class CardQueryParser(Parser):
         Attempts to parse a list of parameters separated by "and"s
         :return: The CardSearchAnd group, or the single parameter if there is only one
         """
-        result = self.match("parameter_group")
+        result = self.parameter_group()
         and_group = None
         while True:
-            self.maybe_keyword("and")
+            self.maybe_token("and")
             param_group = self.maybe_match("parameter_group")
             if not param_group:
                 break
@@ -210,110 +263,117 @@ class CardQueryParser(Parser):
 
         return and_group or result
 
-    def parameter_group(self) -> Optional[CardSearchTreeNode]:
+    def parameter_group(self) -> CardSearchTreeNode:
         """
         Attempts to parse a parameter group (type + operator + value)
         :return: The parsed parameter
         """
-        is_negated = self.maybe_char("-") is not None
-        if self.maybe_keyword("("):
-            or_group = self.match("or_group")
-            self.keyword(")")
+        is_negated = self.maybe_token("negate") is not None
+        if self.maybe_token("open_paren"):
+            or_group = self.or_group()
+            self.token("close_paren")
             or_group.negated = is_negated
             return or_group
 
-        parameter = self.match(
-            "simple_word_group_parameter",
-            "quoted_name_parameter",
-            "regex_parameter",
-            "normal_parameter",
-            "unquoted_name_parameter",
-        )
-        if parameter is None:
-            return None
+        token = self.peek()
+        if token is not None and token.kind == "param_type":
+            parameter = self.keyword_parameter()
+        elif token is not None and token.kind == "quoted_name":
+            parameter = self.quoted_name_parameter()
+        elif token is not None and token.kind == "unquoted_name":
+            parameter = self.unquoted_name_parameter()
+        elif token is None:
+            raise ParseError(
+                max(len(self.text) - 1, 0),
+                "Expected %s but got end of string",
+                "a parameter",
+            )
+        elif token.kind in ("or", "and"):
+            # The error is at the start of whatever follows the keyword
+            next_token = self.tokens[self.index + 1 : self.index + 2]
+            raise ParseError(
+                next_token[0].pos if next_token else len(self.text),
+                'Expected a parameter but got "%s" instead',
+                token.value,
+            )
+        else:
+            raise self.unexpected_token_error("a parameter", token)
+
         if is_negated:
             parameter.negated = not parameter.negated
         return parameter
 
-    def param_type(self) -> str:
+    def keyword_parameter(self) -> CardSearchTreeNode:
         """
-        Parses the type of a parameter
-        :return: The parameter type
+        Attempts to parse a parameter with a type, operator and value
+        :return: The parsed parameter
         """
-        acceptable_param_types = "a-zA-Z0-9"
-        chars = [self.char(acceptable_param_types)]
-
-        while True:
-            char = self.maybe_char(acceptable_param_types)
-            if char is None:
-                break
-            chars.append(char)
+        parameter_type = self.token("param_type").value.lower()
+        operator = self.token("operator").value
+        value = self.token(
+            "and_word_group",
+            "or_word_group",
+            "quoted_string",
+            "regex_string",
+            "unquoted_complex",
+        )
+        if value.kind in ("and_word_group", "or_word_group"):
+            return self.simple_word_group_parameter(parameter_type, operator, value)
 
-        return "".join(chars).rstrip(" \t").lower()
+        if value.kind == "regex_string":
+            return self.parse_param(
+                parameter_type, operator, self.string_contents(value), is_regex=True
+            )
 
-    def normal_parameter(self) -> CardSearchTreeNode:
-        """
-        Attempts to parse a parameter with a type, operator and value
-        :return: THe parsed parameter
-        """
-        parameter_type = self.match("param_type")
-        operator = self.match("operator")
-        parameter_value = self.match("quoted_string", "unquoted_complex")
-        return self.parse_param(parameter_type, operator, parameter_value)
+        if value.kind == "quoted_string":
+            return self.parse_param(
+                parameter_type, operator, self.string_contents(value)
+            )
 
-    def regex_parameter(self) -> CardSearchTreeNode:
-        """
-        Attempts to parse a parameter with a type, operator and value
-        :return: THe parsed parameter
-        """
-        parameter_type = self.match("param_type")
-        operator = self.match("operator")
-        parameter_value = self.match("regex_string")
-        return self.parse_param(
-            parameter_type, operator, parameter_value, is_regex=True
-        )
+        return self.parse_param(parameter_type, operator, value.value)
 
     def quoted_name_parameter(self) -> CardSearchTreeNode:
         """
         Attempts to parse a parameter that is just a quoted string
         :return: The name parameter
         """
-        parameter_value = self.match("quoted_string")
-        return self.parse_param("name", ":", parameter_value)
+        token = self.token("quoted_name")
+        if token.value.startswith("!"):
+            # An exact name match, for example !"Lightning Bolt"
+            token = Token(kind=token.kind, value=token.value[1:], pos=token.pos + 1)
+            return self.parse_param("name", ":", "!" + self.string_contents(token))
+        return self.parse_param("name", ":", self.string_contents(token))
 
-    def simple_word_group_parameter(self) -> CardSearchTreeNode:
+    def simple_word_group_parameter(
+        self, parameter_type: str, operator: str, word_group: Token
+    ) -> CardSearchTreeNode:
         """
-        Attempts to parse a parameter that has a list of words inside parentheses
-        For example "oracle:(foo bar)"
-        :return: An CardSearchAnd containing the parameters. All the parameters will be of
-        the type specified before the colon at the start of the string
+        Creates a parameter for a list of words inside parentheses or square brackets
+        For example "oracle:(foo bar)" or "oracle:[foo bar]"
+        :param parameter_type: The type of the parameter before the operator
+        :param operator: The parameter operator
+        :param word_group: The token for the bracketed list of words
+        :return: An CardSearchAnd (or CardSearchOr for square brackets) containing the
+        parameters. All the parameters will be of the type specified before the colon
+        at the start of the string
         """
-        parameter_type = self.match("param_type")
-        operator = self.match("operator")
-        param_values = self.maybe_match("or_word_group")
-        if param_values:
+        if word_group.kind == "or_word_group":
             base_param = CardSearchOr()
         else:
-            param_values = self.match("and_word_group")
             base_param = CardSearchAnd()
 
-        for value in param_values:
-            param = self.parse_param(parameter_type, operator, value)
-            base_param.add_parameter(param)
+        for value in word_group.value[1:-1].split(" "):
+            if value:
+                param = self.parse_param(parameter_type, operator, value)
+                base_param.add_parameter(param)
         return base_param
 
-    def unquoted_name_parameter(self) -> Optional[CardSearchTreeNode]:
+    def unquoted_name_parameter(self) -> CardSearchTreeNode:
         """
         Attempts to parse a parameter that is just an unquoted string
         :return: The name parameter
         """
-        parameter_value = self.match("unquoted_complex")
-        if parameter_value and parameter_value.lower() in ("or", "and"):
-            raise ParseError(
-                self.pos + 1,
-                'Expected a parameter but got "%s" instead',
-                parameter_value,
-            )
+        parameter_value = self.token("unquoted_name").value
         return self.parse_param("name", ":", parameter_value)
 
     def parse_param(
@@ -338,136 +398,20 @@ class CardQueryParser(Parser):
             is_regex=is_regex,
         )
 
-        matching_parameters = [
-            param for param in SEARCH_PARAMETERS if param.matches_param_args(param_args)
-        ]
-        if not matching_parameters:
-            raise ValueError(f'Unknown keyword "{keyword}"')
-
-        if len(matching_parameters) > 1:
-            raise ValueError(
-                f'Too many parameters match the keyword "{keyword}" '
-                f"({'.'.join(param.get_parameter_name() for param in matching_parameters)}"
-            )
-        parameter_type = matching_parameters[0]
+        parameter_type = PARAMETER_REGISTRY.get_parameter_type(param_args)
 
         param = parameter_type(param_args)
         return param
 
-    def operator(self):
-        """
-        Attempts to parse a parameter operator
-        :return: The parameter operator
-        """
-        acceptable_operators = ":<>="
-        chars = [self.char(acceptable_operators)]
-        while True:
-            char = self.maybe_char(acceptable_operators)
-            if char is None:
-                break
-            chars.append(char)
-
-        return "".join(chars).rstrip(" \t")
-
-    def unquoted(self) -> Union[str, float]:
-        """
-        Attempts to parse an unquoted string (basically any characters without spaces)
-        :return: The contents of the unquoted string
-        """
-        acceptable_chars = "0-9A-Za-z!$%&*+.,/;<=>?^_`|~{}[]/:'\\-"
-        chars = [self.char(acceptable_chars)]
-
-        while True:
-            char = self.maybe_char(acceptable_chars)
-            if char is None:
-                break
-            chars.append(char)
-
-        return "".join(chars).rstrip(" \t")
-
-    def unquoted_complex(self) -> Union[str, float]:
-        """
-        Parses an unquoted series of characters
-        :return: The unquoted complex string
-        """
-        pattern = r"[^\s()]"
-        chars = [self.pattern(pattern)]
-        while True:
-            char = self.maybe_pattern(pattern)
-            if char is None:
-                break
-            chars.append(char)
-
-        return "".join(chars).rstrip(" \t")
-
-    def quoted_string(self) -> str:
+    @staticmethod
+    def string_contents(token: Token) -> str:
         """
-        Attempts to parse a double-quoted string
-        Spaces are allowed inside the string
-        :return: The contents of the double-quoted string (including the quotes)
+        Gets the contents of a quoted or regex string token, with any escaped characters
+        interpreted
+        :param token: The string token (including the quotes)
+        :return: The contents of the string
         """
-        quote = self.char("\"'")
-        return self.generic_string(quote)
-
-    def regex_string(self) -> str:
-        """
-        Attempts to parse a double-quoted string
-        Spaces are allowed inside the string
-        :return: The contents of the double-quoted string (including the quotes)
-        """
-        quote = self.char("/")
-        return self.generic_string(quote)
-
-    def generic_string(self, quote: str):
-        chars = []
-        while True:
-            char = self.char()
-            if char == "\\":
-                char = self.char()
-                interpreted_char = codecs.decode("\\" + char, "unicode_escape")
-                chars.append(interpreted_char)
-                continue
-            if char == quote:
-                break
-
-            chars.append(char)
-
-        return "".join(chars)
-
-    def and_word_group(self) -> List[str]:
-        """
-        Attempts to parse a list of words in parentheses, for example "(foo bar)"
-        :return: The words inside the parentheses
-        """
-        return self.word_group("(", ")")
-
-    def or_word_group(self) -> List[str]:
-        """
-        Attempts to parse a list of words in parentheses, for example "(foo bar)"
-        :return: The words inside the parentheses
-        """
-        return self.word_group("[", "]")
-
-    def word_group(self, opening_bracket: str, closing_bracket: str) -> List[str]:
-        """
-
-        :param opening_bracket:
-        :param closing_bracket:
-        :return:
-        """
-        assert len(opening_bracket) == 1
-        assert len(closing_bracket) == 1
-        self.char(opening_bracket)
-        chars: List[str] = []
-        words: List[str] = []
-        while True:
-            char = self.char()
-            if char in (" ", closing_bracket):
-                if chars:
-                    words.append("".join(chars))
-                    chars = []
-                if char == closing_bracket:
-                    break
-            else:
-                chars.append(char)
-        return words
+        return RE_ESCAPED_CHAR.sub(
+            lambda match: codecs.decode("\\" + match.group(1), "unicode_escape"),
+            token.value[1:-1],
+        )
@@ -0,0 +1,271 @@
+"""
+Module for optimising parameter trees before they are converted into queries
+
+The optimiser takes a validated tree and returns an equivalent tree that is cheaper to query:
+ - "and" and "or" nodes nested directly under the same kind of node are flattened into it
+ - Parameters under an "or" node that check the same field for equality are merged into a
+   single __in lookup (for example "s:dom or s:war")
+ - Parameters under an "and" node that need a single valued field to have two different
+   values (for example "cmc=2 cmc=3") can't match anything, so the "and" node is replaced with
+   a node that doesn't match any cards, which is then hoisted up through its parents
+ - The children of each "and" node are ordered by their estimated selectivity, so that the
+   conditions that remove the most rows come first
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from django.db.models.query import Q
+
+from sylvan_library.cards.models.card import Card, CardPrinting
+from sylvan_library.cardsearch.pagination import is_single_valued_path
+from sylvan_library.cardsearch.parameters.base_parameters import (
+    CardSearchAnd,
+    CardSearchBranchNode,
+    CardSearchContext,
+    CardSearchOr,
+    CardSearchTreeNode,
+    QueryContext,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from sylvan_library.cardsearch.card_index import CardIndex
+
+
+class CardSearchNoMatch(CardSearchTreeNode):
+    """
+    A node that doesn't match any cards (or matches every card when negated)
+    This replaces any part of a search that can never match anything
+    """
+
+    def query(self, query_context: QueryContext) -> Q:
+        # The primary key is never null, but unlike pk__in=[] this can still be turned into SQL
+        query = Q(pk__isnull=True)
+        return ~query if self.negated else query
+
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        mask = index.all_faces()
+        return mask if self.negated else ~mask
+
+    def get_default_search_context(self) -> CardSearchContext:
+        return CardSearchContext.CARD
+
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        return 0.0
+
+    def get_pretty_str(self, query_context: QueryContext) -> Optional[str]:
+        return "any card" if self.negated else "no cards"
+
+
+class CardSearchAnyOf(CardSearchTreeNode):
+    """
+    A node that matches the cards where a field is equal to any of a list of values
+    This replaces the children of an "or" node that each check the same field for equality
+    """
+
+    def __init__(
+        self,
+        child_parameters: List[CardSearchTreeNode],
+        lookup: str,
+        values: List[Any],
+        negated: bool = False,
+    ):
+        super().__init__(negated)
+        self.child_parameters = child_parameters
+        self.lookup = lookup
+        self.values = values
+
+    def query(self, query_context: QueryContext) -> Q:
+        query = Q(**{f"{self.lookup}__in": self.values})
+        return ~query if self.negated else query
+
+    def evaluate_mask(self, index: "CardIndex") -> Optional["np.ndarray"]:
+        mask = ~index.all_faces()
+        for child in self.child_parameters:
+            child_mask = child.evaluate_mask(index)
+            if child_mask is None:
+                return None
+            mask |= child_mask
+        return index.negate(mask) if self.negated else mask
+
+    def get_default_search_context(self) -> CardSearchContext:
+        return self.child_parameters[0].get_default_search_context()
+
+    def get_estimated_selectivity(self, query_context: QueryContext) -> float:
+        return min(
+            1.0,
+            sum(
+                child.get_selectivity(query_context) for child in self.child_parameters
+            ),
+        )
+
+    def get_pretty_str(self, query_context: QueryContext) -> Optional[str]:
+        return " or ".join(
+            child.get_pretty_str(query_context) for child in self.child_parameters
+        )
+
+
+def optimise_tree(
+    root_parameter: CardSearchTreeNode, query_context: QueryContext
+) -> CardSearchTreeNode:
+    """
+    Optimises the given parameter tree. The tree isn't changed, but the new tree can share
+    parameters with it
+    :param root_parameter: The root node of the validated parameter tree
+    :param query_context: The context of the search
+    :return: The root node of the optimised tree
+    """
+    return optimise_node(root_parameter, query_context)
+
+
+def optimise_node(
+    node: CardSearchTreeNode, query_context: QueryContext
+) -> CardSearchTreeNode:
+    """
+    Optimises the given node and all of its children
+    :param node: The node to optimise
+    :param query_context: The context of the search
+    :return: The optimised node
+    """
+    if not isinstance(node, CardSearchBranchNode) or not node.child_parameters:
+        return node
+
+    children: List[CardSearchTreeNode] = []
+    for child in node.child_parameters:
+        child = optimise_node(child, query_context)
+        if type(child) is type(node) and not child.negated:
+            children.extend(child.child_parameters)
+        else:
+            children.append(child)
+
+    if isinstance(node, CardSearchOr):
+        return optimise_or(children, node.negated, query_context)
+    return optimise_and(children, node.negated, query_context)
+
+
+def optimise_and(
+    children: List[CardSearchTreeNode], negated: bool, query_context: QueryContext
+) -> CardSearchTreeNode:
+    """
+    Builds an optimised "and" node
+    :param children: The optimised children of the node
+    :param negated: Whether the node is negated
+    :param query_context: The context of the search
+    :return: The optimised node
+    """
+    if any(is_no_match(child) for child in children):
+        return CardSearchNoMatch(negated=negated)
+    children = [child for child in children if not is_any_match(child)]
+    if not children:
+        return CardSearchNoMatch(negated=not negated)
+
+    model = (
+        Card if query_context.search_mode == CardSearchContext.CARD else CardPrinting
+    )
+    lookup_values: Dict[str, List[Any]] = {}
+    kept_children = []
+    for child in children:
+        lookup = get_equality_lookup(child, query_context)
+        if lookup:
+            path, value = lookup
+            values = lookup_values.setdefault(path, [])
+            if value in values:
+                continue
+            if values and is_single_valued_path(model, path):
+                return CardSearchNoMatch(negated=negated)
+            values.append(value)
+        kept_children.append(child)
+
+    kept_children.sort(key=lambda child: child.get_selectivity(query_context))
+    return build_branch(CardSearchAnd(negated=negated), kept_children)
+
+
+def optimise_or(
+    children: List[CardSearchTreeNode], negated: bool, query_context: QueryContext
+) -> CardSearchTreeNode:
+    """
+    Builds an optimised "or" node
+    :param children: The optimised children of the node
+    :param negated: Whether the node is negated
+    :param query_context: The context of the search
+    :return: The optimised node
+    """
+    if any(is_any_match(child) for child in children):
+        return CardSearchNoMatch(negated=not negated)
+    children = [child for child in children if not is_no_match(child)]
+    if not children:
+        return CardSearchNoMatch(negated=negated)
+
+    lookup_children: Dict[str, List[Tuple[CardSearchTreeNode, Any]]] = {}
+    for child in children:
+        lookup = get_equality_lookup(child, query_context)
+        if lookup:
+            path, value = lookup
+            lookup_children.setdefault(path, []).append((child, value))
+
+    merged_children = []
+    for child in children:
+        lookup = get_equality_lookup(child, query_context)
+        if not lookup or len(lookup_children[lookup[0]]) == 1:
+            merged_children.append(child)
+            continue
+
+        path = lookup[0]
+        group = lookup_children[path]
+        if child is not group[0][0]:
+            # Already merged into the first child of the group
+            continue
+        values = []
+        for _, value in group:
+            if value not in values:
+                values.append(value)
+        merged_children.append(
+            CardSearchAnyOf([param for param, _ in group], lookup=path, values=values)
+        )
+
+    return build_branch(CardSearchOr(negated=negated), merged_children)
+
+
+def build_branch(
+    node: CardSearchBranchNode, children: List[CardSearchTreeNode]
+) -> CardSearchTreeNode:
+    """
+    Adds the given children to a branch node
+    :param node: The new branch node
+    :param children: The children of the node
+    :return: The branch node, or its only child if it has one child and isn't negated
+    """
+    if len(children) == 1 and not node.negated:
+        return children[0]
+    for child in children:
+        node.add_parameter(child)
+    return node
+
+
+def get_equality_lookup(
+    node: CardSearchTreeNode, query_context: QueryContext
+) -> Optional[Tuple[str, Any]]:
+    """
+    Gets the equality lookup of a node, if it has one and isn't negated
+    :param node: The node
+    :param query_context: The context of the search
+    :return: The lookup path and value, or None if the node can't be merged
+    """
+    if node.negated:
+        return None
+    return node.get_equality_lookup(query_context)
+
+
+def is_no_match(node: CardSearchTreeNode) -> bool:
+    """
+    Returns whether the given node can never match any cards
+    """
+    return isinstance(node, CardSearchNoMatch) and not node.negated
+
+
+def is_any_match(node: CardSearchTreeNode) -> bool:
+    """
+    Returns whether the given node always matches every card
+    """
+    return isinstance(node, CardSearchNoMatch) and node.negated
@@ -0,0 +1,236 @@
+"""
+Module for the reference data cache, which holds the small lookup tables that search
+parameters are validated against (sets, blocks, formats, rarities and card types)
+
+The tables are loaded once per process, so that validating a search doesn't need to query
+them. Like the card index, the cache is rebuilt when it is invalidated or when it gets older
+than SEARCH_REFERENCE_DATA_MAX_AGE seconds. It is invalidated whenever one of the models is
+saved or deleted, and after apply_import (which can bulk update them without any signals)
+"""
+
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Type
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+
+from sylvan_library.cards.models.card import CardSubtype, CardSupertype, CardType
+from sylvan_library.cards.models.rarity import Rarity
+from sylvan_library.cards.models.sets import Block, Format, Set
+
+logger = logging.getLogger("django")
+
+REFERENCE_DATA_VERSION_CACHE_KEY = "cardsearch:reference_data:version"
+
+# The models that are cached
+REFERENCE_MODELS: List[Type[Model]] = [
+    Set,
+    Block,
+    Format,
+    Rarity,
+    CardType,
+    CardSubtype,
+    CardSupertype,
+]
+
+
+class ReferenceData:
+    """
+    A snapshot of the reference data tables
+    """
+
+    _current: Optional["ReferenceData"] = None
+    _lock = threading.Lock()
+    # The reference data that is pinned to the current thread (see pin())
+    _pinned = threading.local()
+
+    def __init__(self, version: str) -> None:
+        self.version = version
+        self.built_at = time.monotonic()
+        self.sets: List[Set] = []
+        self.blocks: List[Block] = []
+        self.formats: List[Format] = []
+        self.rarities: List[Rarity] = []
+        # The lowercase names of each type model, by the ID of the type
+        self.type_names: Dict[Type[Model], Dict[int, str]] = {}
+
+    @classmethod
+    def get(cls) -> "ReferenceData":
+        """
+        Gets the current reference data, loading it if it hasn't been loaded yet or has been
+        invalidated
+        :return: The reference data
+        """
+        pinned = getattr(cls._pinned, "reference_data", None)
+        if pinned is not None:
+            return pinned
+
+        version = cache.get(REFERENCE_DATA_VERSION_CACHE_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            cache.add(REFERENCE_DATA_VERSION_CACHE_KEY, version, None)
+            version = cache.get(REFERENCE_DATA_VERSION_CACHE_KEY, version)
+
+        with cls._lock:
+            current = cls._current
+            max_age = getattr(settings, "SEARCH_REFERENCE_DATA_MAX_AGE", 0)
+            if (
+                current is None
+                or current.version != version
+                or (max_age and time.monotonic() - current.built_at > max_age)
+            ):
+                current = cls.build(version)
+                cls._current = current
+        return current
+
+    @classmethod
+    @contextmanager
+    def pin(cls) -> Iterator["ReferenceData"]:
+        """
+        Uses the same reference data for everything inside the context on this thread,
+        without checking whether it has been invalidated each time it is used
+        :return: The pinned reference data
+        """
+        previous = getattr(cls._pinned, "reference_data", None)
+        cls._pinned.reference_data = previous or cls.get()
+        try:
+            yield cls._pinned.reference_data
+        finally:
+            cls._pinned.reference_data = previous
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """
+        Marks the current reference data as out of date, so that it will be reloaded the next
+        time it is used
+        """
+        cache.set(REFERENCE_DATA_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        with cls._lock:
+            cls._current = None
+
+    @classmethod
+    def build(cls, version: str) -> "ReferenceData":
+        """
+        Loads the reference data from the database
+        :param version: The version of the data
+        :return: The new reference data
+        """
+        start = time.perf_counter()
+        reference_data = cls(version)
+        reference_data.sets = list(Set.objects.select_related("block").order_by("id"))
+        reference_data.blocks = list(Block.objects.order_by("id"))
+        reference_data.formats = list(Format.objects.order_by("id"))
+        reference_data.rarities = list(Rarity.objects.order_by("id"))
+        for type_model in (CardType, CardSubtype, CardSupertype):
+            reference_data.type_names[type_model] = {
+                type_id: name.lower()
+                for type_id, name in type_model.objects.values_list("id", "name")
+            }
+        logger.info(
+            "Loaded reference data of %s sets in %.3fs",
+            len(reference_data.sets),
+            time.perf_counter() - start,
+        )
+        return reference_data
+
+    def find_sets(self, value: str, exact: bool) -> List[Set]:
+        """
+        Finds the sets that match the given value
+        :param value: The set code or name to search for (case insensitive)
+        :param exact: Whether the code or name has to match the value exactly, otherwise only
+        the name has to contain it
+        :return: The matching sets, in order of their IDs
+        """
+        value = value.lower()
+        if exact:
+            return [
+                set_obj
+                for set_obj in self.sets
+                if set_obj.code.lower() == value or set_obj.name.lower() == value
+            ]
+        return [set_obj for set_obj in self.sets if value in set_obj.name.lower()]
+
+    def find_blocks(self, value: str, exact: bool) -> List[Block]:
+        """
+        Finds the blocks that match the given value
+        :param value: The block name to search for (case insensitive)
+        :param exact: Whether the name has to match the value exactly, otherwise it only
+        has to contain it
+        :return: The matching blocks
+        """
+        value = value.lower()
+        return [
+            block
+            for block in self.blocks
+            if (block.name.lower() == value if exact else value in block.name.lower())
+        ]
+
+    def get_format(self, name: str) -> Optional[Format]:
+        """
+        Gets the format with the given name
+        :param name: The name of the format (case insensitive)
+        :return: The format, or None if it doesn't exist
+        """
+        name = name.lower()
+        return next(
+            (
+                card_format
+                for card_format in self.formats
+                if card_format.name.lower() == name
+            ),
+            None,
+        )
+
+    def get_rarity(self, value: str) -> Optional[Rarity]:
+        """
+        Gets the rarity with the given name or symbol
+        :param value: The name or symbol of the rarity (case insensitive)
+        :return: The rarity, or None if it doesn't exist
+        """
+        value = value.lower()
+        return next(
+            (
+                rarity
+                for rarity in self.rarities
+                if rarity.symbol.lower() == value or rarity.name.lower() == value
+            ),
+            None,
+        )
+
+    def get_type_ids(
+        self, type_model: Type[Model], value: str, exact: bool
+    ) -> List[int]:
+        """
+        Gets the IDs of the types that match the given value
+        :param type_model: The type model (CardType, CardSubtype or CardSupertype)
+        :param value: The type name to search for (case insensitive)
+        :param exact: Whether the name has to match the value exactly, otherwise it only
+        has to contain it
+        :return: The IDs of the matching types
+        """
+        value = value.lower()
+        return [
+            type_id
+            for type_id, name in self.type_names[type_model].items()
+            if (name == value if exact else value in name)
+        ]
+
+
+# pylint: disable=unused-argument
+def invalidate_reference_data(sender: Type[Model], **kwargs) -> None:
+    """
+    Invalidates the reference data when any of the cached models change
+    :param sender: The model class that was changed
+    """
+    ReferenceData.invalidate()
+
+
+for reference_model in REFERENCE_MODELS:
+    post_save.connect(invalidate_reference_data, sender=reference_model)
+    post_delete.connect(invalidate_reference_data, sender=reference_model)
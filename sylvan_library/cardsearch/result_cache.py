@@ -0,0 +1,183 @@
+"""
+Module for caching the results of searches
+
+The ordered IDs of the cards that a search finds are cached for SEARCH_RESULT_CACHE_TIMEOUT
+seconds, so that moving to another page of the results only needs to load the cards on that
+page. Searches that depend on the user (such as ownership searches) are cached for each user.
+
+Cached results are invalidated by changing the version in their key. The versions are kept in
+the database, so results are invalidated in every process (even when each process has its own
+cache). All results are invalidated after apply_import, and the results of a single user are
+invalidated whenever the cards they own or their decks change
+"""
+
+import hashlib
+import uuid
+from typing import Dict, List, Optional, Type, Union
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db import transaction
+from django.db.models import Model, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from sylvan_library.cards.models.card import UserOwnedCard
+from sylvan_library.cards.models.decks import Deck
+from sylvan_library.cardsearch.models import SearchResultVersion
+from sylvan_library.cardsearch.pagination import SearchPage
+
+
+def get_result_cache_scope(user_id: Optional[int] = None) -> str:
+    """
+    Gets the scope of the cached results of a user, or of all results
+    :param user_id: The ID of the user, or None for all results
+    :return: The scope
+    """
+    return "all" if user_id is None else f"user:{user_id}"
+
+
+def get_result_cache_versions(user_id: Optional[int] = None) -> Dict[str, str]:
+    """
+    Gets the current versions of the cached results with a single query
+    :param user_id: The ID of the user to also get the version of their results, or None
+    for only the version of all results
+    :return: The version of each scope (results that have never been invalidated are "0")
+    """
+    scopes = {get_result_cache_scope(), get_result_cache_scope(user_id)}
+    versions = dict.fromkeys(scopes, "0")
+    versions.update(
+        (scope, version.hex)
+        for scope, version in SearchResultVersion.objects.filter(
+            scope__in=scopes
+        ).values_list("scope", "version")
+    )
+    return versions
+
+
+def invalidate_search_results(user_id: Optional[int] = None) -> None:
+    """
+    Marks cached search results as out of date
+    :param user_id: The ID of the user whose results have changed, or None for all results
+    """
+    SearchResultVersion.objects.update_or_create(
+        scope=get_result_cache_scope(user_id), defaults={"version": uuid.uuid4()}
+    )
+
+
+def get_result_cache_key(query_string: str, user_id: Optional[int] = None) -> str:
+    """
+    Gets the key that the results of a search are cached under
+    :param query_string: The normalised query string of the search
+    :param user_id: The ID of the user if the results depend on who is searching, otherwise
+    None so that the results are shared between users
+    :return: The cache key
+    """
+    versions = get_result_cache_versions(user_id)
+    version = versions[get_result_cache_scope()]
+    scope = "all"
+    if user_id is not None:
+        scope = f"user:{user_id}:{versions[get_result_cache_scope(user_id)]}"
+    digest = hashlib.sha256(query_string.encode()).hexdigest()
+    return f"cardsearch:results:{version}:{scope}:{digest}"
+
+
+def get_cached_result_ids(cache_key: str) -> Union[List[int], bool, None]:
+    """
+    Gets the cached IDs of the results of a search
+    :param cache_key: The key of the search
+    :return: The IDs of the cards in order, False if the search had too many results to
+    cache, or None if the results haven't been cached
+    """
+    if not getattr(settings, "SEARCH_RESULT_CACHE_TIMEOUT", 0):
+        return None
+    return cache.get(cache_key)
+
+
+def cache_result_ids(cache_key: str, queryset: QuerySet) -> Optional[List[int]]:
+    """
+    Finds the IDs of the results of a search and caches them
+    :param cache_key: The key of the search
+    :param queryset: The ordered queryset of the search
+    :return: The IDs of the cards in order, or None if the results can't be cached
+    """
+    timeout = getattr(settings, "SEARCH_RESULT_CACHE_TIMEOUT", 0)
+    if not timeout:
+        return None
+
+    max_size = getattr(settings, "SEARCH_RESULT_CACHE_MAX_SIZE", 0)
+    if max_size:
+        card_ids = list(queryset.values_list("id", flat=True)[: max_size + 1])
+        if len(card_ids) > max_size:
+            # Remember that the results are too large, so they aren't fetched every page
+            cache.set(cache_key, False, timeout)
+            return None
+    else:
+        card_ids = list(queryset.values_list("id", flat=True))
+
+    cache.set(cache_key, card_ids, timeout)
+    return card_ids
+
+
+class CachedResultPaginator(Paginator):
+    """
+    A paginator for the cached IDs of the results of a search
+    """
+
+    count_is_estimate = False
+
+    def page(self, number: int) -> SearchPage:
+        """
+        Gets the IDs of the cards on the page with the given number
+        :param number: The number of the page (starting at 1)
+        :return: The page
+        :raises EmptyPage: If the page doesn't have any results
+        """
+        bottom = (number - 1) * self.per_page
+        if number < 1 or (number > 1 and bottom >= self.count):
+            raise EmptyPage("That page contains no results")
+        return SearchPage(
+            self.object_list[bottom : bottom + self.per_page],
+            number,
+            self,
+            has_next_page=bottom + self.per_page < self.count,
+        )
+
+
+# pylint: disable=unused-argument
+def invalidate_owner_search_results(
+    sender: Type[Model], instance: Model, **kwargs
+) -> None:
+    """
+    Invalidates the cached search results of a user after their cards or decks change
+    Decks are always saved when their cards are changed, so deck cards aren't watched
+    :param sender: The model class that was changed
+    :param instance: The ownership or deck that was changed
+    """
+    owner_id = instance.owner_id
+    transaction.on_commit(lambda: invalidate_search_results(owner_id))
+
+
+# pylint: disable=unused-argument
+def invalidate_previous_owner_search_results(
+    sender: Type[Model], instance: Model, **kwargs
+) -> None:
+    """
+    Invalidates the cached search results of the previous owner of an ownership or deck
+    when it is given to another user (which can be done in the admin)
+    :param sender: The model class that is being changed
+    :param instance: The ownership or deck that is being changed
+    """
+    if instance.pk is None:
+        return
+    previous_owner_id = (
+        sender.objects.filter(pk=instance.pk).values_list("owner_id", flat=True).first()
+    )
+    if previous_owner_id is not None and previous_owner_id != instance.owner_id:
+        transaction.on_commit(lambda: invalidate_search_results(previous_owner_id))
+
+
+for owner_model in (UserOwnedCard, Deck):
+    pre_save.connect(invalidate_previous_owner_search_results, sender=owner_model)
+    post_save.connect(invalidate_owner_search_results, sender=owner_model)
+    post_delete.connect(invalidate_owner_search_results, sender=owner_model)
@@ -1,19 +1,46 @@
+import functools
 import logging
 import re
+import typing
+from collections import Counter
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from django.db.models import F, QuerySet, Window
+from django.db.models.functions import RowNumber
+
+from sylvan_library.cards.mana_symbols import count_mana_symbols, get_generic_mana
 from sylvan_library.cardsearch.colours import (
     get_card_face_produces,
-    RE_GENERIC_MANA,
     MANA_SYMBOLS,
 )
-from sylvan_library.cards.models.card import CardFace, Card
-from sylvan_library.cardsearch.models import CardFaceSearchMetadata, CardSearchMetadata
-from sylvan_library.cardsearch.sort_key import get_sort_key
+from sylvan_library.cards.models.card import (
+    CardFace,
+    Card,
+    CardFaceLocalisation,
+    CardPrinting,
+)
+from sylvan_library.cardsearch.hydration import get_preferred_printing_order
+from sylvan_library.cardsearch.models import (
+    SUPER_SORT_KEY_FIELDS,
+    CardFaceSearchMetadata,
+    CardSearchMetadata,
+)
+from sylvan_library.cardsearch.sort_key import get_sort_key, get_sort_slug
 
 logger = logging.getLogger("django")
 
 RE_REMINDER_TEXT = re.compile(r"\(.+?\)")
 
+# The number of cards (or card faces) that are built at a time in bulk mode
+BULK_CHUNK_SIZE = 2000
+
+# The number of card faces that are sent to a worker process at a time
+WORKER_CHUNK_SIZE = 250
+
+# The card face columns that the metadata of a face is built from
+CARD_FACE_METADATA_SOURCE_FIELDS = ["id", "rules_text", "mana_cost"]
+
 
 def build_card_symbol_counts(metadata: CardFaceSearchMetadata) -> bool:
     """
@@ -21,18 +48,15 @@ def build_card_symbol_counts(metadata: CardFaceSearchMetadata) -> bool:
     :param metadata: The metadata record to build symbol counts for
     """
     changed = False
+    symbol_counts = get_card_face_symbol_counts(metadata.card_face)
     for symbol in MANA_SYMBOLS:
-        if metadata.card_face.mana_cost:
-            count = metadata.card_face.mana_cost.count("{" + symbol + "}")
-        else:
-            count = 0
-
+        count = symbol_counts[symbol]
         attr_name = "symbol_count_" + symbol.lower().replace("/", "_")
         if getattr(metadata, attr_name) != count:
             setattr(metadata, attr_name, count)
             changed = True
 
-    generic_count = get_card_generic_mana(metadata.card_face)
+    generic_count = get_generic_mana(symbol_counts)
     if metadata.symbol_count_generic != generic_count:
         metadata.symbol_count_generic = generic_count
         changed = True
@@ -40,19 +64,15 @@ def build_card_symbol_counts(metadata: CardFaceSearchMetadata) -> bool:
     return changed
 
 
-def get_card_generic_mana(card_face: CardFace) -> int:
+def get_card_face_symbol_counts(card_face: CardFace) -> typing.Counter[str]:
     """
-    Gets the number for the generic mana symbol in a cards cost
-    (if there is one, otherwise 0)
-    :return: The amount of generic mana required to cast this card
+    Gets the number of each symbol in the mana cost of a card face
+    :param card_face: The card face
+    :return: The counts of each symbol (which shouldn't be modified)
     """
     if not card_face.mana_cost:
-        return 0
-
-    generic_mana = RE_GENERIC_MANA.search(card_face.mana_cost)
-    if generic_mana:
-        return int(generic_mana.group(1))
-    return 0
+        return Counter()
+    return count_mana_symbols(card_face.mana_cost)
 
 
 def build_produces_counts(metadata: CardFaceSearchMetadata) -> bool:
@@ -71,15 +91,18 @@ def build_produces_counts(metadata: CardFaceSearchMetadata) -> bool:
     return changed
 
 
-def build_metadata_for_card_face(card_face: CardFace) -> bool:
+def build_metadata_for_card_face(card_face: CardFace, save: bool = True) -> bool:
     """
     Constructs (or repopulates) the search metadata for the given card
     :param card_face: The card to build the metadata for
+    :param save: Whether to save the metadata if it changed (otherwise the caller has to)
+    :return: True if the metadata changed
     """
     if hasattr(card_face, "search_metadata"):
         metadata = card_face.search_metadata
     else:
         metadata = CardFaceSearchMetadata(card_face=card_face)
+        card_face.search_metadata = metadata
     changed = False
     if card_face.rules_text and "(" in card_face.rules_text:
         new_text = RE_REMINDER_TEXT.sub("", card_face.rules_text)
@@ -90,7 +113,7 @@ def build_metadata_for_card_face(card_face: CardFace) -> bool:
     changed = build_card_symbol_counts(metadata) or changed
     changed = build_produces_counts(metadata) or changed
 
-    if changed or not metadata.id:
+    if save and (changed or not metadata.id):
         metadata.save()
     return changed
 
@@ -121,12 +144,25 @@ def is_card_commander(card: Card):
     return False
 
 
-def build_metadata_for_card(card: Card) -> bool:
+def build_metadata_for_card(
+    card: Card,
+    save: bool = True,
+    preferred: Optional[Tuple[Optional[int], Optional[str]]] = None,
+) -> bool:
+    """
+    Constructs (or repopulates) the search metadata for the given card
+    :param card: The card to build the metadata for
+    :param save: Whether to save the metadata if it changed (otherwise the caller has to)
+    :param preferred: The ID of the preferred printing of the card and the path of its image,
+    if they have already been found (otherwise they are queried for this card)
+    :return: True if the metadata changed
+    """
     if hasattr(card, "search_metadata"):
         metadata = card.search_metadata
         changed = False
     else:
         metadata = CardSearchMetadata(card=card)
+        card.search_metadata = metadata
         changed = True
 
     is_commander = is_card_commander(card)
@@ -135,20 +171,73 @@ def build_metadata_for_card(card: Card) -> bool:
         metadata.is_commander = is_commander
 
     super_sort_key = get_sort_key(card)
-    if metadata.super_sort_key != super_sort_key:
+    if (
+        tuple(getattr(metadata, field) for field in SUPER_SORT_KEY_FIELDS)
+        != super_sort_key
+    ):
         changed = True
-        metadata.super_sort_key = super_sort_key
+        for field, part in zip(SUPER_SORT_KEY_FIELDS, super_sort_key):
+            setattr(metadata, field, part)
+
+    super_sort_slug = get_sort_slug(card)
+    if metadata.super_sort_slug != super_sort_slug:
+        changed = True
+        metadata.super_sort_slug = super_sort_slug
 
     is_universe_beyond = is_card_universes_beyond(card)
     if metadata.is_universes_beyond != is_universe_beyond:
         changed = True
         metadata.is_universes_beyond = is_universe_beyond
 
-    if changed:
+    if preferred is None:
+        preferred_printing = get_card_preferred_printing(card)
+        preferred = (
+            (preferred_printing.id, get_printing_image_path(preferred_printing))
+            if preferred_printing
+            else (None, None)
+        )
+    preferred_printing_id, preferred_image_path = preferred
+
+    if metadata.preferred_printing_id != preferred_printing_id:
+        changed = True
+        metadata.preferred_printing_id = preferred_printing_id
+
+    if metadata.preferred_image_path != preferred_image_path:
+        changed = True
+        metadata.preferred_image_path = preferred_image_path
+
+    if save and changed:
         metadata.save()
     return changed
 
 
+def get_card_preferred_printing(card: Card) -> Optional[CardPrinting]:
+    """
+    Gets the printing that should be shown for a card when no set is preferred
+    :param card: The card to get the printing for
+    :return: The latest non-promotional printing of the card if there is one,
+    otherwise its latest printing (or None if it has no printings)
+    """
+    return card.printings.order_by(*get_preferred_printing_order()).first()
+
+
+def get_printing_image_path(printing: CardPrinting) -> Optional[str]:
+    """
+    Gets the path of the image of the English localisation of the given printing
+    :param printing: The printing to get the image of
+    :return: The path of the image of the first face, or None if it hasn't been downloaded
+    """
+    return (
+        CardFaceLocalisation.objects.filter(
+            localisation__card_printing=printing,
+            localisation__language__name="English",
+            image__file_path__isnull=False,
+        )
+        .values_list("image__file_path", flat=True)
+        .first()
+    )
+
+
 def is_card_universes_beyond(card: Card) -> bool:
     """
     Return whether a card has only universes beyond printings
@@ -158,3 +247,184 @@ def is_card_universes_beyond(card: Card) -> bool:
     :return: Whether it is only universes beyond
     """
     return all(printing.is_universes_beyond for printing in card.printings.all())
+
+
+def get_chunked_ids(queryset: QuerySet, chunk_size: int) -> Iterator[List[int]]:
+    """
+    Splits the IDs of the rows in a queryset into chunks
+    :param queryset: The rows to split
+    :param chunk_size: The largest number of IDs in each chunk
+    :return: A generator of lists of IDs, in order of ID
+    """
+    ids = list(queryset.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(ids), chunk_size):
+        yield ids[start : start + chunk_size]
+
+
+def get_concrete_update_fields(model) -> List[str]:
+    """
+    Gets the fields of a metadata model that are updated when a row is rebuilt
+    :param model: The metadata model
+    :return: The names of every field other than the primary key and the one-to-one key
+    """
+    return [
+        field.name
+        for field in model._meta.concrete_fields
+        if not field.primary_key and not field.unique
+    ]
+
+
+def compute_card_face_metadata(
+    row: Tuple[int, Optional[str], Optional[str]],
+) -> Tuple[int, Tuple[Any, ...]]:
+    """
+    Builds the metadata of a card face from its columns without using the database, so that
+    it can be run in a worker process
+    :param row: The columns in CARD_FACE_METADATA_SOURCE_FIELDS of the card face
+    :return: The ID of the card face, and the values of its metadata in the order of
+    get_concrete_update_fields
+    """
+    card_face_id, rules_text, mana_cost = row
+    # The card face isn't given an ID so that the metadata isn't looked up
+    card_face = CardFace(rules_text=rules_text, mana_cost=mana_cost)
+    build_metadata_for_card_face(card_face, save=False)
+    return card_face_id, tuple(
+        getattr(card_face.search_metadata, field)
+        for field in get_concrete_update_fields(CardFaceSearchMetadata)
+    )
+
+
+def bulk_build_metadata_for_card_faces(
+    card_faces: QuerySet,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    executor: Optional[Executor] = None,
+) -> Tuple[int, int]:
+    """
+    Rebuilds the search metadata of many card faces, writing each chunk of changed metadata
+    with a single query
+    :param card_faces: The card faces to build the metadata for
+    :param chunk_size: The number of card faces to build at a time
+    :param executor: The pool of worker processes to build the metadata in (if any,
+    otherwise it is built in this process)
+    :return: The number of card faces, and the number whose metadata changed
+    """
+    update_fields = get_concrete_update_fields(CardFaceSearchMetadata)
+    if executor:
+        compute = functools.partial(
+            executor.map, compute_card_face_metadata, chunksize=WORKER_CHUNK_SIZE
+        )
+    else:
+        compute = functools.partial(map, compute_card_face_metadata)
+
+    total_count = change_count = 0
+    for chunk in get_chunked_ids(card_faces, chunk_size):
+        existing_values = {
+            row[0]: row[1:]
+            for row in CardFaceSearchMetadata.objects.filter(
+                card_face_id__in=chunk
+            ).values_list("card_face_id", *update_fields)
+        }
+        rows = CardFace.objects.filter(id__in=chunk).values_list(
+            *CARD_FACE_METADATA_SOURCE_FIELDS
+        )
+        changed_metadata = [
+            CardFaceSearchMetadata(
+                card_face_id=card_face_id, **dict(zip(update_fields, values))
+            )
+            for card_face_id, values in compute(list(rows))
+            if existing_values.get(card_face_id) != values
+        ]
+        CardFaceSearchMetadata.objects.bulk_create(
+            changed_metadata,
+            update_conflicts=True,
+            unique_fields=["card_face"],
+            update_fields=update_fields,
+        )
+        total_count += len(chunk)
+        change_count += len(changed_metadata)
+        logger.info("Indexed %s card faces (%s changed)", total_count, change_count)
+    return total_count, change_count
+
+
+def get_preferred_printings(
+    card_ids: List[int],
+) -> Dict[int, Tuple[Optional[int], Optional[str]]]:
+    """
+    Finds the preferred printing of each of the given cards (see get_card_preferred_printing)
+    and the path of its image (see get_printing_image_path) with one query for each
+    :param card_ids: The IDs of the cards
+    :return: The ID of the preferred printing and its image path, by the ID of the card
+    """
+    printing_ids = dict(
+        CardPrinting.objects.filter(card_id__in=card_ids)
+        .annotate(
+            preference_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F("card_id")],
+                order_by=get_preferred_printing_order(),
+            )
+        )
+        .filter(preference_rank=1)
+        .values_list("card_id", "id")
+    )
+
+    image_paths: Dict[int, str] = {}
+    for printing_id, image_path in (
+        CardFaceLocalisation.objects.filter(
+            localisation__card_printing_id__in=printing_ids.values(),
+            localisation__language__name="English",
+            image__file_path__isnull=False,
+        )
+        .order_by(
+            "localisation__card_printing_id", "card_printing_face__card_face__side"
+        )
+        .values_list("localisation__card_printing_id", "image__file_path")
+    ):
+        image_paths.setdefault(printing_id, image_path)
+
+    return {
+        card_id: (
+            printing_ids.get(card_id),
+            image_paths.get(printing_ids.get(card_id)),
+        )
+        for card_id in card_ids
+    }
+
+
+def bulk_build_metadata_for_cards(
+    cards: QuerySet, chunk_size: int = BULK_CHUNK_SIZE
+) -> Tuple[int, int]:
+    """
+    Rebuilds the search metadata of many cards, writing each chunk of changed metadata with a
+    single query
+    :param cards: The cards to build the metadata for
+    :param chunk_size: The number of cards to build at a time
+    :return: The number of cards, and the number whose metadata changed
+    """
+    update_fields = get_concrete_update_fields(CardSearchMetadata)
+    total_count = change_count = 0
+    for chunk in get_chunked_ids(cards, chunk_size):
+        preferred = get_preferred_printings(chunk)
+        changed_metadata = []
+        for card in (
+            Card.objects.filter(id__in=chunk)
+            .select_related("search_metadata")
+            .prefetch_related(
+                "faces__types",
+                "faces__supertypes",
+                "faces__subtypes",
+                "printings",
+            )
+        ):
+            if build_metadata_for_card(card, save=False, preferred=preferred[card.id]):
+                changed_metadata.append(card.search_metadata)
+        CardSearchMetadata.objects.bulk_create(
+            changed_metadata,
+            update_conflicts=True,
+            unique_fields=["card"],
+            update_fields=update_fields,
+        )
+        total_count += len(chunk)
+        change_count += len(changed_metadata)
+        logger.info("Indexed %s cards (%s changed)", total_count, change_count)
+    return total_count, change_count
@@ -0,0 +1,120 @@
+"""
+Module for planning how the query of a search is run
+
+A search in card mode filters the cards directly. A search in printing mode filters the
+printings and then finds their cards, either as an IN subquery of the card IDs of the matching
+printings when few printings are expected to match, or as a correlated EXISTS when most of
+them are (so each card can stop at its first matching printing).
+
+Neither printing form joins the printings to the cards, so unless the sorting of the search
+needs a multi-valued field, the cards don't have to be made distinct afterwards. Searches that
+are sorted by a printing field (such as the release date of the set) join the matching
+printings instead, so that the cards are sorted by the printings that matched and not by
+all of their printings
+"""
+
+import dataclasses
+import enum
+from typing import List, Optional
+
+from django.db.models import Exists, OuterRef, Q, QuerySet
+
+from sylvan_library.cards.models.card import Card, CardPrinting
+from sylvan_library.cardsearch.pagination import is_single_valued_path
+from sylvan_library.cardsearch.parameters.base_parameters import (
+    CardSearchContext,
+    CardSearchTreeNode,
+    QueryContext,
+)
+
+# Printing searches that are expected to match less than this fraction of the printings use
+# an IN subquery, otherwise they use EXISTS
+PRINTING_SUBQUERY_MAX_SELECTIVITY = 0.05
+
+
+class SearchPlanKind(enum.StrEnum):
+    """
+    The ways that the cards of a search can be found
+    """
+
+    CARD_INDEX = "card index"
+    CARD = "card"
+    PRINTING_SUBQUERY = "printing subquery"
+    PRINTING_EXISTS = "printing exists"
+    PRINTING_JOIN = "printing join"
+
+
+@dataclasses.dataclass
+class SearchPlan:
+    """
+    The chosen way to run the query of a search
+    """
+
+    kind: SearchPlanKind
+    # The estimated fraction of cards (or printings) that the search matches
+    selectivity: float
+    # Whether the filter can return the same card more than once
+    filter_repeats_cards: bool
+    # The EXPLAIN output of the query (only found when DEBUG is on)
+    explain: Optional[str] = None
+
+    def get_queryset(self, query: Q) -> QuerySet:
+        """
+        Gets the cards that match the query of the search
+        :param query: The query of the search (of printings for printing plans)
+        :return: The unordered queryset of cards
+        """
+        if self.kind == SearchPlanKind.PRINTING_SUBQUERY:
+            return Card.objects.filter(
+                id__in=CardPrinting.objects.filter(query).values("card_id")
+            )
+        if self.kind == SearchPlanKind.PRINTING_EXISTS:
+            return Card.objects.filter(
+                Exists(CardPrinting.objects.filter(query, card_id=OuterRef("pk")))
+            )
+        if self.kind == SearchPlanKind.PRINTING_JOIN:
+            # Sorting by the printings reuses this join, so only the matches are sorted by
+            return Card.objects.filter(printings__in=CardPrinting.objects.filter(query))
+        return Card.objects.filter(query)
+
+    def needs_distinct(self, distinct_fields: List[str]) -> bool:
+        """
+        Gets whether the cards need to be made distinct
+        :param distinct_fields: The fields that the cards are sorted by
+        :return: True if the same card can be returned more than once
+        """
+        return self.filter_repeats_cards or not all(
+            is_single_valued_path(Card, field) for field in distinct_fields
+        )
+
+    def __str__(self) -> str:
+        return f"{self.kind} (selectivity {self.selectivity:.3f})"
+
+
+def plan_search(
+    root_parameter: CardSearchTreeNode,
+    query_context: QueryContext,
+    uses_card_index: bool = False,
+    sort_fields: Optional[List[str]] = None,
+) -> SearchPlan:
+    """
+    Chooses how to run the query of a search
+    :param root_parameter: The (optimised) root node of the search
+    :param query_context: The context of the search
+    :param uses_card_index: Whether the IDs of the matching cards were found with the index
+    :param sort_fields: The fields of the cards that the search is sorted by
+    :return: The plan of the search
+    """
+    selectivity = root_parameter.get_selectivity(query_context)
+    if uses_card_index:
+        return SearchPlan(SearchPlanKind.CARD_INDEX, selectivity, False)
+
+    if query_context.search_mode == CardSearchContext.CARD:
+        # Card parameters can filter on the faces (or other related rows) of the card
+        return SearchPlan(SearchPlanKind.CARD, selectivity, True)
+
+    if any(field.startswith("printings__") for field in sort_fields or []):
+        return SearchPlan(SearchPlanKind.PRINTING_JOIN, selectivity, True)
+    if selectivity < PRINTING_SUBQUERY_MAX_SELECTIVITY:
+        return SearchPlan(SearchPlanKind.PRINTING_SUBQUERY, selectivity, False)
+    return SearchPlan(SearchPlanKind.PRINTING_EXISTS, selectivity, False)
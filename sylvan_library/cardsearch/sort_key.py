@@ -9,10 +9,29 @@ from sylvan_library.cards.models.colour import (
 )
 
 
-def get_sort_key(card: Card) -> str:
-    return "-".join(
-        [f"{part:02}" for part in get_sort_key_parts(card)] + [slugify(card.name)]
-    )
+# The largest number of parts in a sort key (see SUPER_SORT_KEY_FIELDS)
+SORT_KEY_PART_COUNT = 8
+
+
+def get_sort_key(card: Card) -> tuple[int, ...]:
+    """
+    Gets the parts of the key that the card is sorted by with "sort:key"
+    Lands and non-land cards have different numbers of parts, so the key is padded with zeroes
+    (this doesn't change the order, as the first part is always different)
+    :param card: The card (with its faces and their types prefetched)
+    :return: The parts of the key
+    """
+    parts = get_sort_key_parts(card)
+    return tuple(parts + [0] * (SORT_KEY_PART_COUNT - len(parts)))
+
+
+def get_sort_slug(card: Card) -> str:
+    """
+    Gets the slug of the name of the card, that cards with the same sort key are sorted by
+    :param card: The card
+    :return: The slug
+    """
+    return slugify(card.name)
 
 
 def get_sort_key_parts(card: Card) -> list[int]:
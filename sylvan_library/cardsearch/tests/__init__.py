@@ -4,3 +4,16 @@ Cardsearch tests
 
 from sylvan_library.cardsearch.tests.parameter_tests import *
 from sylvan_library.cardsearch.tests.parser_tests import *
+from sylvan_library.cardsearch.tests.query_cache_tests import *
+from sylvan_library.cardsearch.tests.parameter_registry_tests import *
+from sylvan_library.cardsearch.tests.pagination_tests import *
+from sylvan_library.cardsearch.tests.hydration_tests import *
+from sylvan_library.cardsearch.tests.card_index_tests import *
+from sylvan_library.cardsearch.tests.query_optimiser_tests import *
+from sylvan_library.cardsearch.tests.reference_data_tests import *
+from sylvan_library.cardsearch.tests.result_cache_tests import *
+from sylvan_library.cardsearch.tests.search_plan_tests import *
+from sylvan_library.cardsearch.tests.timing_tests import *
+from sylvan_library.cardsearch.tests.export_tests import *
+from sylvan_library.cardsearch.tests.batch_search_tests import *
+from sylvan_library.cardsearch.tests.search_metadata_tests import *
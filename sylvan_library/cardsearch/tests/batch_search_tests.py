@@ -0,0 +1,83 @@
+"""
+Tests for the batch search
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from sylvan_library.cards.tests import create_test_card, create_test_card_face
+from sylvan_library.cardsearch.batch_search import run_batch_search
+from sylvan_library.cardsearch.reference_data import ReferenceData
+
+
+@override_settings(SEARCH_RESULT_CACHE_TIMEOUT=0)
+class BatchSearchTestCase(TestCase):
+    """
+    Tests for running many searches at once
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        for name, mana_value in [
+            ("Lightning Bolt", 1),
+            ("Lightning Helix", 2),
+            ("Shock", 1),
+        ]:
+            card = create_test_card({"name": name, "mana_value": mana_value})
+            create_test_card_face(card, {"mana_value": mana_value})
+
+    def test_exact_names_merged(self) -> None:
+        """
+        Tests that exact name searches are found with a single query
+        """
+        # The reference data is loaded once per process, and isn't needed again
+        ReferenceData.get()
+        with self.assertNumQueries(3):
+            searches = run_batch_search(
+                ['!"Lightning Bolt"', "!shock", '!"lightning bolt"', "!Missing"]
+            )
+        self.assertEqual(
+            [[result.card.name for result in search.results] for search in searches],
+            [["Lightning Bolt"], ["Shock"], ["Lightning Bolt"], []],
+        )
+
+    def test_mixed_queries(self) -> None:
+        """
+        Tests that other searches and invalid queries are still run on their own
+        """
+        searches = run_batch_search(["lightning", "!shock", "cmc>=", ""])
+        self.assertEqual(
+            [result.card.name for result in searches[0].results],
+            ["Lightning Bolt", "Lightning Helix"],
+        )
+        self.assertEqual(searches[1].results[0].card.name, "Shock")
+        self.assertIsNotNone(searches[2].error_message)
+        self.assertIsNotNone(searches[3].error_message)
+
+    def test_exact_names_page_size(self) -> None:
+        """
+        Tests that exact name searches return at most a page of results
+        """
+        create_test_card({"name": "Shock"})
+        searches = run_batch_search(["!shock", "shock"], page_size=1)
+        self.assertEqual([len(search.results) for search in searches], [1, 1])
+
+    @override_settings(SEARCH_BATCH_MAX_QUERIES=2)
+    def test_view(self) -> None:
+        """
+        Tests the batch search API
+        """
+        url = reverse("card_batch_search")
+        response = self.client.post(
+            url, {"queries": ["!shock", "cmc>="]}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(results[0]["results"][0]["card"]["name"], "Shock")
+        self.assertIsNotNone(results[1]["error"])
+
+        response = self.client.post(
+            url, {"queries": ["a", "b", "c"]}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
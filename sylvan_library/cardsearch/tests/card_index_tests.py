@@ -0,0 +1,253 @@
+"""
+Tests for the in-memory card index
+"""
+
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from sylvan_library.cards.models.card import Card, CardType, CardSubtype
+from sylvan_library.cards.models.colour import Colour
+from sylvan_library.cards.models.legality import CardLegality
+from sylvan_library.cards.models.sets import Format
+from sylvan_library.cards.tests import create_test_card, create_test_card_face
+from sylvan_library.cardsearch.card_index import CardIndex, np
+from sylvan_library.cardsearch.models import CardFaceSearchMetadata, CardSearchMetadata
+from sylvan_library.cardsearch.parameters.base_parameters import QueryContext
+from sylvan_library.cardsearch.parse_search import ParseSearch
+from sylvan_library.cardsearch.parser.query_parser import CardQueryParser
+
+
+@skipIf(np is None, "NumPy isn't installed")
+@override_settings(SEARCH_CARD_INDEX=True)
+class CardIndexTestCase(TestCase):
+    """
+    Tests that searches using the card index find the same cards as the SQL searches
+    """
+
+    fixtures = ["colours.json"]
+
+    def setUp(self) -> None:
+        cache.clear()
+        CardIndex.invalidate()
+        creature = CardType.objects.create(name="Creature")
+        instant = CardType.objects.create(name="Instant")
+        elf = CardSubtype.objects.create(name="Elf")
+        white = Colour.white().bit_value
+        green = Colour.green().bit_value
+
+        elf_card = create_test_card(
+            {
+                "mana_value": 2,
+                "colour_identity": green,
+                "colour_identity_count": 1,
+            }
+        )
+        face = create_test_card_face(
+            elf_card,
+            {
+                "mana_value": 2,
+                "colour": green,
+                "colour_count": 1,
+                "power": "2",
+                "num_power": 2,
+                "toughness": "1",
+                "num_toughness": 1,
+            },
+        )
+        face.types.add(creature)
+        face.subtypes.add(elf)
+        CardFaceSearchMetadata.objects.create(
+            card_face=face, symbol_count_g=1, symbol_count_generic=1
+        )
+        CardSearchMetadata.objects.create(card=elf_card, is_commander=True)
+
+        instant_card = create_test_card(
+            {
+                "mana_value": 1,
+                "colour_identity": white,
+                "colour_identity_count": 1,
+            }
+        )
+        face = create_test_card_face(
+            instant_card,
+            {
+                "mana_value": 1,
+                "colour": white,
+                "colour_count": 1,
+                "rules_text": "Draw a card.",
+            },
+        )
+        face.types.add(instant)
+        CardFaceSearchMetadata.objects.create(card_face=face, symbol_count_w=1)
+        CardSearchMetadata.objects.create(card=instant_card, is_universes_beyond=True)
+
+        # A card with a 4/4 green front face and a green-white 1/5 back face
+        transform_card = create_test_card(
+            {
+                "mana_value": 4,
+                "colour_identity": white | green,
+                "colour_identity_count": 2,
+            }
+        )
+        for side, colour, colour_indicator, power, toughness in [
+            ("a", green, 0, 4, 4),
+            ("b", white | green, white | green, 1, 5),
+        ]:
+            face = create_test_card_face(
+                transform_card,
+                {
+                    "side": side,
+                    "mana_value": 4,
+                    "colour": colour,
+                    "colour_indicator": colour_indicator,
+                    "colour_count": bin(colour).count("1"),
+                    "power": str(power),
+                    "num_power": power,
+                    "toughness": str(toughness),
+                    "num_toughness": toughness,
+                    "rules_text": "Transform",
+                },
+            )
+            face.types.add(creature)
+        CardFaceSearchMetadata.objects.create(
+            card_face=transform_card.faces.get(side="a"),
+            symbol_count_g=2,
+            symbol_count_generic=2,
+        )
+
+        modern = Format.objects.create(name="Modern", code="modern")
+        legacy = Format.objects.create(name="Legacy", code="legacy")
+        for card, card_format, restriction in [
+            (elf_card, modern, "Legal"),
+            (elf_card, legacy, "Legal"),
+            (instant_card, legacy, "Legal"),
+            (transform_card, modern, "Banned"),
+            (transform_card, legacy, "Legal"),
+        ]:
+            CardLegality.objects.create(
+                card=card, format=card_format, restriction=restriction
+            )
+
+        create_test_card_face(create_test_card({"mana_value": 0}), {"mana_value": 0})
+
+    def assertSameResults(self, query_string: str) -> None:
+        """
+        Asserts that the index and SQL find the same cards for the given query
+        """
+        root_parameter = CardQueryParser().parse(query_string)
+        root_parameter.validate(QueryContext())
+        expected = set(
+            Card.objects.filter(root_parameter.query(QueryContext())).values_list(
+                "id", flat=True
+            )
+        )
+        card_ids = CardIndex.get().search(root_parameter)
+        self.assertIsNotNone(card_ids, query_string)
+        self.assertEqual(set(card_ids.tolist()), expected, query_string)
+
+    def test_same_results_as_sql(self) -> None:
+        """
+        Tests that the supported parameters match the same cards as their SQL queries
+        """
+        for query_string in [
+            "cmc>=2",
+            "cmc=0",
+            "pow>=3",
+            "-pow>=3",
+            "pow>tou",
+            "tou>=5",
+            "pow>=4 tou>=5",
+            "pow>=4 or tou>=5",
+            "c:g",
+            "c=w",
+            "-c=w",
+            "c>g",
+            "c<=gw",
+            "id:gw",
+            "id<w",
+            "id=2",
+            "c:1",
+            "t:creature",
+            "t:elf",
+            "t=elf",
+            "t:cre -t:elf",
+            "-(t:instant or cmc>3)",
+            "sort:cmc t:creature",
+            "m:g",
+            "m>=g",
+            "m=1g",
+            "m<=2gg",
+            "m:2gg",
+            "-m:w",
+            "is:multicoloured",
+            "-is:multicoloured",
+            "has:indicator",
+            "-has:indicator",
+            "is:commander",
+            "-is:commander",
+            "is:ub",
+            "-is:ub",
+            "is:vanilla",
+            "-is:vanilla",
+            "f:modern",
+            "f:modern f:legacy",
+            "-f:modern",
+            "banned:modern or f:modern",
+            "banned:legacy",
+        ]:
+            self.assertSameResults(query_string)
+
+    def test_multiple_formats(self) -> None:
+        """
+        Tests that a card legal in two formats is found when searching for both of them
+        """
+        search = ParseSearch("f:modern f:legacy")
+        search.build_parameters()
+        query_context = QueryContext()
+        search.root_parameter.validate(query_context)
+        self.assertEqual(
+            Card.objects.filter(search.root_parameter.query(query_context)).count(), 1
+        )
+
+    def test_unsupported_parameter(self) -> None:
+        """
+        Tests that a search with a parameter that the index doesn't support falls back to SQL
+        """
+        root_parameter = CardQueryParser().parse("t:creature o:draw")
+        self.assertIsNone(CardIndex.get().search(root_parameter))
+
+    def test_invalidate(self) -> None:
+        """
+        Tests that the index is rebuilt after it is invalidated
+        """
+        index = CardIndex.get()
+        self.assertIs(CardIndex.get(), index)
+        create_test_card_face(create_test_card({"mana_value": 9}), {"mana_value": 9})
+        CardIndex.invalidate()
+        self.assertEqual(CardIndex.get().card_count, index.card_count + 1)
+
+    def test_search_uses_index(self) -> None:
+        """
+        Tests that a search finds its results using the index when it can
+        """
+        search = ParseSearch("pow>=4 tou>=5")
+        search.build_parameters()
+        query_context = QueryContext()
+        query = search.get_card_index_query(query_context)
+        self.assertIsNotNone(query)
+        search.search(query_context)
+        self.assertEqual(search.results, [])
+
+        search = ParseSearch("t:creature")
+        search.build_parameters()
+        search.search(query_context)
+        self.assertEqual(len(search.results), 2)
+
+    @override_settings(SEARCH_CARD_INDEX=False)
+    def test_disabled(self) -> None:
+        """
+        Tests that the index isn't used unless it is enabled
+        """
+        self.assertIsNone(CardIndex.get())
@@ -0,0 +1,60 @@
+"""
+Tests for the search export
+"""
+
+import json
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from sylvan_library.cards.tests import create_test_card, create_test_card_face
+
+
+class CardSearchExportTestCase(TestCase):
+    """
+    Tests for the search export view
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        for name, mana_value in [("Alpha", 1), ("Bravo", 2), ("Charlie", 3)]:
+            card = create_test_card({"name": name, "mana_value": mana_value})
+            create_test_card_face(card, {"mana_value": mana_value, "power": "2"})
+
+    def export(self, query_string: str, export_format: str = "ndjson"):
+        """
+        Gets the response of an export
+        """
+        return self.client.get(
+            reverse("card_search_export"),
+            {"q": query_string, "format": export_format},
+        )
+
+    def test_ndjson(self) -> None:
+        """
+        Tests that each card is exported as a line of JSON
+        """
+        response = self.export("cmc>=2")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row["name"] for row in rows], ["Bravo", "Charlie"])
+        self.assertEqual(rows[0]["power"], "2")
+
+    def test_csv(self) -> None:
+        """
+        Tests that the cards can be exported as CSV
+        """
+        response = self.export("cmc>=2", "csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith("id,scryfall_oracle_id,name,"))
+        self.assertEqual(len(lines), 3)
+
+    def test_invalid(self) -> None:
+        """
+        Tests that an invalid search or format is rejected
+        """
+        self.assertEqual(self.export("cmc>=2", "xml").status_code, 400)
+        self.assertEqual(self.export("cmc>=").status_code, 400)
@@ -0,0 +1,151 @@
+"""
+Tests for loading the search result pages
+"""
+
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from sylvan_library.cards.tests import (
+    create_test_card,
+    create_test_card_face,
+    create_test_card_localisation,
+    create_test_card_printing,
+    create_test_language,
+    create_test_set,
+)
+from sylvan_library.cards.models.card import (
+    CardFaceLocalisation,
+    CardFacePrinting,
+    CardImage,
+)
+from sylvan_library.cardsearch.hydration import get_preferred_printing, hydrate_cards
+from sylvan_library.cardsearch.parameters.base_parameters import QueryContext
+from sylvan_library.cardsearch.parse_search import ParseSearch
+from sylvan_library.cardsearch.search_metadata import build_metadata_for_card
+
+
+class HydrationTestCase(TestCase):
+    """
+    Tests for the hydration of search results
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.english = create_test_language("English", "en")
+        self.old_set = create_test_set(
+            "Old Set",
+            "OLD",
+            {"release_date": datetime.date(2000, 1, 1), "type": "expansion"},
+        )
+        self.new_set = create_test_set(
+            "New Set",
+            "NEW",
+            {"release_date": datetime.date(2010, 1, 1), "type": "expansion"},
+        )
+        self.promo_set = create_test_set(
+            "Promo Set",
+            "PRM",
+            {"release_date": datetime.date(2020, 1, 1), "type": "promo"},
+        )
+
+        self.reprinted_card = create_test_card({"name": "Reprinted Card"})
+        self.reprinted_face = create_test_card_face(self.reprinted_card)
+        self.old_printing = create_test_card_printing(self.reprinted_card, self.old_set)
+        self.new_printing = create_test_card_printing(
+            self.reprinted_card, self.new_set, {"numerical_number": 2}
+        )
+        create_test_card_printing(
+            self.reprinted_card, self.new_set, {"numerical_number": 10}
+        )
+        create_test_card_printing(self.reprinted_card, self.promo_set)
+
+        self.promo_card = create_test_card({"name": "Promo Card"})
+        create_test_card_face(self.promo_card)
+        self.promo_printing = create_test_card_printing(self.promo_card, self.promo_set)
+
+    def test_latest_non_promo_printing_preferred(self) -> None:
+        """
+        Tests that the latest non-promotional printing is preferred
+        """
+        cards = [self.reprinted_card, self.promo_card]
+        hydrate_cards(cards)
+        self.assertEqual(get_preferred_printing(cards[0]), self.new_printing)
+        self.assertEqual(get_preferred_printing(cards[1]), self.promo_printing)
+
+    def test_preferred_set(self) -> None:
+        """
+        Tests that a printing from the preferred set is used if the card has one
+        """
+        cards = [self.reprinted_card, self.promo_card]
+        hydrate_cards(cards, preferred_set=self.old_set)
+        self.assertEqual(get_preferred_printing(cards[0]), self.old_printing)
+        self.assertEqual(get_preferred_printing(cards[1]), self.promo_printing)
+
+    def test_query_count_per_page(self) -> None:
+        """
+        Tests that the number of queries for a page doesn't depend on the number of cards
+        """
+        create_test_card_localisation(self.new_printing, self.english)
+        search = ParseSearch("")
+        with self.assertNumQueries(6):
+            search.search(QueryContext())
+        self.assertEqual(len(search.results), 2)
+
+        for idx in range(5):
+            card = create_test_card({"name": f"Card {idx}"})
+            create_test_card_face(card)
+            printing = create_test_card_printing(card, self.new_set)
+            create_test_card_localisation(printing, self.english)
+
+        search = ParseSearch("")
+        with self.assertNumQueries(6):
+            search.search(QueryContext())
+        self.assertEqual(len(search.results), 7)
+        self.assertEqual(search.results[-1].selected_printing, self.new_printing)
+
+    def test_metadata_preferred_printing(self) -> None:
+        """
+        Tests that the preferred printing and its image are stored in the search metadata
+        """
+        localisation = create_test_card_localisation(self.new_printing, self.english)
+        CardFaceLocalisation.objects.create(
+            localisation=localisation,
+            card_printing_face=CardFacePrinting.objects.create(
+                uuid="face-printing",
+                card_face=self.reprinted_face,
+                card_printing=self.new_printing,
+            ),
+            face_name=self.reprinted_card.name,
+            image=CardImage.objects.create(
+                scryfall_image_url="https://example.com/new.jpg",
+                file_path="card_images/en/new/2.jpg",
+            ),
+        )
+        self.assertTrue(build_metadata_for_card(self.reprinted_card))
+        self.reprinted_card.refresh_from_db()
+        metadata = self.reprinted_card.search_metadata
+        self.assertEqual(metadata.preferred_printing, self.new_printing)
+        self.assertEqual(metadata.preferred_image_path, "card_images/en/new/2.jpg")
+        self.assertFalse(build_metadata_for_card(self.reprinted_card))
+
+    def test_metadata_preferred_printing_used(self) -> None:
+        """
+        Tests that the stored preferred printing is used when no set is preferred
+        """
+        build_metadata_for_card(self.reprinted_card)
+        build_metadata_for_card(self.promo_card)
+        # Change the stored printing to show that it is used instead of the window
+        self.reprinted_card.search_metadata.preferred_printing = self.old_printing
+        self.reprinted_card.search_metadata.save()
+
+        search = ParseSearch("")
+        search.search(QueryContext())
+        self.assertEqual(
+            [result.selected_printing for result in search.results],
+            [self.promo_printing, self.old_printing],
+        )
+        self.assertFalse(
+            hasattr(search.results[1].card.printings.all()[0], "preference_rank")
+        )
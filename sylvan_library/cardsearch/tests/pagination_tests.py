@@ -0,0 +1,153 @@
+"""
+Tests for the search result pagination
+"""
+
+from typing import List
+
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+
+from sylvan_library.cards.models.card import Card
+from sylvan_library.cards.tests import create_test_card, create_test_card_face
+from sylvan_library.cardsearch.pagination import (
+    SearchPaginator,
+    get_estimated_count,
+    is_single_valued_path,
+)
+from sylvan_library.cardsearch.parameters.base_parameters import QueryContext
+from sylvan_library.cardsearch.parse_search import ParseSearch
+
+
+class SearchPaginatorTestCase(TestCase):
+    """
+    Tests for the SearchPaginator
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        for name, mana_value in [
+            ("Alpha", 3),
+            ("Alpha", 1),
+            ("Bravo", 2),
+            ("Charlie", 2),
+            ("Delta", 5),
+            ("Echo", 2),
+            ("Foxtrot", 0),
+        ]:
+            card = create_test_card({"name": name, "mana_value": mana_value})
+            create_test_card_face(card)
+
+    @staticmethod
+    def get_queryset(query_string: str) -> QuerySet:
+        """
+        Gets the ordered queryset of a search
+        """
+        search = ParseSearch(query_string)
+        search.build_parameters()
+        return search.get_queryset(QueryContext())
+
+    @staticmethod
+    def get_cursor_pages(paginator: SearchPaginator) -> List[List[Card]]:
+        """
+        Gets every page of results by following the cursor of each page
+        """
+        page = paginator.page(1)
+        pages = [list(page)]
+        cursor = paginator.get_next_cursor(page)
+        while cursor:
+            page = paginator.page_after(len(pages) + 1, cursor)
+            pages.append(list(page))
+            cursor = paginator.get_next_cursor(page)
+        return pages
+
+    def test_single_valued_path(self) -> None:
+        """
+        Tests that only paths that can't duplicate rows are allowed for keyset ordering
+        """
+        self.assertTrue(is_single_valued_path(Card, "name"))
+        self.assertTrue(
+            is_single_valued_path(Card, "search_metadata__super_sort_key_1")
+        )
+        self.assertFalse(is_single_valued_path(Card, "faces__num_power"))
+        self.assertFalse(is_single_valued_path(Card, "foo"))
+
+    def test_cursor_pages_match_offset_pages(self) -> None:
+        """
+        Tests that following the cursors gives the same results as offset pages
+        """
+        for query_string in ["sort:cmc", "sort<cmc", "sort:name", "sort:price"]:
+            queryset = self.get_queryset(query_string)
+            paginator = SearchPaginator(queryset, 3)
+            self.assertTrue(paginator.supports_keyset)
+            expected = list(queryset)
+            pages = self.get_cursor_pages(paginator)
+            self.assertEqual([len(page) for page in pages], [3, 3, 1])
+            self.assertEqual(
+                [card.id for page in pages for card in page],
+                [card.id for card in expected],
+            )
+
+    def test_multi_valued_sort_not_keyset(self) -> None:
+        """
+        Tests that sorting by a face column falls back to offset pages
+        """
+        paginator = SearchPaginator(self.get_queryset("sort:power"), 3)
+        self.assertFalse(paginator.supports_keyset)
+        self.assertIsNone(paginator.get_next_cursor(paginator.page(1)))
+
+    def test_invalid_cursor(self) -> None:
+        """
+        Tests that a tampered cursor is ignored
+        """
+        paginator = SearchPaginator(self.get_queryset("sort:cmc"), 3)
+        page = paginator.page_after(2, "foo:bar")
+        self.assertEqual(list(page), list(paginator.page(2)))
+
+    def test_cursor_for_other_query(self) -> None:
+        """
+        Tests that a cursor made for a different ordering falls back to an offset page
+        """
+        paginator = SearchPaginator(self.get_queryset("sort:cmc"), 3)
+        cursor = paginator.get_next_cursor(paginator.page(1))
+        paginator = SearchPaginator(self.get_queryset("sort:cmc"), 3)
+        self.assertIsNotNone(paginator.decode_cursor(cursor))
+
+        paginator = SearchPaginator(self.get_queryset("-sort:cmc"), 3)
+        self.assertIsNone(paginator.decode_cursor(cursor))
+        self.assertEqual(list(paginator.page_after(2, cursor)), list(paginator.page(2)))
+
+    @override_settings(SEARCH_COUNT_CACHE_TIMEOUT=60)
+    def test_count_cached(self) -> None:
+        """
+        Tests that the count of a search is reused by later paginators
+        """
+        self.assertEqual(SearchPaginator(self.get_queryset("sort:cmc"), 3).count, 7)
+        create_test_card_face(create_test_card({"name": "Golf"}))
+        self.assertEqual(SearchPaginator(self.get_queryset("sort:cmc"), 3).count, 7)
+        cache.clear()
+        self.assertEqual(SearchPaginator(self.get_queryset("sort:cmc"), 3).count, 8)
+
+    @override_settings(SEARCH_COUNT_CACHE_TIMEOUT=60)
+    def test_stale_count_does_not_hide_results(self) -> None:
+        """
+        Tests that a page isn't cut short when the cached count is out of date
+        """
+        self.assertEqual(SearchPaginator(self.get_queryset("sort:cmc"), 5).count, 7)
+        for idx in range(4):
+            create_test_card_face(create_test_card({"name": f"Golf {idx}"}))
+        paginator = SearchPaginator(self.get_queryset("sort:cmc"), 5)
+        self.assertEqual(paginator.count, 7)
+        self.assertEqual(len(paginator.page(2)), 5)
+        self.assertTrue(paginator.page(2).has_next())
+
+    @override_settings(SEARCH_COUNT_ESTIMATE_THRESHOLD=1_000_000_000)
+    def test_count_not_estimated(self) -> None:
+        """
+        Tests that a search with fewer expected results than the threshold is counted exactly
+        """
+        queryset = self.get_queryset("sort:cmc")
+        self.assertGreaterEqual(get_estimated_count(queryset), 0)
+        paginator = SearchPaginator(queryset, 3)
+        self.assertEqual(paginator.count, 7)
+        self.assertFalse(paginator.count_is_estimate)
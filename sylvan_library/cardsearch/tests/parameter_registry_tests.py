@@ -0,0 +1,115 @@
+"""
+Tests for the search parameter registry
+"""
+
+from typing import List
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from sylvan_library.cardsearch.parameters.base_parameters import ParameterArgs
+from sylvan_library.cardsearch.parameters.card_colour_parameters import (
+    CardComplexColourParam,
+)
+from sylvan_library.cardsearch.parameters.card_mana_cost_parameters import (
+    CardColourCountParam,
+)
+from sylvan_library.cardsearch.parameters.card_misc_parameters import (
+    CardIsCommanderParam,
+    CardLayoutParameter,
+)
+from sylvan_library.cardsearch.parameters.card_name_parameters import CardNameParam
+from sylvan_library.cardsearch.parameters.card_set_parameters import CardSetParam
+from sylvan_library.cardsearch.parameters.card_type_parameters import (
+    CardGenericTypeParam,
+)
+from sylvan_library.cardsearch.parameters.sort_parameters import (
+    CardNameSortParam,
+    CardPowerSortParam,
+)
+from sylvan_library.cardsearch.parser.parameter_registry import ParameterRegistry
+from sylvan_library.cardsearch.parser.query_parser import PARAMETER_REGISTRY
+
+
+class ParameterRegistryTestCase(TestCase):
+    """
+    Tests for the ParameterRegistry
+    """
+
+    def get_parameter_type(self, keyword: str, value: str, operator: str = ":"):
+        """
+        Shortcut for finding the parameter type for a term
+        """
+        return PARAMETER_REGISTRY.get_parameter_type(
+            ParameterArgs(keyword=keyword, operator=operator, value=value)
+        )
+
+    def test_keyword_lookup(self) -> None:
+        """
+        Tests that a simple keyword is found
+        """
+        self.assertEqual(self.get_parameter_type("name", "foo"), CardNameParam)
+        self.assertEqual(self.get_parameter_type("S", "foo"), CardSetParam)
+
+    def test_is_value_lookup(self) -> None:
+        """
+        Tests that "is" parameters are found by their value
+        """
+        self.assertEqual(
+            self.get_parameter_type("is", "Commander"), CardIsCommanderParam
+        )
+        self.assertEqual(self.get_parameter_type("is", "token"), CardGenericTypeParam)
+
+    def test_sort_value_lookup(self) -> None:
+        """
+        Tests that sort parameters are found by their value
+        """
+        self.assertEqual(self.get_parameter_type("sort", "name"), CardNameSortParam)
+        self.assertEqual(self.get_parameter_type("order", "power"), CardPowerSortParam)
+
+    def test_shared_keyword_lookup(self) -> None:
+        """
+        Tests that parameters that share a keyword are split by their value
+        """
+        self.assertEqual(self.get_parameter_type("c", "rg"), CardComplexColourParam)
+        self.assertEqual(self.get_parameter_type("c", "2"), CardColourCountParam)
+
+    def test_unknown_keyword(self) -> None:
+        """
+        Tests that an unknown keyword raises an error
+        """
+        with self.assertRaises(ValueError):
+            self.get_parameter_type("foo", "bar")
+        with self.assertRaises(ValueError):
+            self.get_parameter_type("is", "bar")
+
+    def test_ambiguous_keyword_rejected(self) -> None:
+        """
+        Tests that two parameters that could both match the same term can't be registered
+        """
+
+        class NameLayoutParam(CardLayoutParameter):
+            """
+            A layout parameter that uses the same keyword as the name parameter
+            """
+
+            @classmethod
+            def get_search_keywords(cls) -> List[str]:
+                return ["layout", "n"]
+
+        with self.assertRaises(ImproperlyConfigured):
+            ParameterRegistry([CardNameParam, NameLayoutParam, CardSetParam])
+        ParameterRegistry([CardNameParam, CardLayoutParameter, CardSetParam])
+
+    def test_ambiguous_value_rejected(self) -> None:
+        """
+        Tests that two "is" parameters with the same value can't be registered
+        """
+
+        class DuplicateCommanderParam(CardIsCommanderParam):
+            """
+            A copy of the commander parameter
+            """
+
+        with self.assertRaises(ImproperlyConfigured):
+            ParameterRegistry([CardIsCommanderParam, DuplicateCommanderParam])
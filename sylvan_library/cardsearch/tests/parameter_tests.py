@@ -2,22 +2,43 @@
 The module for searching tests
 """
 
+import datetime
+
+from django.contrib.admin import AdminSite
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
+from sylvan_library.cards.admin import DeckAdmin
 from sylvan_library.cards.models.card import CardPrinting, Card
+from sylvan_library.cards.models.decks import Deck, DeckCard, UserCardDeckUsage
+from sylvan_library.cards.models.rarity import Rarity
 from sylvan_library.cards.tests import (
     create_test_card,
     create_test_card_printing,
     create_test_set,
     create_test_card_face,
+    create_test_card_localisation,
+    create_test_language,
+    create_test_rarity,
+    create_test_user,
 )
+from sylvan_library.cardsearch.models import CardPauperCandidate
 from sylvan_library.cardsearch.parameters.base_parameters import (
     CardSearchAnd,
     ParameterArgs,
     QueryContext,
+    QueryValidationError,
     CardSearchContext,
 )
+from sylvan_library.cardsearch.parameters.card_mana_cost_parameters import (
+    CardManaCostComplexParam,
+)
 from sylvan_library.cardsearch.parameters.card_name_parameters import CardNameParam
+from sylvan_library.cardsearch.parameters.card_ownership_parameters import (
+    CardMissingPauperParam,
+    CardOwnershipCountParam,
+    CardUsageCountParam,
+)
 from sylvan_library.cardsearch.parameters.card_rules_text_parameter import (
     CardRulesTextParam,
 )
@@ -151,6 +172,29 @@ class CardRulesParamTestCase(TestCase):
         param = CardRulesTextParam(ParameterArgs("rules", ":", "Vigilance"))
         self.assertNotIn(card, Card.objects.filter(param.query(QueryContext())))
 
+    def test_rules_contains_wildcards(self) -> None:
+        """
+        Tests that LIKE wildcards in the search text are matched literally
+        """
+        card = create_test_card()
+        create_test_card_face(card, {"rules_text": "Draw a card"})
+        for value in ["Draw%card", "Draw_a"]:
+            param = CardRulesTextParam(ParameterArgs("rules", ":", value))
+            self.assertNotIn(card, Card.objects.filter(param.query(QueryContext())))
+
+    def test_rules_contains_card_name(self) -> None:
+        """
+        Tests that a tilde in the search text matches the name of the card
+        """
+        card = create_test_card({"name": "Foo"})
+        create_test_card_face(card, {"rules_text": "When Foo enters, draw a card"})
+        other_card = create_test_card({"name": "Bar"})
+        create_test_card_face(
+            other_card, {"rules_text": "When Foo enters, draw a card"}
+        )
+        param = CardRulesTextParam(ParameterArgs("rules", ":", "when ~ enters"))
+        self.assertEqual(list(Card.objects.filter(param.query(QueryContext()))), [card])
+
 
 class CardSetParamTestCase(TestCase):
     """
@@ -173,3 +217,207 @@ class CardSetParamTestCase(TestCase):
                 param.query(QueryContext(search_mode=CardSearchContext.PRINTING))
             ),
         )
+
+
+class CardOwnershipCountParamTestCase(TestCase):
+    """
+    Tests for the card ownership parameter
+    """
+
+    def setUp(self) -> None:
+        self.user = create_test_user()
+        set_obj = create_test_set("Setty", "SET", {})
+        language = create_test_language("English", "en")
+        self.cards = []
+        for count in (0, 1, 3):
+            card = create_test_card({})
+            printing = create_test_card_printing(card, set_obj, {})
+            create_test_card_localisation(printing, language).apply_user_change(
+                count, self.user
+            )
+            self.cards.append(card)
+
+    def get_matches(self, operator: str, value: str, negated: bool = False):
+        """
+        Gets the cards that match an ownership parameter
+        """
+        query_context = QueryContext(user=self.user)
+        param = CardOwnershipCountParam(
+            ParameterArgs("own", operator, value), negated=negated
+        )
+        param.validate(query_context)
+        return list(Card.objects.filter(param.query(query_context)).order_by("id"))
+
+    def test_ownership_match(self) -> None:
+        """
+        Tests that cards can be found by how many the user owns
+        """
+        unowned, single, triple = self.cards
+        self.assertEqual(self.get_matches(":", "any"), [single, triple])
+        self.assertEqual(self.get_matches(":", "none"), [unowned])
+        self.assertEqual(self.get_matches("<", "3"), [unowned, single])
+        self.assertEqual(self.get_matches(">", "1"), [triple])
+        self.assertEqual(self.get_matches("<", "3", negated=True), [triple])
+
+
+class CardUsageCountParamTestCase(TestCase):
+    """
+    Tests for the card deck usage parameter
+    """
+
+    def setUp(self) -> None:
+        self.user = create_test_user()
+        self.cards = [create_test_card({}) for _ in range(3)]
+        self.decks = []
+        for deck_cards in ([(0, True), (1, False)], [(1, False)]):
+            deck = Deck.objects.create(
+                owner=self.user,
+                name="Decky",
+                format="edh",
+                date_created=datetime.date.today(),
+            )
+            for card_index, is_commander in deck_cards:
+                for board in ("main", "side"):
+                    DeckCard.objects.create(
+                        deck=deck,
+                        card=self.cards[card_index],
+                        count=1,
+                        board=board,
+                        is_commander=is_commander,
+                    )
+            self.decks.append(deck)
+        UserCardDeckUsage.refresh(self.user.id)
+
+    def get_matches(self, operator: str, value: str):
+        """
+        Gets the cards that match a deck usage parameter
+        """
+        query_context = QueryContext(user=self.user)
+        param = CardUsageCountParam(ParameterArgs("used", operator, value))
+        param.validate(query_context)
+        return list(Card.objects.filter(param.query(query_context)).order_by("id"))
+
+    def test_usage_match(self) -> None:
+        """
+        Tests that cards can be found by how many decks they have been used in
+        """
+        commander, twice_used, unused = self.cards
+        self.assertEqual(self.get_matches(":", "any"), [commander, twice_used])
+        self.assertEqual(self.get_matches(":", "never"), [unused])
+        self.assertEqual(self.get_matches(":", "commander"), [commander])
+        self.assertEqual(self.get_matches(">=", "2"), [twice_used])
+        self.assertEqual(self.get_matches("<", "2"), [commander, unused])
+
+    def test_deck_deleted(self) -> None:
+        """
+        Tests that the usage is refreshed after a deck is deleted
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.decks[0].delete()
+        self.assertEqual(self.get_matches(":", "never"), [self.cards[0], self.cards[2]])
+        self.assertEqual(self.get_matches("=", "1"), [self.cards[1]])
+
+    def test_deck_owner_changed_in_admin(self) -> None:
+        """
+        Tests that the usage of both users is refreshed when a deck is given to another user
+        in the admin
+        """
+        other_user = get_user_model().objects.create(username="otheruser")
+        deck = self.decks[0]
+        deck.owner = other_user
+        DeckAdmin(Deck, AdminSite()).save_model(None, deck, None, True)
+        self.assertEqual(self.get_matches(":", "never"), [self.cards[0], self.cards[2]])
+        self.assertEqual(
+            list(
+                UserCardDeckUsage.objects.filter(owner=other_user)
+                .order_by("card_id")
+                .values_list("card_id", "deck_count", "commander_count")
+            ),
+            [(self.cards[0].id, 1, 1), (self.cards[1].id, 1, 0)],
+        )
+
+
+class CardMissingPauperParamTestCase(TestCase):
+    """
+    Tests for the missing pauper parameter
+    """
+
+    def setUp(self) -> None:
+        self.user = create_test_user()
+        create_test_set("Exodus", "EXO", {"release_date": datetime.date(1998, 6, 15)})
+        self.set_obj = create_test_set(
+            "Setty", "SET", {"release_date": datetime.date(2010, 1, 1)}
+        )
+        self.language = create_test_language("English", "en")
+        self.common = create_test_rarity("Common", "C")
+        self.rare = Rarity.objects.create(name="Rare", symbol="R", display_order=3)
+
+    def create_printing(self, card: Card, rarity: Rarity, owned: bool) -> None:
+        """
+        Creates a printing of the card, which the user might own
+        """
+        printing = create_test_card_printing(
+            card, self.set_obj, {"rarity_id": rarity.id}
+        )
+        localisation = create_test_card_localisation(printing, self.language)
+        if owned:
+            localisation.apply_user_change(1, self.user)
+
+    def test_missing_pauper(self) -> None:
+        """
+        Tests that cards are found if the user owns a rare printing but not a common one
+        """
+        missing, owned, rare_only, online = [create_test_card({}) for _ in range(4)]
+        for card in (missing, owned, rare_only, online):
+            self.create_printing(card, self.rare, owned=True)
+        self.create_printing(missing, self.common, owned=False)
+        self.create_printing(owned, self.common, owned=True)
+        # Online only printings can't be used in paper pauper
+        online_set = create_test_set(
+            "Online", "ONL", {"release_date": datetime.date(2010, 1, 1)}
+        )
+        online_set.is_online_only = True
+        online_set.save()
+        printing = create_test_card_printing(
+            online, online_set, {"rarity_id": self.common.id}
+        )
+        create_test_card_localisation(printing, self.language)
+        CardPauperCandidate.rebuild()
+
+        query_context = QueryContext(user=self.user)
+        param = CardMissingPauperParam(ParameterArgs("is", ":", "missing-pauper"))
+        param.validate(query_context)
+        self.assertEqual(
+            list(Card.objects.filter(param.query(query_context))), [missing]
+        )
+        self.assertIn(
+            missing.printings.first(),
+            CardPrinting.objects.filter(
+                param.query(
+                    QueryContext(search_mode=CardSearchContext.PRINTING, user=self.user)
+                )
+            ),
+        )
+
+
+class CardManaCostComplexParamTestCase(TestCase):
+    """
+    Tests for the mana cost parameter
+    """
+
+    def test_validate(self) -> None:
+        """
+        Tests that the symbols of the cost are counted when the parameter is validated
+        """
+        param = CardManaCostComplexParam(
+            ParameterArgs(keyword="mana", operator=":", value="{2}{W/R}{W/R}g")
+        )
+        param.validate(QueryContext())
+        self.assertEqual(param.symbol_counts, {"r/w": 2, "g": 1})
+        self.assertEqual(param.generic_mana, 2)
+
+        param = CardManaCostComplexParam(
+            ParameterArgs(keyword="mana", operator=":", value="{2}{W")
+        )
+        with self.assertRaises(QueryValidationError):
+            param.validate(QueryContext())
@@ -30,6 +30,7 @@ from sylvan_library.cardsearch.parameters.card_type_parameters import (
     CardGenericTypeParam,
 )
 from sylvan_library.cardsearch.parse_search import ParseSearch
+from sylvan_library.cardsearch.parser.base_parser import ParseError
 from sylvan_library.cardsearch.parser.query_parser import CardQueryParser
 
 
@@ -111,6 +112,15 @@ class ParserTests(TestCase):
         self.assertEqual(first_param.value, "foo")
         self.assertEqual(second_param.value, "bar")
 
+    def test_exact_quoted_name(self) -> None:
+        """
+        Tests that a quoted name with an exclamation mark matches the exact name
+        """
+        root_param = self.parser.parse('!"Lightning Bolt"')
+        self.assertIsInstance(root_param, CardNameParam)
+        self.assertEqual(root_param.value, "lightning bolt")
+        self.assertTrue(root_param.match_exact)
+
     def test_negated_param(self) -> None:
         """
         Tests that a negated query string is converted to the correct parameters
@@ -120,6 +130,15 @@ class ParserTests(TestCase):
         self.assertEqual(root_param.value, "foo")
         self.assertTrue(root_param.negated)
 
+    def test_double_negated_param(self) -> None:
+        """
+        Tests that only the first dash negates a parameter, and the rest are part of the name
+        """
+        root_param = self.parser.parse("--foo")
+        self.assertIsInstance(root_param, CardNameParam)
+        self.assertEqual(root_param.value, "-foo")
+        self.assertTrue(root_param.negated)
+
     def test_negated_bracketed_param(self) -> None:
         """
         Tests that a negated grouped query string is converted to the correct parameters
@@ -299,6 +318,67 @@ class ParserTests(TestCase):
         self.assertEqual(root_param.symbol_counts["r"], 0)
         self.assertEqual(root_param.symbol_counts["g"], 0)
 
+    def test_keyword_prefix_param(self) -> None:
+        """
+        Tests that a word starting with "and" or "or" isn't split into a keyword
+        """
+        root_param = self.parser.parse("foo android orc")
+        self.assertIsInstance(root_param, CardSearchAnd)
+        self.assertEqual(
+            [param.value for param in root_param.child_parameters],
+            ["foo", "android", "orc"],
+        )
+
+    def test_word_group_param(self) -> None:
+        """
+        Tests that a bracketed list of words is converted to a group of parameters
+        """
+        root_param = self.parser.parse("t:[goblin  elf] o:/draw\\/discard/")
+        self.assertIsInstance(root_param, CardSearchAnd)
+        type_group, rules_param = root_param.child_parameters
+        self.assertIsInstance(type_group, CardSearchOr)
+        self.assertEqual(
+            [param.value for param in type_group.child_parameters], ["goblin", "elf"]
+        )
+        self.assertIsInstance(rules_param, CardRulesTextParam)
+        self.assertEqual(rules_param.value, "draw\\/discard")
+
+    def test_parse_error_position(self) -> None:
+        """
+        Tests that parse errors point at the problem in the query string
+        """
+        with self.assertRaises(ParseError) as context:
+            self.parser.parse("(foo or bar")
+        self.assertEqual(context.exception.pos, 11)
+
+        with self.assertRaises(ParseError) as context:
+            self.parser.parse("foo) bar")
+        self.assertEqual(context.exception.pos, 3)
+
+    def test_parse_error_messages(self) -> None:
+        """
+        Tests the messages and positions of parse errors
+        """
+        for query_string, message in [
+            ("(t:creature", "Expected ) but got end of string at position 11"),
+            (
+                "and t:creature",
+                'Expected a parameter but got "and" instead at position 4',
+            ),
+            (
+                "o:draw or or t:x",
+                'Expected a parameter but got "or" instead at position 13',
+            ),
+            (
+                "t:creature or",
+                "Expected a parameter but got end of string at position 12",
+            ),
+        ]:
+            with self.subTest(query_string):
+                with self.assertRaises(ParseError) as context:
+                    self.parser.parse(query_string)
+                self.assertEqual(str(context.exception), message)
+
 
 class ColourContainsTestCase(TestCase):
     # pylint: disable=too-many-instance-attributes
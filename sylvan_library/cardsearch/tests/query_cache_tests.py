@@ -0,0 +1,108 @@
+"""
+Tests for the parsed query cache
+"""
+
+from django.test import TestCase
+
+from sylvan_library.cardsearch.parameters.base_parameters import (
+    CardSearchAnd,
+    QueryContext,
+)
+from sylvan_library.cardsearch.parameters.card_mana_cost_parameters import (
+    CardManaCostComplexParam,
+)
+from sylvan_library.cardsearch.parameters.card_name_parameters import CardNameParam
+from sylvan_library.cardsearch.parser.base_parser import ParseError
+from sylvan_library.cardsearch.parser.query_cache import (
+    QueryParseCache,
+    normalise_query_string,
+)
+
+
+class NormaliseQueryStringTestCase(TestCase):
+    """
+    Tests for the query string normalisation
+    """
+
+    def test_whitespace_collapsed(self) -> None:
+        """
+        Tests that runs of whitespace are collapsed in unquoted queries
+        """
+        self.assertEqual(normalise_query_string("  foo \t  bar "), "foo bar")
+
+    def test_quoted_whitespace_preserved(self) -> None:
+        """
+        Tests that whitespace isn't collapsed when it could be inside a quoted string
+        """
+        self.assertEqual(
+            normalise_query_string(' o:"draw  a card" '), 'o:"draw  a card"'
+        )
+
+
+class QueryParseCacheTestCase(TestCase):
+    """
+    Tests for the QueryParseCache
+    """
+
+    def setUp(self) -> None:
+        self.cache = QueryParseCache(max_size=2)
+
+    def test_hit_and_miss_counts(self) -> None:
+        """
+        Tests that repeated (and equivalent) queries are served from the cache
+        """
+        self.cache.parse("foo bar")
+        self.cache.parse("foo   bar")
+        self.cache.parse(" foo bar")
+        info = self.cache.cache_info()
+        self.assertEqual(info.misses, 1)
+        self.assertEqual(info.hits, 2)
+        self.assertEqual(info.current_size, 1)
+
+    def test_cached_tree_is_copied(self) -> None:
+        """
+        Tests that changes made to a returned tree don't affect later results
+        """
+        first = self.cache.parse("foo bar")
+        self.assertIsInstance(first, CardSearchAnd)
+        first.child_parameters[0].value = "baz"
+        first.negated = True
+
+        second = self.cache.parse("foo bar")
+        self.assertIsNot(first, second)
+        self.assertFalse(second.negated)
+        self.assertIsInstance(second.child_parameters[0], CardNameParam)
+        self.assertEqual(second.child_parameters[0].value, "foo")
+
+    def test_validation_does_not_leak(self) -> None:
+        """
+        Tests that validating a tree doesn't change the copy stored in the cache
+        """
+        first = self.cache.parse("m:2WW")
+        self.assertIsInstance(first, CardManaCostComplexParam)
+        first.validate(QueryContext())
+        self.assertEqual(first.generic_mana, 2)
+
+        second = self.cache.parse("m:2WW")
+        self.assertEqual(second.generic_mana, 0)
+        self.assertFalse(second.symbol_counts)
+
+    def test_least_recently_used_evicted(self) -> None:
+        """
+        Tests that the least recently used tree is removed when the cache is full
+        """
+        self.cache.parse("foo")
+        self.cache.parse("bar")
+        self.cache.parse("foo")
+        self.cache.parse("baz")
+        self.assertEqual(self.cache.cache_info().current_size, 2)
+        self.assertIsNone(self.cache.get("bar"))
+        self.assertIsNotNone(self.cache.get("foo"))
+
+    def test_parse_errors_not_cached(self) -> None:
+        """
+        Tests that a query that fails to parse is not stored
+        """
+        with self.assertRaises(ParseError):
+            self.cache.parse("(foo")
+        self.assertEqual(self.cache.cache_info().current_size, 0)
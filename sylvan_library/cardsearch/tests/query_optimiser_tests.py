@@ -0,0 +1,218 @@
+"""
+Tests for the query optimiser
+"""
+
+import datetime
+from typing import Set as SetType
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from sylvan_library.cards.models.card import Card, CardPrinting
+from sylvan_library.cards.tests import (
+    create_test_card,
+    create_test_card_face,
+    create_test_card_printing,
+    create_test_set,
+)
+from sylvan_library.cardsearch.parameters.base_parameters import (
+    CardSearchAnd,
+    CardSearchBranchNode,
+    CardSearchContext,
+    CardSearchOr,
+    QueryContext,
+)
+from sylvan_library.cardsearch.parameters.card_mana_cost_parameters import (
+    CardManaValueParam,
+)
+from sylvan_library.cardsearch.parameters.card_set_parameters import CardSetParam
+from sylvan_library.cardsearch.parameters.card_type_parameters import (
+    CardGenericTypeParam,
+)
+from sylvan_library.cardsearch.parser.query_parser import CardQueryParser
+from sylvan_library.cardsearch.query_optimiser import (
+    CardSearchAnyOf,
+    CardSearchNoMatch,
+    optimise_tree,
+)
+
+
+class QueryOptimiserTestCase(TestCase):
+    """
+    Tests for the query optimiser
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        old_set = create_test_set(
+            "Old Set", "OLD", {"release_date": datetime.date(2000, 1, 1)}
+        )
+        new_set = create_test_set(
+            "New Set", "NEW", {"release_date": datetime.date(2010, 1, 1)}
+        )
+        other_set = create_test_set(
+            "Other Set", "OTH", {"release_date": datetime.date(2020, 1, 1)}
+        )
+        for name, mana_value, sets in [
+            ("Alpha", 1, [old_set]),
+            ("Bravo", 2, [old_set, new_set]),
+            ("Charlie", 3, [new_set]),
+            ("Delta", 3, [other_set]),
+        ]:
+            card = create_test_card({"name": name, "mana_value": mana_value})
+            create_test_card_face(card, {"mana_value": mana_value})
+            for set_obj in sets:
+                create_test_card_printing(card, set_obj)
+
+    @staticmethod
+    def get_trees(query_string: str):
+        """
+        Gets the validated tree of the query, its optimised version and the query context
+        """
+        root_parameter = CardQueryParser().parse(query_string)
+        query_context = QueryContext(
+            search_mode=root_parameter.get_default_search_context()
+        )
+        root_parameter.validate(query_context)
+        return (
+            root_parameter,
+            optimise_tree(root_parameter, query_context),
+            query_context,
+        )
+
+    @staticmethod
+    def get_card_names(
+        root_parameter: CardSearchBranchNode, query_context: QueryContext
+    ) -> SetType[str]:
+        """
+        Gets the names of the cards that the given tree matches
+        """
+        query = root_parameter.query(query_context)
+        if query_context.search_mode == CardSearchContext.CARD:
+            queryset = Card.objects.filter(query)
+        else:
+            queryset = Card.objects.filter(
+                printings__in=CardPrinting.objects.filter(query)
+            )
+        return set(queryset.values_list("name", flat=True))
+
+    def assertSameResults(self, query_string: str) -> None:
+        """
+        Asserts that the optimised tree finds the same cards as the original tree
+        """
+        root_parameter, optimised, query_context = self.get_trees(query_string)
+        self.assertEqual(
+            self.get_card_names(optimised, query_context),
+            self.get_card_names(root_parameter, query_context),
+            query_string,
+        )
+
+    def test_flatten(self) -> None:
+        """
+        Tests that nested and/or nodes are flattened into their parents
+        """
+        _, optimised, _ = self.get_trees("t:creature (cmc>1 (t:elf cmc<3))")
+        self.assertIsInstance(optimised, CardSearchAnd)
+        self.assertEqual(len(optimised.child_parameters), 4)
+
+        _, optimised, _ = self.get_trees("t:elf or (t:goblin or (cmc>1 cmc<3))")
+        self.assertIsInstance(optimised, CardSearchOr)
+        self.assertEqual(len(optimised.child_parameters), 3)
+        self.assertIsInstance(optimised.child_parameters[2], CardSearchAnd)
+
+    def test_negated_branches_not_flattened(self) -> None:
+        """
+        Tests that negated branches are kept
+        """
+        _, optimised, _ = self.get_trees("cmc>1 -(t:elf cmc<3)")
+        self.assertEqual(len(optimised.child_parameters), 2)
+        self.assertTrue(
+            any(
+                isinstance(child, CardSearchAnd) and child.negated
+                for child in optimised.child_parameters
+            )
+        )
+
+    def test_merge_equality(self) -> None:
+        """
+        Tests that "or" parameters that check the same field are merged
+        """
+        _, optimised, _ = self.get_trees("s:old or s:new or cmc=3")
+        self.assertIsInstance(optimised, CardSearchOr)
+        any_of = optimised.child_parameters[0]
+        self.assertIsInstance(any_of, CardSearchAnyOf)
+        self.assertEqual(any_of.lookup, "set")
+        self.assertEqual([set_obj.code for set_obj in any_of.values], ["OLD", "NEW"])
+        self.assertIsInstance(optimised.child_parameters[1], CardManaValueParam)
+
+        _, optimised, _ = self.get_trees("cmc=1 or cmc=3 or cmc=1")
+        self.assertIsInstance(optimised, CardSearchAnyOf)
+        self.assertEqual(optimised.values, [1, 3])
+
+    def test_contradiction(self) -> None:
+        """
+        Tests that a search that needs a field to have two values is replaced
+        """
+        _, optimised, query_context = self.get_trees("cmc=1 cmc=3")
+        self.assertIsInstance(optimised, CardSearchNoMatch)
+        self.assertFalse(optimised.negated)
+        self.assertEqual(self.get_card_names(optimised, query_context), set())
+
+        # Printings can only be in one set
+        _, optimised, _ = self.get_trees("s:old s:new")
+        self.assertIsInstance(optimised, CardSearchNoMatch)
+
+    def test_hoist_no_match(self) -> None:
+        """
+        Tests that branches that can't match anything are removed from their parents
+        """
+        _, optimised, _ = self.get_trees("t:elf or (cmc=1 cmc=3)")
+        self.assertIsInstance(optimised, CardGenericTypeParam)
+
+        _, optimised, _ = self.get_trees("t:elf (cmc=2 or (cmc=1 cmc=3))")
+        self.assertEqual(
+            [type(child) for child in optimised.child_parameters],
+            [CardManaValueParam, CardGenericTypeParam],
+        )
+
+        _, optimised, _ = self.get_trees("t:elf -(cmc=1 cmc=3)")
+        self.assertIsInstance(optimised, CardGenericTypeParam)
+
+        _, optimised, _ = self.get_trees("-(cmc=1 cmc=3)")
+        self.assertIsInstance(optimised, CardSearchNoMatch)
+        self.assertTrue(optimised.negated)
+
+    def test_duplicates_removed(self) -> None:
+        """
+        Tests that the same equality check is only made once
+        """
+        _, optimised, _ = self.get_trees("cmc=3 t:elf cmc=3")
+        self.assertEqual(len(optimised.child_parameters), 2)
+
+    def test_selectivity_order(self) -> None:
+        """
+        Tests that the most selective parameters are queried first
+        """
+        _, optimised, _ = self.get_trees("cmc>1 t:creature s:old")
+        self.assertEqual(
+            [type(child) for child in optimised.child_parameters],
+            [CardSetParam, CardGenericTypeParam, CardManaValueParam],
+        )
+
+    def test_same_results(self) -> None:
+        """
+        Tests that the optimised trees find the same cards as the original trees
+        """
+        for query_string in [
+            "cmc=3",
+            "cmc=1 or cmc=3",
+            "cmc=1 cmc=3",
+            "-(cmc=1 cmc=3)",
+            "cmc>=2 (cmc<=3 (cmc=3 or cmc=2))",
+            "s:old or s:new",
+            "s:old s:new",
+            "s:old or (s:new cmc=3)",
+            "-(s:old or s:new)",
+            "s:old -s:new",
+        ]:
+            self.assertSameResults(query_string)
@@ -0,0 +1,81 @@
+"""
+Tests for the reference data cache
+"""
+
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from sylvan_library.cards.models.card import CardSubtype, CardType
+from sylvan_library.cards.models.sets import Block, Format
+from sylvan_library.cards.tests import create_test_rarity, create_test_set
+from sylvan_library.cardsearch.parameters.base_parameters import (
+    QueryContext,
+    QueryValidationError,
+)
+from sylvan_library.cardsearch.parameters.card_set_parameters import (
+    user_query_to_set,
+)
+from sylvan_library.cardsearch.parser.query_parser import CardQueryParser
+from sylvan_library.cardsearch.reference_data import ReferenceData
+
+
+class ReferenceDataTestCase(TestCase):
+    """
+    Tests for the reference data cache
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        block = Block.objects.create(name="Ravnica")
+        create_test_set(
+            "Ravnica: City of Guilds",
+            "RAV",
+            {"release_date": datetime.date(2005, 10, 7), "block_id": block.id},
+        )
+        create_test_set("Guildpact", "GPT", {"block_id": block.id, "type": "expansion"})
+        create_test_set("Guildpact Promos", "PGPT", {"type": "promo"})
+        Format.objects.create(name="Modern", code="modern")
+        create_test_rarity("Common", "C")
+        CardType.objects.create(name="Creature")
+        CardSubtype.objects.create(name="Elf")
+
+    def test_validate_without_queries(self) -> None:
+        """
+        Tests that validating a search doesn't query the reference data tables
+        """
+        ReferenceData.get()
+        root_parameter = CardQueryParser().parse(
+            "s:rav b:ravnica f:modern r:common t:elf"
+        )
+        with self.assertNumQueries(0):
+            root_parameter.validate(QueryContext())
+
+    def test_invalidated_on_save(self) -> None:
+        """
+        Tests that the reference data is reloaded after a set is added
+        """
+        with self.assertRaises(QueryValidationError):
+            user_query_to_set("DIS")
+        create_test_set("Dissension", "DIS", {})
+        self.assertEqual(user_query_to_set("DIS").name, "Dissension")
+
+    def test_set_matching(self) -> None:
+        """
+        Tests that sets are found by their code or part of their name
+        """
+        self.assertEqual(user_query_to_set("gpt").code, "GPT")
+        self.assertEqual(user_query_to_set("city of").code, "RAV")
+        # Promotional sets are ignored if a normal set also matches
+        self.assertEqual(user_query_to_set("guildpac").code, "GPT")
+        with self.assertRaises(QueryValidationError):
+            user_query_to_set("zendikar")
+
+    def test_block_from_set(self) -> None:
+        """
+        Tests that a block can be found using one of its sets
+        """
+        root_parameter = CardQueryParser().parse("b:gpt")
+        root_parameter.validate(QueryContext())
+        self.assertEqual(root_parameter.block_obj.name, "Ravnica")
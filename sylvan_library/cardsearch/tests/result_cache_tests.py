@@ -0,0 +1,152 @@
+"""
+Tests for the search result cache
+"""
+
+import datetime
+from typing import List
+
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from sylvan_library.cards.models.decks import Deck
+from sylvan_library.cards.tests import (
+    create_test_card,
+    create_test_card_face,
+    create_test_card_localisation,
+    create_test_card_printing,
+    create_test_language,
+    create_test_set,
+    create_test_user,
+)
+from sylvan_library.cardsearch.parameters.base_parameters import QueryContext
+from sylvan_library.cardsearch.parse_search import ParseSearch
+from sylvan_library.cardsearch.result_cache import (
+    CachedResultPaginator,
+    get_result_cache_key,
+    invalidate_search_results,
+)
+
+
+@override_settings(SEARCH_RESULT_CACHE_TIMEOUT=300, SEARCH_RESULT_CACHE_MAX_SIZE=10)
+class SearchResultCacheTestCase(TestCase):
+    """
+    Tests for the search result cache
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = create_test_user()
+        set_obj = create_test_set("Setty", "SET", {})
+        language = create_test_language("English", "en")
+        self.localisations = []
+        for idx in range(5):
+            card = create_test_card({"name": f"Card {idx}", "mana_value": 2})
+            create_test_card_face(card, {"mana_value": 2})
+            printing = create_test_card_printing(card, set_obj)
+            self.localisations.append(create_test_card_localisation(printing, language))
+
+    def search(self, query_string: str, page_number: int = 1) -> ParseSearch:
+        """
+        Runs a search with a page size of 2
+        """
+        search = ParseSearch(query_string, self.user)
+        search.build_parameters()
+        query_context = QueryContext(
+            user=self.user,
+            search_mode=search.root_parameter.get_default_search_context(),
+        )
+        search.root_parameter.validate(query_context)
+        search.search(query_context, page_number, page_size=2)
+        return search
+
+    @staticmethod
+    def get_names(search: ParseSearch) -> List[str]:
+        """
+        Gets the names of the cards that the search found
+        """
+        return [result.card.name for result in search.results]
+
+    def test_pages_use_cached_ids(self) -> None:
+        """
+        Tests that later pages of a search are found from the cached results
+        """
+        search = self.search("cmc=2")
+        self.assertIsInstance(search.paginator, CachedResultPaginator)
+        self.assertEqual(search.paginator.count, 5)
+        self.assertEqual(self.get_names(search), ["Card 0", "Card 1"])
+
+        create_test_card_face(create_test_card({"name": "Card 5", "mana_value": 2}))
+        search = self.search("  cmc=2 ", page_number=3)
+        self.assertEqual(self.get_names(search), ["Card 4"])
+        self.assertFalse(search.page.has_next())
+
+        invalidate_search_results()
+        search = self.search("cmc=2", page_number=3)
+        self.assertEqual(self.get_names(search), ["Card 4", "Card 5"])
+
+    @override_settings(SEARCH_RESULT_CACHE_MAX_SIZE=3)
+    def test_too_many_results(self) -> None:
+        """
+        Tests that searches with too many results aren't cached
+        """
+        search = self.search("cmc=2")
+        self.assertNotIsInstance(search.paginator, CachedResultPaginator)
+        search = self.search("cmc=2", page_number=2)
+        self.assertNotIsInstance(search.paginator, CachedResultPaginator)
+        self.assertEqual(self.get_names(search), ["Card 2", "Card 3"])
+
+    def test_user_specific_results(self) -> None:
+        """
+        Tests that the results of ownership searches are invalidated when the user's cards
+        change
+        """
+        self.localisations[0].apply_user_change(1, self.user)
+        self.assertEqual(self.get_names(self.search("own:any")), ["Card 0"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.localisations[1].apply_user_change(1, self.user)
+        self.assertEqual(self.get_names(self.search("own:any")), ["Card 0", "Card 1"])
+
+        search = ParseSearch("own:any cmc=2", self.user)
+        search.build_parameters()
+        other_search = ParseSearch("cmc=2", self.user)
+        other_search.build_parameters()
+        query_context = QueryContext(user=self.user)
+        self.assertIn(
+            f"user:{self.user.id}", search.get_result_cache_key(query_context)
+        )
+        self.assertIn(":all:", other_search.get_result_cache_key(query_context))
+
+    def test_invalidation_shared_between_processes(self) -> None:
+        """
+        Tests that the versions of the results are kept outside of the cache, so that other
+        processes (with their own caches) see them change
+        """
+        shared_key = get_result_cache_key("cmc=2")
+        user_key = get_result_cache_key("own:any", self.user.id)
+        cache.clear()
+        self.assertEqual(get_result_cache_key("cmc=2"), shared_key)
+
+        invalidate_search_results(self.user.id)
+        self.assertEqual(get_result_cache_key("cmc=2"), shared_key)
+        self.assertNotEqual(get_result_cache_key("own:any", self.user.id), user_key)
+
+        invalidate_search_results()
+        self.assertNotEqual(get_result_cache_key("cmc=2"), shared_key)
+
+    def test_previous_owner_results(self) -> None:
+        """
+        Tests that the results of both users are invalidated when a deck changes owner
+        """
+        deck = Deck.objects.create(
+            owner=self.user,
+            name="Decky",
+            format="edh",
+            date_created=datetime.date.today(),
+        )
+        user_key = get_result_cache_key("used:any", self.user.id)
+        deck.owner = get_user_model().objects.create(username="otheruser")
+        with self.captureOnCommitCallbacks(execute=True):
+            deck.save()
+        self.assertNotEqual(get_result_cache_key("used:any", self.user.id), user_key)
@@ -0,0 +1,189 @@
+"""
+Tests for building the search metadata of cards and card faces
+"""
+
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from sylvan_library.cards.tests import (
+    create_test_card,
+    create_test_card_face,
+    create_test_card_printing,
+    create_test_set,
+)
+from sylvan_library.cards.models.card import Card, CardFace, CardType
+from sylvan_library.cardsearch.parameters.base_parameters import QueryContext
+from sylvan_library.cardsearch.parse_search import ParseSearch
+from sylvan_library.cardsearch.models import (
+    CardFaceSearchMetadata,
+    CardSearchMetadata,
+    DirtyCardFaceSearchMetadata,
+    DirtyCardSearchMetadata,
+)
+from sylvan_library.cardsearch.result_cache import (
+    CachedResultPaginator,
+    get_cached_result_ids,
+)
+from sylvan_library.cardsearch.search_metadata import (
+    build_metadata_for_card,
+    build_metadata_for_card_face,
+    bulk_build_metadata_for_card_faces,
+    bulk_build_metadata_for_cards,
+)
+
+
+class SearchMetadataTestCase(TestCase):
+    """
+    Tests for building the search metadata
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.old_set = create_test_set(
+            "Old Set",
+            "OLD",
+            {"release_date": datetime.date(2000, 1, 1), "type": "expansion"},
+        )
+        self.new_set = create_test_set(
+            "New Set",
+            "NEW",
+            {"release_date": datetime.date(2010, 1, 1), "type": "expansion"},
+        )
+        self.promo_set = create_test_set(
+            "Promo Set",
+            "PRM",
+            {"release_date": datetime.date(2020, 1, 1), "type": "promo"},
+        )
+
+        self.reprinted_card = create_test_card({"name": "Reprinted Card"})
+        self.reprinted_face = create_test_card_face(self.reprinted_card)
+        self.old_printing = create_test_card_printing(self.reprinted_card, self.old_set)
+        self.new_printing = create_test_card_printing(
+            self.reprinted_card, self.new_set, {"numerical_number": 2}
+        )
+        create_test_card_printing(
+            self.reprinted_card, self.new_set, {"numerical_number": 10}
+        )
+        create_test_card_printing(self.reprinted_card, self.promo_set)
+
+        self.promo_card = create_test_card({"name": "Promo Card"})
+        create_test_card_face(self.promo_card)
+        self.promo_printing = create_test_card_printing(self.promo_card, self.promo_set)
+
+    def test_bulk_metadata(self) -> None:
+        """
+        Tests that building the metadata in bulk gives the same result as building it for
+        each card, with a fixed number of queries
+        """
+        call_command("update_search_metadata", "--bulk", "--chunk-size=1")
+        self.assertEqual(CardFaceSearchMetadata.objects.count(), 2)
+        self.reprinted_card.refresh_from_db()
+        self.assertEqual(
+            self.reprinted_card.search_metadata.preferred_printing, self.new_printing
+        )
+        self.assertFalse(build_metadata_for_card(self.reprinted_card))
+
+        self.reprinted_card.search_metadata.preferred_printing = self.old_printing
+        self.reprinted_card.search_metadata.save()
+        for idx in range(3):
+            card = create_test_card({"name": f"Card {idx}"})
+            create_test_card_face(card)
+            create_test_card_printing(card, self.new_set)
+        with self.assertNumQueries(11):
+            self.assertEqual(bulk_build_metadata_for_cards(Card.objects.all()), (5, 4))
+        self.reprinted_card.refresh_from_db()
+        self.assertEqual(
+            self.reprinted_card.search_metadata.preferred_printing, self.new_printing
+        )
+
+    def test_parallel_metadata(self) -> None:
+        """
+        Tests that the card face metadata built in worker processes is the same
+        """
+        self.reprinted_face.rules_text = "{T}: Add {G}. (This is reminder text.)"
+        self.reprinted_face.mana_cost = "{2}{G}{G}"
+        self.reprinted_face.save()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(
+                bulk_build_metadata_for_card_faces(
+                    CardFace.objects.all(), executor=executor
+                ),
+                (2, 2),
+            )
+        metadata = CardFaceSearchMetadata.objects.get(card_face=self.reprinted_face)
+        self.assertEqual(metadata.rules_without_reminders, "{T}: Add {G}. ")
+        self.assertEqual(metadata.symbol_count_g, 2)
+        self.assertEqual(metadata.symbol_count_generic, 2)
+        self.assertTrue(metadata.produces_g)
+        self.assertFalse(build_metadata_for_card_face(self.reprinted_face))
+        self.assertEqual(
+            bulk_build_metadata_for_card_faces(CardFace.objects.all()), (2, 0)
+        )
+
+    def test_super_sort_key(self) -> None:
+        """
+        Tests that cards are sorted by the parts of their super sort key
+        """
+        for name, type_name in [
+            ("Forest Land", "Land"),
+            ("Alpha Instant", "Instant"),
+            ("Zebra Creature", "Creature"),
+        ]:
+            card = create_test_card({"name": name})
+            face = create_test_card_face(card)
+            face.types.add(CardType.objects.get_or_create(name=type_name)[0])
+            build_metadata_for_card(card)
+        self.assertEqual(
+            CardSearchMetadata.objects.get(card__name="Alpha Instant").super_sort_slug,
+            "alpha-instant",
+        )
+
+        search = ParseSearch("sort:key")
+        search.build_parameters()
+        search.search(QueryContext())
+        self.assertEqual(
+            [result.card.name for result in search.results][:3],
+            ["Zebra Creature", "Alpha Instant", "Forest Land"],
+        )
+
+    def test_incremental_metadata(self) -> None:
+        """
+        Tests that an incremental rebuild only builds the metadata of changed cards
+        """
+        DirtyCardSearchMetadata.mark([self.promo_card.id])
+        DirtyCardFaceSearchMetadata.mark([self.reprinted_face.id])
+        DirtyCardFaceSearchMetadata.mark([self.reprinted_face.id])
+        call_command("update_search_metadata", "--incremental")
+        self.assertEqual(
+            list(CardSearchMetadata.objects.values_list("card_id", flat=True)),
+            [self.promo_card.id],
+        )
+        self.assertEqual(
+            list(CardFaceSearchMetadata.objects.values_list("card_face_id", flat=True)),
+            [self.reprinted_face.id],
+        )
+        self.assertFalse(DirtyCardSearchMetadata.objects.exists())
+        self.assertFalse(DirtyCardFaceSearchMetadata.objects.exists())
+
+    @override_settings(SEARCH_RESULT_CACHE_TIMEOUT=300)
+    def test_cached_results_invalidated(self) -> None:
+        """
+        Tests that results cached before the metadata is rebuilt aren't used afterwards
+        """
+        search = ParseSearch("sort:key")
+        search.build_parameters()
+        search.search(QueryContext())
+        self.assertIsInstance(search.paginator, CachedResultPaginator)
+        cache_key = search.get_result_cache_key(QueryContext())
+
+        call_command("update_search_metadata", "--incremental")
+        self.assertNotEqual(search.get_result_cache_key(QueryContext()), cache_key)
+        call_command("update_search_metadata")
+        self.assertNotEqual(search.get_result_cache_key(QueryContext()), cache_key)
+        self.assertIsNone(
+            get_cached_result_ids(search.get_result_cache_key(QueryContext()))
+        )
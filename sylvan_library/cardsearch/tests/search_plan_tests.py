@@ -0,0 +1,116 @@
+"""
+Tests for the search planner
+"""
+
+import datetime
+from typing import List
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from sylvan_library.cards.tests import (
+    create_test_card,
+    create_test_card_face,
+    create_test_card_printing,
+    create_test_set,
+)
+from sylvan_library.cardsearch.parameters.base_parameters import QueryContext
+from sylvan_library.cardsearch.parse_search import ParseSearch
+from sylvan_library.cardsearch.search_plan import SearchPlanKind
+
+
+@override_settings(SEARCH_CARD_INDEX=False, SEARCH_RESULT_CACHE_TIMEOUT=0)
+class SearchPlanTestCase(TestCase):
+    """
+    Tests for the search planner
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        old_set = create_test_set(
+            "Old Set", "OLD", {"release_date": datetime.date(2000, 1, 1)}
+        )
+        new_set = create_test_set(
+            "New Set", "NEW", {"release_date": datetime.date(2010, 1, 1)}
+        )
+        for name, mana_value, sets in [
+            ("Alpha", 1, [old_set]),
+            ("Bravo", 2, [old_set, new_set]),
+            ("Charlie", 3, [new_set]),
+        ]:
+            card = create_test_card({"name": name, "mana_value": mana_value})
+            create_test_card_face(card, {"mana_value": mana_value})
+            for set_obj in sets:
+                create_test_card_printing(card, set_obj)
+
+    @staticmethod
+    def get_search(query_string: str):
+        """
+        Gets the search and its ordered queryset
+        """
+        search = ParseSearch(query_string)
+        search.build_parameters()
+        query_context = QueryContext(
+            search_mode=search.root_parameter.get_default_search_context()
+        )
+        search.root_parameter.validate(query_context)
+        return search, search.get_queryset(query_context)
+
+    def get_names(self, query_string: str) -> List[str]:
+        """
+        Gets the names of the cards that a search finds
+        """
+        _, queryset = self.get_search(query_string)
+        return list(queryset.values_list("name", flat=True))
+
+    def test_plan_kinds(self) -> None:
+        """
+        Tests that the plan is chosen by the search mode and selectivity
+        """
+        search, queryset = self.get_search("cmc>1")
+        self.assertEqual(search.plan.kind, SearchPlanKind.CARD)
+        self.assertTrue(queryset.query.distinct)
+
+        search, queryset = self.get_search("s:old")
+        self.assertEqual(search.plan.kind, SearchPlanKind.PRINTING_SUBQUERY)
+        self.assertFalse(queryset.query.distinct)
+
+        search, queryset = self.get_search("-s:old")
+        self.assertEqual(search.plan.kind, SearchPlanKind.PRINTING_EXISTS)
+        self.assertFalse(queryset.query.distinct)
+
+    def test_printing_results(self) -> None:
+        """
+        Tests that each card is found once, however many of its printings match
+        """
+        self.assertEqual(self.get_names("s:old"), ["Alpha", "Bravo"])
+        self.assertEqual(self.get_names("-s:old"), ["Bravo", "Charlie"])
+        self.assertEqual(
+            self.get_names("s:old or s:new"), ["Alpha", "Bravo", "Charlie"]
+        )
+        self.assertEqual(self.get_names("s:new sort:cmc"), ["Bravo", "Charlie"])
+
+    def test_printing_sort(self) -> None:
+        """
+        Tests that sorting by a printing field sorts by the matching printings, and doesn't
+        find a card once for each of its printings
+        """
+        self.assertEqual(self.get_names("s:old sort:date"), ["Alpha", "Bravo"])
+        self.assertEqual(self.get_names("s:new sort:date"), ["Bravo", "Charlie"])
+        self.assertEqual(self.get_names("s:new -sort:date"), ["Bravo", "Charlie"])
+        search, _ = self.get_search("s:old sort:date")
+        self.assertEqual(search.plan.kind, SearchPlanKind.PRINTING_JOIN)
+
+    @override_settings(DEBUG=True)
+    def test_explain_in_debug(self) -> None:
+        """
+        Tests that the query plan of the database is found when debugging
+        """
+        search = ParseSearch("s:old")
+        search.build_parameters()
+        query_context = QueryContext(
+            search_mode=search.root_parameter.get_default_search_context()
+        )
+        search.root_parameter.validate(query_context)
+        search.search(query_context)
+        self.assertIn("cards_cardprinting", search.plan.explain)
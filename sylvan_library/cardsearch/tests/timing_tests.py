@@ -0,0 +1,49 @@
+"""
+Tests for the search timings
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from sylvan_library.cards.tests import create_test_card, create_test_card_face
+from sylvan_library.cardsearch.timing import SearchTimings
+from sylvan_library.website.forms import QuerySearchForm
+
+
+class SearchTimingsTestCase(TestCase):
+    """
+    Tests for the search timings
+    """
+
+    def setUp(self) -> None:
+        cache.clear()
+        card = create_test_card({"name": "Alpha", "mana_value": 2})
+        create_test_card_face(card, {"mana_value": 2})
+
+    @override_settings(SEARCH_TIMING=True)
+    def test_search_stages(self) -> None:
+        """
+        Tests that each stage of a search is timed
+        """
+        search, _ = QuerySearchForm({"query_string": "cmc=2"}).get_search(user=None)
+        self.assertEqual(len(search.results), 1)
+        for stage in ("parse", "validate", "plan", "compile", "db", "hydrate", "count"):
+            self.assertIn(stage, search.timings.durations)
+        self.assertRegex(
+            search.timings.get_server_timing(), r"^parse;dur=\d+\.\d, validate;dur="
+        )
+
+    def test_disabled(self) -> None:
+        """
+        Tests that nothing is timed unless timing is turned on
+        """
+        search, _ = QuerySearchForm({"query_string": "cmc=2"}).get_search(user=None)
+        self.assertFalse(search.timings.enabled)
+        self.assertEqual(search.timings.durations, {})
+
+        timings = SearchTimings(enabled=True)
+        with timings.measure("db"):
+            pass
+        with timings.measure("db"):
+            pass
+        self.assertEqual(list(timings.durations), ["db"])
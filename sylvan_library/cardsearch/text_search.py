@@ -0,0 +1,123 @@
+"""
+Module for searching the text columns of cards (names, rules text and flavour text)
+
+On PostgreSQL, substring searches are made using ILIKE on the raw column instead of comparing
+the UPPER() of every row, so that they can use the pg_trgm GIN indexes created by the
+cardsearch migrations (regular expression searches with ~* can use the same indexes).
+If the pg_trgm extension isn't available the indexes aren't created, and the same queries
+are run without them
+"""
+
+import logging
+from typing import List, Tuple
+
+from django.db import DatabaseError, transaction
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.models import CharField, TextField
+from django.db.models.lookups import IContains
+
+logger = logging.getLogger("django")
+
+TRIGRAM_EXTENSION = "pg_trgm"
+
+# The (table, column) pairs that are searched by text parameters
+TRIGRAM_INDEXED_COLUMNS: List[Tuple[str, str]] = [
+    ("cards_card", "name"),
+    ("cards_cardface", "rules_text"),
+    ("cards_cardfaceprinting", "flavour_text"),
+    ("cards_cardfaceprinting", "original_text"),
+]
+
+
+@CharField.register_lookup
+@TextField.register_lookup
+class TrigramContains(IContains):
+    """
+    A case insensitive substring lookup that can use a trigram index on PostgreSQL
+    Other databases fall back to the normal icontains lookup
+    """
+
+    lookup_name = "trigram_contains"
+
+    def as_sql(self, compiler, connection) -> Tuple[str, list]:
+        return IContains(self.lhs, self.rhs).as_sql(compiler, connection)
+
+    def as_postgresql(self, compiler, connection) -> Tuple[str, list]:
+        lhs_sql, params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        params.extend(rhs_params)
+        if self.rhs_is_direct_value():
+            # The value has already been escaped and wrapped in wildcards
+            return f"{lhs_sql} ILIKE {rhs_sql}", params
+        pattern = connection.pattern_esc.format(rhs_sql)
+        return f"{lhs_sql} ILIKE '%%' || {pattern} || '%%'", params
+
+
+def get_trigram_index_name(table: str, column: str) -> str:
+    """
+    Gets the name of the trigram index of the given column
+    :param table: The name of the table
+    :param column: The name of the column
+    :return: The name of the index
+    """
+    return f"{table}_{column}_trgm_idx"
+
+
+def create_trigram_indexes(schema_editor: BaseDatabaseSchemaEditor) -> bool:
+    """
+    Creates the trigram indexes for all the searched text columns
+    Nothing is created if the database isn't PostgreSQL, or if the pg_trgm extension can't be
+    installed (for example if the database user isn't allowed to)
+    :param schema_editor: The schema editor of the migration
+    :return: True if the indexes were created, otherwise False
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return False
+
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute(f"CREATE EXTENSION IF NOT EXISTS {TRIGRAM_EXTENSION}")
+    except DatabaseError:
+        logger.warning(
+            "The %s extension isn't available, so text searches won't be indexed",
+            TRIGRAM_EXTENSION,
+        )
+        return False
+
+    for table, column in TRIGRAM_INDEXED_COLUMNS:
+        index_name = get_trigram_index_name(table, column)
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} "
+            f"ON {table} USING gin ({column} gin_trgm_ops)"
+        )
+    return True
+
+
+def drop_trigram_indexes(schema_editor: BaseDatabaseSchemaEditor) -> None:
+    """
+    Drops the trigram indexes created by create_trigram_indexes (if they exist)
+    The extension itself is left installed, as other databases objects may use it
+    :param schema_editor: The schema editor of the migration
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table, column in TRIGRAM_INDEXED_COLUMNS:
+        schema_editor.execute(
+            f"DROP INDEX IF EXISTS {get_trigram_index_name(table, column)}"
+        )
+
+
+def get_text_lookup(column_name: str, regex_match: bool, exact_match: bool) -> str:
+    """
+    Gets the lookup that should be used to search the given text column
+    :param column_name: The column (or the path to it)
+    :param regex_match: Whether the value is a regular expression
+    :param exact_match: Whether the whole column has to match the value
+    :return: The lookup path
+    """
+    if regex_match:
+        return f"{column_name}__iregex"
+    if exact_match:
+        return f"{column_name}__iexact"
+    return f"{column_name}__trigram_contains"
@@ -0,0 +1,73 @@
+"""
+Module for measuring how long each stage of a search takes
+
+Timing is turned on with the SEARCH_TIMING setting. When it is on, the time of each stage is
+logged after the search, and the search view sends it to the browser in a Server-Timing header
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger("django")
+
+
+class SearchTimings:
+    """
+    The time taken by each stage of a search
+    """
+
+    def __init__(self, enabled: Optional[bool] = None) -> None:
+        self.enabled: bool = (
+            getattr(settings, "SEARCH_TIMING", False) if enabled is None else enabled
+        )
+        # The total time of each stage in seconds, in the order they were first run
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """
+        Measures the time taken by the code inside the context, and adds it to the stage
+        Nothing is measured if timing isn't enabled
+        :param stage: The name of the stage (for example "parse" or "db")
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[stage] = (
+                self.durations.get(stage, 0.0) + time.perf_counter() - start
+            )
+
+    def get_server_timing(self) -> str:
+        """
+        Gets the value of the Server-Timing header for these timings
+        :return: The header value (for example "parse;dur=1.2, db;dur=10.5")
+        """
+        return ", ".join(
+            f"{stage};dur={duration * 1000:.1f}"
+            for stage, duration in self.durations.items()
+        )
+
+    def log(self, description: str) -> None:
+        """
+        Logs the timings if timing is enabled
+        :param description: A description of the search
+        """
+        if not self.enabled or not self.durations:
+            return
+        logger.info(
+            "Search timings for %s: %s",
+            description,
+            " ".join(
+                f"{stage}={duration * 1000:.1f}ms"
+                for stage, duration in self.durations.items()
+            ),
+        )
@@ -8,4 +8,6 @@ from sylvan_library.cardsearch import views
 
 urlpatterns = [
     path("search/", views.CardSearchView.as_view(), name="card_search"),
+    path("batch/", views.CardBatchSearchView.as_view(), name="card_batch_search"),
+    path("export/", views.card_search_export, name="card_search_export"),
 ]
@@ -1,10 +1,24 @@
 """
 Card search views
 """
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from rest_framework import permissions, status
 from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from sylvan_library.cardsearch.base_search import SearchResult
+from sylvan_library.cardsearch.batch_search import run_batch_search
+from sylvan_library.cardsearch.export import (
+    get_csv_lines,
+    get_export_rows,
+    get_ndjson_lines,
+)
+from sylvan_library.cardsearch.parameters.base_parameters import (
+    QueryContext,
+    QueryValidationError,
+)
 from sylvan_library.cardsearch.parse_search import ParseSearch
 from sylvan_library.cardsearch.serializers import SearchResultSerializer
 
@@ -31,3 +45,92 @@ class CardSearchView(ListAPIView):
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
+
+
+class CardBatchSearchView(APIView):
+    """
+    An API view for running many searches in a single request
+    The body should have a list of query strings as "queries", and can have the number of
+    results to return for each query as "page_size"
+    """
+
+    # Searching doesn't change anything, even though the queries are posted
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, *args, **kwargs):
+        queries = request.data.get("queries")
+        if not isinstance(queries, list) or not all(
+            isinstance(query, str) for query in queries
+        ):
+            return Response(
+                {"error": "queries must be a list of strings"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_queries = settings.SEARCH_BATCH_MAX_QUERIES
+        if len(queries) > max_queries:
+            return Response(
+                {"error": f"No more than {max_queries} queries can be sent at once"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            page_size = min(max(int(request.data.get("page_size", 25)), 1), 100)
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "page_size must be a number"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        user = request.user if request.user.is_authenticated else None
+        searches = run_batch_search(queries, user=user, page_size=page_size)
+        return Response(
+            {
+                "results": [
+                    {
+                        "query": search.query_string,
+                        "error": search.error_message,
+                        "results": SearchResultSerializer(
+                            search.results, many=True
+                        ).data,
+                    }
+                    for search in searches
+                ]
+            }
+        )
+
+
+def card_search_export(request: HttpRequest) -> HttpResponse:
+    """
+    Streams every result of a search as newline delimited JSON (or CSV if the format
+    parameter is "csv")
+    :param request: The request, with the query string in the "q" parameter
+    :return: The streaming response, or an error response if the query is invalid
+    """
+    export_format = request.GET.get("format", "ndjson")
+    if export_format not in ("ndjson", "csv"):
+        return JsonResponse({"error": f"Unknown format {export_format}"}, status=400)
+
+    user = request.user if request.user.is_authenticated else None
+    search = ParseSearch(request.GET.get("q", ""), user)
+    search.build_parameters()
+    if search.error_message:
+        return JsonResponse({"error": search.error_message}, status=400)
+
+    query_context = QueryContext(
+        user=user, search_mode=search.root_parameter.get_default_search_context()
+    )
+    try:
+        search.root_parameter.validate(query_context)
+    except QueryValidationError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    rows = get_export_rows(search.get_queryset(query_context))
+    if export_format == "csv":
+        response = StreamingHttpResponse(get_csv_lines(rows), content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="cards.csv"'
+    else:
+        response = StreamingHttpResponse(
+            get_ndjson_lines(rows), content_type="application/x-ndjson"
+        )
+    return response
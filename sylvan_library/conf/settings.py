@@ -104,6 +104,29 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 10,
 }
 
+# How long (in seconds) the number of results of a search is cached for
+SEARCH_COUNT_CACHE_TIMEOUT = env.int("SEARCH_COUNT_CACHE_TIMEOUT", default=300)
+# Searches that the query planner expects to have more results than this show the estimate
+# instead of counting every result (0 to always count)
+SEARCH_COUNT_ESTIMATE_THRESHOLD = env.int("SEARCH_COUNT_ESTIMATE_THRESHOLD", default=0)
+# Whether card searches should be run against an in-memory copy of the card data where possible
+# (this requires NumPy, and a cache shared between processes for imports to refresh it)
+SEARCH_CARD_INDEX = env.bool("SEARCH_CARD_INDEX", default=False)
+# The number of seconds before the in-memory card data is reloaded anyway (0 to never reload it)
+SEARCH_CARD_INDEX_MAX_AGE = env.int("SEARCH_CARD_INDEX_MAX_AGE", default=3600)
+# The number of seconds before the cached sets, formats, types etc. used to validate searches
+# are reloaded anyway (0 to only reload them when they change)
+SEARCH_REFERENCE_DATA_MAX_AGE = env.int("SEARCH_REFERENCE_DATA_MAX_AGE", default=3600)
+# The number of seconds that the IDs of the results of a search are cached for, so that other
+# pages of the results don't need to run the search again (0 to disable)
+SEARCH_RESULT_CACHE_TIMEOUT = env.int("SEARCH_RESULT_CACHE_TIMEOUT", default=300)
+# Searches with more results than this aren't cached (0 to cache any number of results)
+SEARCH_RESULT_CACHE_MAX_SIZE = env.int("SEARCH_RESULT_CACHE_MAX_SIZE", default=5000)
+# Whether the time taken by each stage of a search is logged and sent in a Server-Timing header
+SEARCH_TIMING = env.bool("SEARCH_TIMING", default=False)
+# The largest number of queries that can be sent to the batch search API at once
+SEARCH_BATCH_MAX_QUERIES = env.int("SEARCH_BATCH_MAX_QUERIES", default=500)
+
 # Disable browsable API when in production
 if not DEBUG:
     REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = (
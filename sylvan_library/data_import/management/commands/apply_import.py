@@ -25,12 +25,21 @@ from sylvan_library.cards.models.card import (
     CardLocalisation,
     CardFacePrinting,
     CardFaceLocalisation,
+    UserOwnershipTotal,
 )
 from sylvan_library.cards.models.language import Language
 from sylvan_library.cards.models.legality import CardLegality
 from sylvan_library.cards.models.rarity import Rarity
 from sylvan_library.cards.models.ruling import CardRuling
 from sylvan_library.cards.models.sets import Set, Block, Format
+from sylvan_library.cardsearch.card_index import CardIndex
+from sylvan_library.cardsearch.models import (
+    CardPauperCandidate,
+    DirtyCardFaceSearchMetadata,
+    DirtyCardSearchMetadata,
+)
+from sylvan_library.cardsearch.reference_data import ReferenceData
+from sylvan_library.cardsearch.result_cache import invalidate_search_results
 from sylvan_library.data_import.models import (
     UpdateBlock,
     UpdateSet,
@@ -66,9 +75,13 @@ class Command(BaseCommand):
     cached_languages: Optional[Dict[str, Language]] = None
     scryfall_oracle_id_to_card_id: Dict[str, int] = None
     scryfall_id_to_card_printing_id: Dict[str, int] = None
+    card_printing_id_to_card_id: Dict[int, int] = None
 
     def __init__(self, stdout=None, stderr=None, no_color=False):
         self.logger = logging.getLogger("django")
+        # The cards and card faces whose search metadata is changed by the import
+        self.dirty_card_ids: set[int] = set()
+        self.dirty_card_face_ids: set[int] = set()
         super().__init__(stdout=stdout, stderr=stderr, no_color=no_color)
 
     def add_arguments(self, parser: CommandParser) -> None:
@@ -97,6 +110,16 @@ class Command(BaseCommand):
             ):
                 raise Exception("Change application aborted")
 
+            # Printings can be moved to other cards, which changes the ownership totals
+            UserOwnershipTotal.rebuild_all()
+            CardPauperCandidate.rebuild()
+            DirtyCardSearchMetadata.mark(self.dirty_card_ids)
+            DirtyCardFaceSearchMetadata.mark(self.dirty_card_face_ids)
+
+        CardIndex.invalidate()
+        ReferenceData.invalidate()
+        invalidate_search_results()
+
     def get_language(self, language_name: str) -> Language:
         if not self.cached_languages:
             self.cached_languages = {
@@ -131,6 +154,21 @@ class Command(BaseCommand):
         self.scryfall_id_to_card_printing_id[scryfall_id] = card_printing.id
         return card_printing.id
 
+    def get_printing_card_id(self, card_printing_id: int) -> int:
+        if not self.card_printing_id_to_card_id:
+            self.card_printing_id_to_card_id = dict(
+                CardPrinting.objects.values_list("id", "card_id")
+            )
+        card_id = self.card_printing_id_to_card_id.get(card_printing_id)
+        if card_id:
+            return card_id
+
+        card_id = CardPrinting.objects.values_list("card_id", flat=True).get(
+            id=card_printing_id
+        )
+        self.card_printing_id_to_card_id[card_printing_id] = card_id
+        return card_id
+
     def update_blocks(self) -> bool:
         """
         Creates new Block objects
@@ -236,6 +274,7 @@ class Command(BaseCommand):
                         f"Cannot update unrecognised field Card.{field}"
                     )
             card.save()
+            self.dirty_card_ids.add(card.id)
         return True
 
     def update_card_faces(self) -> bool:
@@ -281,6 +320,8 @@ class Command(BaseCommand):
             except (ValidationError, DataError):
                 self.logger.exception("Could not %s", card_face_update)
                 raise
+            self.dirty_card_face_ids.add(card_face.id)
+            self.dirty_card_ids.add(card_face.card_id)
 
             self.apply_card_face_types(
                 card_face,
@@ -466,6 +507,8 @@ class Command(BaseCommand):
             except IntegrityError:
                 self.logger.exception("Failed to created %s", update_card_printing)
                 raise
+            # The sort key, preferred printing etc. of a card depend on its printings
+            self.dirty_card_ids.add(printing.card_id)
         if duplicate_card_printings:
             for duplicate in duplicate_card_printings:
                 self.logger.error(
@@ -594,6 +637,10 @@ class Command(BaseCommand):
             except ValidationError:
                 self.logger.error("Failed to validate %s", update_localisation)
                 raise
+            # The preferred image of a card depends on its localisations
+            self.dirty_card_ids.add(
+                self.get_printing_card_id(localisation.card_printing_id)
+            )
 
         return True
 
@@ -656,5 +703,8 @@ class Command(BaseCommand):
             except DatabaseError:
                 self.logger.exception("Failed to save %s", update_face_localisation)
                 raise
+            self.dirty_card_ids.add(
+                self.get_printing_card_id(localisation.card_printing_id)
+            )
 
         return True
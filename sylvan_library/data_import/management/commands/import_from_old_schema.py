@@ -7,13 +7,14 @@ from django.db import transaction
 
 from sylvan_library.cards.models.card import (
     UserOwnedCard,
+    UserOwnershipTotal,
     UserCardChange,
     CardLocalisation,
     CardPrinting,
     Card,
 )
 from sylvan_library.cards.models.colour import Colour
-from sylvan_library.cards.models.decks import Deck, DeckCard
+from sylvan_library.cards.models.decks import Deck, DeckCard, UserCardDeckUsage
 from sylvan_library.data_import._query import query_yes_no
 
 logger = logging.getLogger("django")
@@ -155,6 +156,8 @@ ORDER BY user_owned_card.id ASC
                 owner=user, card_localisation=localisation, count=count
             )
 
+        UserOwnershipTotal.rebuild_all()
+
     def import_user_card_changes(self, connection, remove_existing: bool):
         cur = connection.cursor()
 
@@ -365,3 +368,5 @@ WHERE deckcard.deck_id = %s
                     board=deck_board,
                     is_commander=is_commander,
                 )
+
+        UserCardDeckUsage.refresh()
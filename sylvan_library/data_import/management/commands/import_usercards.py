@@ -13,6 +13,7 @@ from sylvan_library.cards.models.card import (
     CardPrinting,
     CardLocalisation,
     UserOwnedCard,
+    UserOwnershipTotal,
 )
 from sylvan_library.cards.models.language import Language
 from sylvan_library.cards.models.sets import Set
@@ -71,6 +72,8 @@ class Command(BaseCommand):
                     logger.info("Set ID: %s", cardset.id)
                     self.import_usercard(card, cardset, int(number))
 
+            UserOwnershipTotal.rebuild_all(self.user)
+
     def import_usercard(self, card: Card, cardset: Set, count: int):
         """
         Imports a single user owned card
@@ -15,10 +15,12 @@ from sylvan_library.cards.models.card import (
     CardFacePrinting,
     CardLocalisation,
     UserOwnedCard,
+    UserCardOwnershipTotal,
+    UserPrintingOwnershipTotal,
     UserCardChange,
 )
 from sylvan_library.cards.models.colour import Colour
-from sylvan_library.cards.models.decks import DeckCard, Deck
+from sylvan_library.cards.models.decks import DeckCard, Deck, UserCardDeckUsage
 from sylvan_library.cards.models.language import Language
 from sylvan_library.cards.models.legality import CardLegality
 from sylvan_library.cards.models.rarity import Rarity
@@ -67,12 +69,15 @@ class Command(BaseCommand):
         if not confirm:
             return
 
+        truncate_model(UserCardDeckUsage)
         truncate_model(DeckCard)
         truncate_model(Deck)
         truncate_model(CardTag)
         truncate_model(CardRuling)
         truncate_model(CardLegality)
         truncate_model(UserCardChange)
+        truncate_model(UserCardOwnershipTotal)
+        truncate_model(UserPrintingOwnershipTotal)
         truncate_model(UserOwnedCard)
         truncate_model(CardLocalisation)
         truncate_model(CardFacePrinting)
@@ -3,6 +3,15 @@ The module for staging tests
 """
 
 from django.test import TestCase
+
+from sylvan_library.cards.models.language import Language
+from sylvan_library.cards.tests import (
+    create_test_card,
+    create_test_card_printing,
+    create_test_set,
+)
+from sylvan_library.data_import.management.commands.apply_import import Command
+from sylvan_library.data_import.models import UpdateCardLocalisation, UpdateMode
 from sylvan_library.data_import.staging import (
     StagedCard,
     StagedCardFace,
@@ -98,3 +107,27 @@ class NumberConversionTestCase(TestCase):
         for param1, param2 in param_list:
             with self.subTest():
                 self.assertEqual(convert_number_field_to_numerical(param1), param2)
+
+
+class ApplyImportTestCase(TestCase):
+    """
+    Test cases for applying an import
+    """
+
+    def test_localisation_marks_card_dirty(self):
+        """
+        Tests that adding a localisation marks its card for a search metadata rebuild
+        """
+        card = create_test_card({"name": "Shock"})
+        printing = create_test_card_printing(card, create_test_set("Setty", "SET", {}))
+        language, _ = Language.objects.get_or_create(name="English", code="en")
+        UpdateCardLocalisation.objects.create(
+            update_mode=UpdateMode.CREATE,
+            language_code=language.name,
+            printing_scryfall_id=printing.scryfall_id,
+            card_name="Shock",
+            field_data={},
+        )
+        command = Command()
+        self.assertTrue(command.update_card_localisations())
+        self.assertEqual(command.dirty_card_ids, {card.id})
@@ -16,7 +16,7 @@ from django.db import transaction
 from bs4 import BeautifulSoup
 
 from sylvan_library.cards.models.card import Card, CardFace
-from sylvan_library.cards.models.decks import Deck, DeckCard
+from sylvan_library.cards.models.decks import Deck, DeckCard, UserCardDeckUsage
 
 
 class Command(BaseCommand):
@@ -205,6 +205,10 @@ class Command(BaseCommand):
 
                 self.parse_deck_card(line, deck)
 
+            UserCardDeckUsage.refresh(
+                deck.owner_id, deck.cards.values_list("card_id", flat=True)
+            )
+
             self.parsed_deck_uris.append(deck_uri)
             self.write_parsed_decks_to_file()
         time.sleep(1)
@@ -71,6 +71,13 @@ class QuerySearchForm(forms.Form):
         except (TypeError, ValueError):
             return 1
 
+    def get_cursor(self) -> Optional[str]:
+        """
+        Gets the cursor of the previous page of results
+        :return: The cursor if it exists, otherwise None
+        """
+        return self.data.get("after") or None
+
     def get_search(self, user: User) -> Tuple[ParseSearch, QueryContext]:
         """
         Gets the search object using the data from this form
@@ -79,13 +86,16 @@ class QuerySearchForm(forms.Form):
         self.full_clean()
 
         search = ParseSearch(self.data.get("query_string"), user)
-        search.build_parameters()
+        with search.timings.measure("parse"):
+            search.build_parameters()
         query_context = QueryContext(
             user=user,
             search_mode=search.root_parameter.get_default_search_context(),
         )
-        search.root_parameter.validate(query_context)
-        search.search(query_context, self.get_page_number())
+        with search.timings.measure("validate"):
+            search.root_parameter.validate(query_context)
+        search.search(query_context, self.get_page_number(), cursor=self.get_cursor())
+        search.timings.log(repr(search.query_string))
         return search, query_context
 
 
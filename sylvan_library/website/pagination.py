@@ -2,7 +2,7 @@
 MOdule for handling pagination of search results and decks
 """
 
-from typing import List
+from typing import List, Optional
 from django.core.paginator import Paginator
 
 
@@ -21,6 +21,7 @@ class PageButton:
         is_previous=False,
         is_next=False,
         is_spacer=False,
+        cursor=None,
     ) -> None:
         self.number = number
         self.enabled = is_enabled
@@ -28,16 +29,21 @@ class PageButton:
         self.is_previous = is_previous
         self.is_next = is_next
         self.is_spacer = is_spacer
+        self.cursor = cursor
 
 
 def get_page_buttons(
-    paginator: Paginator, current_page: int, page_span: int
+    paginator: Paginator,
+    current_page: int,
+    page_span: int,
+    next_cursor: Optional[str] = None,
 ) -> List[PageButton]:
     """
     Gets the page buttons that should appear for this search based on the number of pages
     in the results and hoa many pages the buttons should span
     :param current_page: The current page
     :param page_span: The number of pages to the left and right of the current page
+    :param next_cursor: The cursor that the next button should use to find the next page
     :return: A list of page buttons. Some of them can disabled padding buttons, and there will
     be a next and previous button at the start and end too
     """
@@ -63,7 +69,12 @@ def get_page_buttons(
         0, PageButton(max(current_page - 1, 1), current_page != 1, is_previous=True)
     )
     page_buttons.append(
-        PageButton(current_page + 1, current_page != paginator.num_pages, is_next=True)
+        PageButton(
+            current_page + 1,
+            current_page != paginator.num_pages,
+            is_next=True,
+            cursor=next_cursor,
+        )
     )
 
     return page_buttons
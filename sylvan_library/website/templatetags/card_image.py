@@ -7,6 +7,7 @@ from typing import Optional
 
 from django import template
 from django.contrib.staticfiles import finders
+from django.core.exceptions import ObjectDoesNotExist
 
 from sylvan_library.cards.models.card import (
     CardLocalisation,
@@ -116,6 +117,13 @@ def card_image_url(card: Card) -> str:
     :param card: The card to get an image for
     :return: The relative image path
     """
+    try:
+        path = card.search_metadata.preferred_image_path
+    except ObjectDoesNotExist:
+        path = None
+    if does_image_exist(path):
+        return path
+
     non_promo_printings = card.printings.exclude(set__type="promo")
     if non_promo_printings.exists():
         printing = non_promo_printings.order_by("-set__release_date").first()
@@ -10,7 +10,7 @@ from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
 
 from sylvan_library.cards.models.card import Card
-from sylvan_library.cards.models.decks import Deck
+from sylvan_library.cards.models.decks import Deck, UserCardDeckUsage
 from sylvan_library.cards.models.user import UserProps
 from sylvan_library.website.forms import DeckForm
 from sylvan_library.website.pagination import get_page_buttons
@@ -152,12 +152,15 @@ def deck_edit(request: WSGIRequest, deck_id: int) -> HttpResponse:
             with transaction.atomic():
                 deck.full_clean()
                 deck.save()
+                card_ids = set(deck.cards.values_list("card_id", flat=True))
                 deck.cards.all().delete()
 
                 deck_cards = deck_form.get_cards()
                 for deck_card in deck_cards:
                     deck_card.full_clean()
                     deck_card.save()
+                    card_ids.add(deck_card.card_id)
+                UserCardDeckUsage.refresh(deck.owner_id, card_ids)
 
                 if not deck_form.cleaned_data.get(
                     "skip_validation"
@@ -207,6 +210,9 @@ def deck_create(request: WSGIRequest) -> HttpResponse:
                     for deck_card in deck_form.get_cards():
                         deck_card.full_clean()
                         deck_card.save()
+                    UserCardDeckUsage.refresh(
+                        deck.owner_id, deck.cards.values_list("card_id", flat=True)
+                    )
 
                     if not deck_form.cleaned_data.get(
                         "skip_validation"
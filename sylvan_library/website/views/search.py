@@ -14,16 +14,20 @@ def card_search(request: HttpRequest) -> HttpResponse:
     query_form = QuerySearchForm(request.GET)
     search, query_context = query_form.get_search(user=request.user)
 
-    return render(
+    response = render(
         request,
         "website/search.html",
         {
             "query_form": query_form,
             "results": search.results,
             "result_count": search.paginator.count,
+            "result_count_is_estimate": search.paginator.count_is_estimate,
             "page": search.page,
             "page_buttons": get_page_buttons(
-                search.paginator, query_form.get_page_number(), 3
+                search.paginator,
+                query_form.get_page_number(),
+                3,
+                next_cursor=search.next_cursor,
             ),
             "page_title": (
                 f"{search.query_string} - Sylvan Library"
@@ -34,3 +38,6 @@ def card_search(request: HttpRequest) -> HttpResponse:
             "error_message": search.error_message,
         },
     )
+    if search.timings.enabled:
+        response["Server-Timing"] = search.timings.get_server_timing()
+    return response